@@ -1,598 +1,2929 @@
 import random
-from collections import deque
+from array import array
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+import hashlib
+import json
 import logging
+import mmap
+import os
+import re
+import struct
 import sys
-import time
 import threading
-import logging
+import time
+import tracemalloc
 
-def minesweeper():
+######### GAME CONSTANTS #########
 
-    ######### 'GLOBAL' GAME VARIABLES (Only global to the minesweeper function) #########
+DIFFICULTY_PRESETS = {
+    "E":  [9, 9, 8, "EASY"],                  ## width, height, num_mines, display name
+    "M":  [12, 12, 15, "MEDIUM"],             ## This list is completely dynamic, meaning you can change it!
+    "H":  [15, 15, 25, "HARD"],               ## If you add or remove difficulty presets they will automatically appear in the game menu
+    "W":  [20, 10, 25, "WIDE"],                                               
+    "C":  [0, 0, 0, "CUSTOM"],                ## The formatting has to match so it can grab the display name
+    "U":  [0, 0, 0, "UNLIMITED"]              ## This is a special mode for hardcore testing!! WILL MAKE GAME CRASH!!!
+} 
 
-    ascii_string = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ascii_string = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+SPARSE_MINE_RATIO = 4                                       ## place_mines uses rejection sampling if mines are at most 1/4 of the cells
+CHUNK_SIZE = 64                                             ## chunked grids (UNLIMITED mode) are made in 64 by 64 squares
+MAX_COLD_CHUNKS = 256                                       ## how many untouched chunks a chunked grid keeps around before throwing old ones away
+PAN_DIRECTIONS = {"U": (0, -1), "D": (0, 1), "L": (-1, 0), "R": (1, 0)}    ## direction letter -> (dx, dy) for the pan command
+STATS_FILE = "minesweeper_stats.json"                       ## where the instrumentation gets saved when the game exits (None turns it off)
+MAX_MOVE_RECORDS = 10000                                    ## how many per-move timing records the instrumentation keeps
+VIEWPORT_RESERVED_LINES = 9                                 ## lines the viewport leaves free for borders, status and the prompt
+CELL_NUMBER_STRINGS = ["   "] + [f" {number} " for number in range(1, 9)]   ## what a revealed safe cell looks like, by adjacent mine count
+NOT_MINE_TABLE = bytes([0xFF, 0x00]) + bytes(254)           ## bytes.translate table: 0 (no mine) -> 0xFF, 1 (mine) -> 0x00
+ZERO_COUNT_TABLE = bytes([1]) + bytes(255)                  ## bytes.translate table: adjacent count 0 -> 1, anything else -> 0
+BYTES_TO_BIT_CHARS = bytes.maketrans(b"\x00\x01", b"01")     ## one byte per cell -> the "0"/"1" text int(text, 2) reads
+BIT_CHARS_TO_BYTES = bytes.maketrans(b"01", b"\x00\x01")     ## and back again
+NONZERO_TABLE = bytes([0]) + bytes([1]) * 255               ## bytes.translate table: 0 -> 0, anything else -> 1
+DEFAULT_SAVE_FILE = "minesweeper_save.msw"                  ## what 'save' and 'load' use if you don't give them a file name
+JOURNAL_DIR = "minesweeper_journals"                        ## every game's move journal goes in here (None turns journals off)
+FIRST_CLICK = "CELL"                                        ## "CELL": the first click is never a mine, "OPENING": nor its 3x3, None: off
+LEADERBOARD_FILE = "minesweeper_scores.db"                  ## SQLite file with every win (None keeps them for this session only)
+LEADERBOARD_TOP = 3                                         ## how many best times the menu shows for each preset
+LEADERBOARD_BATCH = 500                                     ## most wins the leaderboard writer puts in one transaction
+AUTO_CHORD = False                                          ## True makes chords carry on by themselves through every number that has all its flags
+MEMORY_SAMPLE_LIMIT = 1000                                  ## bigger containers get a random sample measured and scaled up
+NO_GUESS_BOARDS = False                                     ## True (or --no-guess) makes preset games come from a pool of boards you can solve without guessing
+NO_GUESS_WORKERS = 2                                        ## worker processes that make the no-guess boards in the background
+LOG_LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARNING": logging.WARNING,
+              "ERROR": logging.ERROR, "CRITICAL": logging.CRITICAL}
+LOG_LEVEL = "INFO"                                          ## << CHANGE LOGGING LEVEL HERE !!! (type 'debug' in the game to turn DEBUG on)
+LIVE_CLOCK = False                                          ## True keeps the time on the status line ticking while you type (POSIX terminals)
 
-    log_level_dictionary = {                                    ## This dictionary makes it easy to change the logging level.  
-    "DEBUG": logging.DEBUG,                                     ## You can also dynamically change the logging level in the game.
-    "INFO": logging.INFO,                                       ## logger_level_string = input("Enter logging level: ").upper()
-    "WARNING": logging.WARNING,
-    "ERROR": logging.ERROR,
-    "CRITICAL": logging.CRITICAL,
-    }
-    logger_level_string = log_level_dictionary["DEBUG"]         ## << CHANGE LOGGING LEVEL HERE !!!
+################################################################
 
-    logging.basicConfig(level=logger_level_string, format="%(asctime)s - %(levelname)s - %(message)s")
+class Memory_Report_Class:
+    """ The memory report measures how much memory things really take, not just the outer object like sys.getsizeof.
+    It follows containers (dicts, lists, sets, deques ...) and objects (their __dict__ or __slots__) all the way down, and
+    counts anything shared only once.  \n
+    Walking every object of a huge board would take forever, so a container with more than MEMORY_SAMPLE_LIMIT items
+    only has a random sample of them measured, and the sample's size gets scaled up to the whole container. The report
+    says which parts were sampled like that. """
 
-    ################################################################
+    LEAF_TYPES = (str, bytes, bytearray, int, float, bool, type(None), range, array)   ## nothing to follow inside these
 
-    class Size_Getter_Class():
+    @staticmethod
+    def deep_size(obj, seen, rng, sample_limit=MEMORY_SAMPLE_LIMIT):
+        """ This gives (bytes, sampled) for obj and everything inside it that isn't in seen (a set of ids) already. """
+        if id(obj) in seen:
+            return 0, False
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, Memory_Report_Class.LEAF_TYPES):
+            return size, False
+        if isinstance(obj, dict):
+            children = [item for pair in obj.items() for item in pair]   ## keys and values, not the item tuples
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            children = list(obj)
+        else:
+            children = []
+            if hasattr(obj, "__dict__"):
+                size += sys.getsizeof(obj.__dict__)
+                children.extend(obj.__dict__.values())
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    children.append(getattr(obj, name, None))
+        scale = 1.0
+        if len(children) > sample_limit:
+            scale = len(children) / sample_limit
+            children = rng.sample(children, sample_limit)
+        sampled = scale != 1.0
+        children_size = 0
+        for child in children:
+            child_size, child_sampled = Memory_Report_Class.deep_size(child, seen, rng, sample_limit)
+            children_size += child_size
+            sampled = sampled or child_sampled
+        return size + int(children_size * scale), sampled
 
-        @staticmethod
-        def get_size(obj):
-            """Get the size of object in kilobytes and megabytes."""
-            size_bytes = sys.getsizeof(obj)
-            size_kb = size_bytes / 1024
-            size_mb = size_kb / 1024
-            return size_bytes, size_kb, size_mb
-        
-    class Cell_Class:
-        """ The cell class takes care of the state of each cell in the grid. Each cell has a boolean value for whether it is a mine,
-        whether it is revealed, and whether it is flagged. It also has an integer value for the number of adjacent mines. """
-
-        def __init__(self):
-            self.is_mine = False
-            self.is_revealed = False
-            self.is_flagged = False
-            self.adjacent_mines = 0
-
-    class Grid_Class:
-        """ The grid class takes care of the state of the entire grid.  \n
-        It has a width, height, and number of mines. It populates the grid matrix with cells.  \n
-        The place_mines method randomly places mines on the grid. The display method prints the grid. """
-
-        def __init__(self, width, height, num_mines, difficulty):       ## The number of mines and the difficulty are chosen by the player.
-            self.width = width
-            self.height = height
-            self.num_mines = num_mines
-            self.difficulty = difficulty
-            self.grid_matrix = [[Cell_Class() for _ in range(width)] for _ in range(height)]    ## Initialize the grid with cells
-            self.reveal_toggle = False      ## This is a toggle for revealing the grid for testing purposes
-            self.place_mines()              ## Call the place_mines method to place the mines on the grid
-            self.surrounding_counter()      ## Call the surrounding_counter method to count the number of adjacent mines for each cell
-            self.create_move_dict()         ## Call the create_move_dict method to create a dictionary of moves
-            self.run_size_getter()          ## Call the run_size_getter method to get the size of the grid object in KB
-
-        def run_size_getter(self):
-            """ This is a method that runs the size getter class to get the size of the grid object. """
-            size_bytes, size_kb, size_mb = Size_Getter_Class.get_size(self.grid_matrix)
-            self.size_bytes = size_bytes
-            logging.debug(f"\033[33m Grid size in bytes: {size_bytes}, KB: {size_kb}, MB: {size_mb} \033[0m")
-
-        def place_mines(self):
-            """ This is a method that places mines on the grid. It does this by creating a list of all the positions on the grid,
-            then randomly selecting a number of positions equal to the number of mines. It then sets the is_mine attribute of the cell at that
-            position to True. """
-
-            positions = [(x, y) for x in range(self.width) for y in range(self.height)]     ## creates a list of all the coordinates on the grid
-            mine_positions = random.sample(positions, self.num_mines)   ## random.sample takes a list and a number, and returns a random sample that number of times
-            for x, y in mine_positions:                    ## Tuple unpacking
-                self.grid_matrix[y][x].is_mine = True      ## Set the is_mine attribute of the cell at that position to True
-                """ The above line works because the grid is a 2D list of cells (aka a matrix).
-                The grid is a list of rows, grid[y] is a row, and grid[y][x] is a cell. """
-
-        def surrounding_counter(self):
-            """ This is a method that counts the number of adjacent mines for each cell in the grid. """
-            for y in range(self.height):
-                for x in range(self.width):
-                    cell = self.grid_matrix[y][x]       ## Get the cell at the current position. Remember that it retrieves the OBJECT at that position.
-                    if cell.is_mine:                    ## If the cell is a mine,
-                        continue                        ## skip it.
-                    for dy in range(-1, 2):             ## Iterate over the 3x3 grid around the current cell
-                        for dx in range(-1, 2):         ## dy is up/down, dx is left/right
-                            if dy == 0 and dx == 0:     ## if both dy and dx are 0, then we're at the current cell,
-                                continue                ## a cell does not count itself.
-                            new_x = x + dx              ## x is -1 means left, 0 means center, 1 means right
-                            new_y = y + dy              ## y is -1 means up, 0 means center, 1 means down
-                            if 0 <= new_x < self.width and 0 <= new_y < self.height:    ## if the currently scanned coordinates are within the grid,
-                                if self.grid_matrix[new_y][new_x].is_mine:              ## if the cell at the scanned coordinates contains a mine,
-                                    cell.adjacent_mines += 1                            ## increase the adjacent_mines attribute of the current cell by 1
-
-        def create_move_dict(self):
-            """ This is a method that creates a dictionary of moves. It will use the player's input as the key and the coordinates as the value. """
-            self.move_dict = {}                         ## start with blank dictionary
-            try:
-                for y in range(self.height):            ## then for width and height of the grid:
-                    for x in range(self.width):
-                        self.move_dict[ascii_string[x] + str(y + 1)] = (x, y)  ## ascii_string at x index, column at y index
-            except IndexError:
-                logging.debug(f"\033[33m IndexError triggered. \033[0m")
-                logging.debug(self.move_dict)
-            logging.debug(f"\033[33m Move dictionary created. \033[0m")
-            logging.debug(self.move_dict)
-            
-        def cluster_reveal(self, x, y):
-            """ This is a method that reveals all cells in a cluster of cells that are not adjacent to any mines.  \n
-            X and Y are the coordinates of the cell that was clicked.  \n
-            First it makes a deque of the cell that was clicked. Then it iterates over the deque.  \n
-            Only cells with no adjacent mines are added to the deque. If the clicked cell has adjacent mines, it is
-            immediately revealed and the process stops. Oh also it uses a deque, its NOT a recursive function!
-            I heard that deque is generally better than recursive functions for this kind of thing."""
-
-            to_check = deque([(x, y)])             ## We start with a deque of the cell that was clicked
-            first_cell = self.grid_matrix[y][x]    ## Get the cell that was clicked
-            if first_cell.adjacent_mines > 0:      ## If the cell that was clicked is adjacent to any mines
-                first_cell.is_revealed = True      ## reveal the cell and return
-                return
-            while to_check:                        ## while there are still cells to check
-                x, y = to_check.popleft()          ## get the leftmost cell in the deque with tuple unpacking
-                for dy in range(-1, 2):
-                    for dx in range(-1, 2):        ## Iterate over the 3x3 grid around the current cell
-                        new_x = x + dx             ## x is -1 means left, 0 means center, 1 means right
-                        new_y = y + dy             ## y is -1 means up, 0 means center, 1 means down
-                        if 0 <= new_x < self.width and 0 <= new_y < self.height:     ## if the new coordinates are within the grid,
-                            current_cell = self.grid_matrix[new_y][new_x]            ## get the cell at the new coordinates.
-                            if not current_cell.is_revealed:                         ## if the cell is not revealed,  
-                                current_cell.is_revealed = True                      ## reveal the cell.
-                                if current_cell.adjacent_mines == 0:                 ## IF the cell is not adjacent to any mines,
-                                    to_check.append((new_x, new_y))                  ## add it to the deque and repeat the process.
-
-        def special_reveal(self, x, y):
-            """ This is a method that reveals all cells that are adjacent to the cell that was clicked (a 3x3 area),
-            BUT it will skip any cells that are flagged. """
-
-            starting_cell = self.grid_matrix[y][x] ## Get the cell that was clicked
-            logging.debug(f"\033[33m Starting cell {x}, {y}    {starting_cell.adjacent_mines} \033[0m")
-            flag_count = 0
-            for dy in range(-1, 2):
-                for dx in range(-1, 2):
-                    new_x = x + dx
-                    new_y = y + dy
-                    if 0 <= new_x < self.width and 0 <= new_y < self.height:
-                        current_cell = self.grid_matrix[new_y][new_x]
-                        if current_cell.is_flagged:
-                            flag_count += 1
-                            logging.debug(f"\033[33m Found flag. Flag count: {flag_count} \033[0m")
-                            continue
-            flag_checker = flag_count >= starting_cell.adjacent_mines
-            logging.debug(f"\033[33m Flag count: {flag_count} Adjacent mines: {starting_cell.adjacent_mines} \033[0m")
-            logging.debug(f"\033[33m Flag checker (True means allowed to proceed): {flag_checker} \033[0m")
-            if not flag_checker:
-                logging.debug(f"\033[33m Flag count is less than adjacent mines. \033[0m")
-                return
+    @staticmethod
+    def measure(components, sample_limit=MEMORY_SAMPLE_LIMIT):
+        """ This measures a dictionary of name -> object and gives back a dictionary that can go straight into JSON. The
+        components are measured in order and share one seen set, so something two of them hold is counted by the first. """
+        seen = set()
+        rng = random.Random(0)                          ## the same sample every time, so reports can be compared
+        sizes = {}
+        sampled = []
+        for name, obj in components.items():
+            sizes[name], was_sampled = Memory_Report_Class.deep_size(obj, seen, rng, sample_limit)
+            if was_sampled:
+                sampled.append(name)
+        return {"components": sizes, "total_bytes": sum(sizes.values()), "sampled": sampled}
+
+    @staticmethod
+    def lines(report):
+        """ This turns a report into lines of text for the stats command and the log. """
+        lines = [f" Memory: {report['total_bytes'] / 1024:,.1f} KB in total"
+                 + (f", {report['bytes_per_cell']:.2f} bytes per cell" if report.get("bytes_per_cell") is not None else "")]
+        for name, size in report["components"].items():
+            note = " (sampled)" if name in report["sampled"] else ""
+            lines.append(f"   {name:<24}{size / 1024:>14,.1f} KB{note}")
+        for name, peak in report.get("setup_peaks", {}).items():
+            lines.append(f"   setup peak: {name:<12}{peak / 1024:>14,.1f} KB")
+        return lines
+
+class Memory_Trace_Class:
+    """ A memory trace is a with block that records the tracemalloc peak of the code inside it into peaks[name]. If
+    tracemalloc isn't running it starts it for the block and stops it again after, so it costs nothing the rest of the
+    time. It resets the tracemalloc peak, so don't use it inside something else that's measuring a peak. """
+
+    __slots__ = ("peaks", "name", "started", "baseline")
+
+    def __init__(self, peaks, name):
+        self.peaks = peaks
+        self.name = name
+        self.started = False
+        self.baseline = 0
+
+    def __enter__(self):
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        self.peaks[self.name] = tracemalloc.get_traced_memory()[1] - self.baseline
+        if self.started:
+            tracemalloc.stop()
+        return False
+
+class Coordinate_Codec_Class:
+    """ The coordinate codec turns moves like "B3" into (x, y) coordinates and back again, by working them out instead of
+    looking them up. Columns work like spreadsheet columns: A to Z, then AA, AB ... AZ, BA and so on, so any board width
+    can be played. Rows are just numbers starting at 1. Both the move input and the column headers use this class. """
+
+    move_pattern = re.compile(r"([A-Z]+)([0-9]+)")      ## letters for the column followed by digits for the row
+
+    @staticmethod
+    def column_label(x):
+        """ Column index (starting at 0) to letters. 0 is A, 25 is Z, 26 is AA. """
+        letters = []
+        x += 1                                          ## spreadsheet columns are like base 26 but with no zero digit
+        while x:
+            x, remainder = divmod(x - 1, 26)
+            letters.append(ascii_string[remainder])
+        return "".join(reversed(letters))
+
+    @staticmethod
+    def column_index(label):
+        """ Letters to column index (starting at 0). A is 0, Z is 25, AA is 26. """
+        x = 0
+        for letter in label:
+            x = x * 26 + (ord(letter) - ord("A") + 1)
+        return x - 1
+
+    @staticmethod
+    def parse(move, width, height):
+        """ Move text (already uppercase) to (x, y), or None if it's not a valid move on a width by height board. """
+        match = Coordinate_Codec_Class.move_pattern.fullmatch(move)
+        if match is None:
+            return None
+        x = Coordinate_Codec_Class.column_index(match.group(1))
+        y = int(match.group(2)) - 1
+        if 0 <= x < width and 0 <= y < height:
+            return x, y
+        return None
+
+    @staticmethod
+    def parse_line(line, width, height):
+        """ A line of any number of moves (already uppercase), like "A1 B2 -F C3" or "A1,B2;C3", to a list of
+        ("reveal" or "flag", x, y) moves and a list of the words that weren't moves. "-F" flags the move after it. """
+        moves, bad_words = [], []
+        action = "reveal"
+        for word in line.replace(",", " ").replace(";", " ").split():
+            if word == "-F":
+                if action == "flag":                    ## two in a row
+                    bad_words.append(word)
+                action = "flag"
+                continue
+            move = Coordinate_Codec_Class.parse(word, width, height)
+            if move is None:
+                bad_words.append(word)
             else:
-                logging.debug(f"\033[33m Proceeding to reveal stage.. \033[0m")
-                for dy in range(-1, 2):
-                    for dx in range(-1, 2):        ## Iterate over the 3x3 grid around the current cell
-                        new_x = x + dx             ## x is -1 means left, 0 means center, 1 means right
-                        new_y = y + dy             ## y is -1 means up, 0 means center, 1 means down
-                        if 0 <= new_x < self.width and 0 <= new_y < self.height:     ## if the new coordinates are within the grid,
-                            current_cell = self.grid_matrix[new_y][new_x]                   ## get the cell at the new coordinates.
-                            if not current_cell.is_revealed and not current_cell.is_flagged:  ## if the cell is not revealed and not flagged,
-                                if current_cell.is_mine:                                ## if the cell is a mine,
-                                    #current_cell.is_revealed = True                    ## reveal the cell.
-                                    return "HIT"                                        ## return "HIT" to end the game.
-                                else:
-                                    current_cell.is_revealed = True
-                                    if current_cell.adjacent_mines == 0:
-                                        self.cluster_reveal(new_x, new_y)               ## if the cell is not adjacent to any mines, reveal the cluster.
-
-        def int_generator(self):
-            """ This is a generator that yields integers from 0 to UNLIMITED!! Its for the unlimited mode. """
-            i = 1
-            while True:
-                yield i
-                i += 1       
-    
-        def display(self, mines_remaining):
-            """ This is a method that controls the display of the grid. It prints the grid to the console and controls 
-            how the cells are displayed based on their state. """
-            ## Undernote: It looks janky because of all the ASCII formatting.               
-
-            logging.debug(f"\033[33m Display method initiated. \033[0m")
-            logging.debug(f"GRID LENGTH: {len(self.grid_matrix)} GRID WIDTH: {len(self.grid_matrix[0])}")
-            print()                  
-            row_len = len(self.grid_matrix[0])                  ## Get the length of the first row of the grid
-            logging.debug(f"\033[33m Row length: {row_len} \033[0m")
-            logging.debug(f"\033[33m self.difficulty: {self.difficulty} \033[0m")
-            print("    ", end="")
-            if self.difficulty == "UNLIMITED":
-                gen = self.int_generator()
-                for _ in range(row_len):                        ## If the difficulty is unlimited, print numbers instead of letters
-                    print(" ", next(gen), end="")               ## Print the numbers 1 to UNLIMITED
-            else:                                               ## If the difficulty is custom, print the width and height
-                for letter in ascii_string[:row_len]:           ## Print the letters of the alphabet up to the length of the first row
-                    print(" ", letter, end="")
-            print("\n    ", "---" * row_len)                    ## border bar
-            row_count = 1                                       ## used to number the rows
-            for row in self.grid_matrix:
-                if row_count < 10:                              ## if the row number is less than 10, add a space for formatting
-                    print(row_count, "  |", end="")             ## Print the row number and the border bar
-                elif row_count >= 10:                           ## ASCII formatting for double digits
-                    print(row_count, " |", end="")              
-                for cell in row:
-                    if not cell.is_revealed:                    ## if the cell is not revealed it can be either flagged or blank
-                        if cell.is_flagged:
-                            print(" ⚑ ", end="")
-                        else:
-                            print("▒▒▒", end="")
-                    if cell.is_revealed:                        ## if the cell is revealed, it can be a mine, a number, or blank
-                        adjacent = cell.adjacent_mines          ## get the number of adjacent mines
-                        if cell.is_mine:
-                            print(" X ", end="")                ## You wouldn't see a mine unless you either won or lost (or turned on reveal)
-                        elif adjacent == 0:                     ## if the cell is not adjacent to any mines,
-                            print("   ", end="")                ## print a blank space.
-                        else:
-                            print(f" {adjacent} ", end="")      ## if it is adjacent to mines, print the number of adjacent mines
-                print("|")                                      ## right-side border bar   
-                row_count += 1                                  ## increment the row counter
-            print("    ", "---" * row_len)                      ## border bar
-
-        def reveal_toggle_func(self, reason):
-            """ This is a method that switches all cells to either revealed or unrevealed. It is used for winning and losing, or testing. """
-            if reason == "GAME":
-                for row in self.grid_matrix:
-                    for cell in row:
-                        cell.is_revealed = True                 ## set all cells to revealed
-            if reason == "REVEAL":
-                if not self.reveal_toggle:                      ## if the reveal toggle is off,
-                    for row in self.grid_matrix:
-                        for cell in row:
-                            cell.is_revealed = True             ## set all cells to revealed
-                if self.reveal_toggle:                          ## if the reveal toggle is on,
-                    for row in self.grid_matrix:
-                        for cell in row:
-                            cell.is_revealed = False            ## set all cells to unrevealed
-                self.reveal_toggle = not self.reveal_toggle     ## switch the toggle 
-            logging.debug(f"\033[33m Reveal toggle is {self.reveal_toggle} \033[0m")                    
-
-        def check_win(self):
-            """ This is a method that checks if the player has won the game.   \n
-            The math is pretty simple. If total cells minus revealed cells equals the number of mines, then the player has won. """
-            ## Undernote: This logic is independent of flagging. The player can win regardless of whether they flagged all the mines.
-
-            revealed_count = 0                        ## Note: Because this recounts every game turn,
-            mine_count = self.num_mines               ## it will adjust dynamically if you activate the reveal toggle.
-            total_cells = self.width * self.height
-            for row in self.grid_matrix:
-                for cell in row:
-                    if cell.is_revealed:
-                        revealed_count += 1
-            logging.debug(f"\033[33m Total cells: {total_cells} | Revealed cells: {revealed_count} | Total Mines: {mine_count} \033[0m")
-            if total_cells - revealed_count == mine_count:
-                self.reveal_toggle_func("GAME")
-                logging.debug(f"\033[33m Win condition met. \033[0m")
-                return True
-            
-    ##################################################################        
-    class Game_Manager_Class:
-        """ This is a class that manages the game. It takes care of the game input and some states. """
-
-        difficulty_dict = {
-            "E":  [9, 9, 8, "EASY"],                  ## width, height, num_mines, display name
-            "M":  [12, 12, 15, "MEDIUM"],             ## This list is completely dynamic, meaning you can change it!
-            "H":  [15, 15, 25, "HARD"],               ## If you add or remove difficulty presets they will automatically appear in the game menu
-            "W":  [20, 10, 25, "WIDE"],                                               
-            "C":  [0, 0, 0, "CUSTOM"],                ## The formatting has to match so it can grab the display name
-            "U":  [0, 0, 0, "UNLIMITED"]              ## This is a special mode for hardcore testing!! WILL MAKE GAME CRASH!!!
-        } 
-
-        def __init__(self, previous_times):
-            self.mines_remaining = 0                  ## These get initialized to zero at the start of the game.
-            self.difficulty_setting = "NONE"          ## Except for previous_times which is passed in from the main loop.
-            self.width = 0                            ## These settings get set by the difficulty_input method.
-            self.height = 0                           ## Then they're accessed by the Main_Game_Class to create the grid object.
-            self.num_mines = 0
-            self.previous_times = previous_times
-
-        def play_again(self):
-            """ This is only called in the external loop if main() is exited. It asks the player if they want to play again. """
-            while True:
-                logging.debug(f"\033[33m play_again called. \033[0m")
-                play_again = input("Would you like to play again? (Y/N): ")
-                play_again = play_again.upper()
-                if play_again == "Y":
-                    logging.debug(f"\033[33m Game should be restarting... \033[0m")
-                    return True
-                elif play_again == "N":
-                    logging.debug(f"\033[33m Game Manager stopped. \033[0m")       
-                    return False
-                else:
-                    print("Invalid input. Please enter Y or N.")
+                moves.append((action, *move))
+            action = "reveal"
+        if action == "flag":                            ## a -F with nothing after it
+            bad_words.append("-F")
+        return moves, bad_words
+
+    @staticmethod
+    def format(x, y):
+        """ (x, y) back to move text, e.g. (1, 2) is "B3". """
+        return f"{Coordinate_Codec_Class.column_label(x)}{y + 1}"
+
+class Cell_Class:
+    """ The cell class is a lightweight view of one cell in the grid. It doesn't hold any state itself, instead it points at
+    an index in the flat layers of the grid (mines, revealed, flagged and adjacent). So you can still do things like
+    cell.is_mine or cell.is_flagged = True, but the actual data lives in a bytearray with one byte per cell. """
+
+    __slots__ = ("grid", "index")       ## __slots__ means no __dict__ per view, so making them on the fly is cheap
+
+    def __init__(self, grid, index):
+        self.grid = grid                ## The grid that owns the layers
+        self.index = index              ## The flat index of the cell, which is y * width + x
+
+    @property
+    def is_mine(self):
+        return bool(self.grid.mines[self.index])
+
+    @is_mine.setter
+    def is_mine(self, value):
+        self.grid.set_mine(self.index, value)
+
+    @property
+    def is_revealed(self):
+        return bool(self.grid.revealed[self.index])
+
+    @is_revealed.setter
+    def is_revealed(self, value):
+        self.grid.set_revealed(self.index, value)     ## goes through the grid so the revealed counters stay correct
+
+    @property
+    def is_flagged(self):
+        return bool(self.grid.flagged[self.index])
+
+    @is_flagged.setter
+    def is_flagged(self, value):
+        self.grid.set_flagged(self.index, value)
+
+    @property
+    def adjacent_mines(self):
+        return self.grid.adjacent[self.index]
+
+    @adjacent_mines.setter
+    def adjacent_mines(self, value):
+        self.grid.adjacent[self.index] = value
+
+class Grid_Row_Class:
+    """ This is a view of a single row of the grid. grid_matrix[y] gives you one of these, and then row[x] gives you a cell. """
+
+    __slots__ = ("grid", "start")
+
+    def __init__(self, grid, y):
+        self.grid = grid
+        self.start = y * grid.width     ## flat index of the first cell in this row
+
+    def __len__(self):
+        return self.grid.width
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.grid.width:
+            raise IndexError("column index out of range")
+        return Cell_Class(self.grid, self.start + x)
+
+    def __iter__(self):
+        grid = self.grid
+        for index in range(self.start, self.start + grid.width):
+            yield Cell_Class(grid, index)
+
+class Grid_Matrix_Class:
+    """ This is a view that makes the flat layers look like the old list of lists, so grid_matrix[y][x] still works. """
+
+    __slots__ = ("grid",)
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def __len__(self):
+        return self.grid.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.grid.height:
+            raise IndexError("row index out of range")
+        return Grid_Row_Class(self.grid, y)
+
+    def __iter__(self):
+        for y in range(self.grid.height):
+            yield Grid_Row_Class(self.grid, y)
+
+class Grid_Class:
+    """ The grid class takes care of the state of the entire grid.  \n
+    It has a width, height, and number of mines. The state of the cells is stored in flat bytearrays (one byte per cell),
+    with grid_matrix being a view on top of them so you can still use grid_matrix[y][x].  \n
+    The place_mines method randomly places mines on the grid. The display method prints the grid.  \n
+    The grid also keeps a live count of revealed safe cells (and revealed mines) so check_win doesn't need to look at every cell.
+    Any code that reveals cells has to go through set_revealed (the cell view does this for you) so the counts stay right. """
+
+    debug_checks = False                ## Set this to True to double check the revealed counters with a full recount on every win check
+    trace_setup_memory = False          ## Set this to True to record the tracemalloc peak of each setup step in setup_peaks
+
+    def __init__(self, width, height, num_mines, difficulty, seed=None):   ## The number of mines and the difficulty are chosen by the player.
+        self.width = width
+        self.height = height
+        self.num_mines = num_mines
+        self.difficulty = difficulty
+        self.seed = seed                            ## Pass in a seed to get the same board every time. None means random.
+        self.rng = random.Random(seed)              ## The grid has its own random generator so seeded boards are reproducible
+        self.setup_peaks = {}                       ## setup step -> tracemalloc peak in bytes, if trace_setup_memory is on
+        with self.setup_step("create_layers"):
+            self.create_layers()                    ## Call the create_layers method to make the storage for the cells
+        self.grid_matrix = Grid_Matrix_Class(self)  ## grid_matrix[y][x] view over the layers
+        self.revealed_safe_count = 0                ## number of revealed cells that are not mines
+        self.revealed_mine_count = 0                ## number of revealed cells that are mines (only happens with reveal or game over)
+        self.changed_cells = set()                  ## flat indices changed since the last take_changed_cells() call
+        self.row_cache = {}                         ## row number -> the finished text of that row, used by display
+        self.dirty_rows = set()                     ## rows that changed since they were last drawn
+        self.row_cache_window = None                ## (first column, last column, gutter, show_all) that the cached rows were drawn with
+        self.viewport = difficulty == "UNLIMITED"   ## if True, only draw the part of the board that fits in the terminal
+        self.view_x = 0                             ## leftmost column in the viewport
+        self.view_y = 0                             ## top row in the viewport
+        self.show_all = False                       ## if True, display draws every cell as if it was revealed (the layers don't change)
+        self.reveal_toggle = False      ## This is a toggle for revealing the grid for testing purposes
+        self.game_over_shown = False                ## True once the game is won or lost, so the whole board gets drawn
+        with self.setup_step("place_mines"):
+            self.place_mines()          ## Call the place_mines method to place the mines on the grid
+        with self.setup_step("surrounding_counter"):
+            self.surrounding_counter()  ## Call the surrounding_counter method to count the number of adjacent mines for each cell
+        if logging.root.isEnabledFor(logging.DEBUG):
+            self.log_memory()           ## Measuring isn't free, so it's only done when someone will read it
+
+    def create_layers(self):
+        """ This is a method that makes the flat layers that hold the state of every cell. """
+        total_cells = self.width * self.height
+        self.mines = bytearray(total_cells)         ## 1 if the cell is a mine
+        self.revealed = bytearray(total_cells)      ## 1 if the cell is revealed
+        self.flagged = bytearray(total_cells)       ## 1 if the cell is flagged
+        self.adjacent = bytearray(total_cells)      ## number of adjacent mines (0 to 8 fits in a byte)
+        self.adjacent_flags = bytearray(total_cells)    ## number of flags in the 3x3 around the cell, itself included
+
+    def setup_step(self, name):
+        """ This is a method that gives back a with block for one setup step, which records its tracemalloc peak if
+        trace_setup_memory is on (and does nothing otherwise). """
+        if self.trace_setup_memory:
+            return Memory_Trace_Class(self.setup_peaks, name)
+        return nullcontext()
+
+    def memory_components(self):
+        """ This is a method that names the parts of the grid that hold memory, for Memory_Report_Class. """
+        return {
+            "mines": self.mines,
+            "revealed": self.revealed,
+            "flagged": self.flagged,
+            "adjacent": self.adjacent,
+            "adjacent_flags": self.adjacent_flags,
+            "render_cache": self.row_cache,
+            "dirty_rows": self.dirty_rows,
+            "changed_cells": self.changed_cells,
+        }
+
+    def memory_report(self, extra=None):
+        """ This is a method that measures the grid (plus any extra name -> object components) with Memory_Report_Class.
+        The report also has the number of cells, the bytes per cell and the setup peaks. """
+        components = self.memory_components()
+        if extra:
+            components.update(extra)
+        report = Memory_Report_Class.measure(components)
+        report["cells"] = self.width * self.height
+        report["bytes_per_cell"] = report["total_bytes"] / report["cells"] if report["cells"] else 0.0
+        report["setup_peaks"] = dict(self.setup_peaks)
+        return report
+
+    @property
+    def size_bytes(self):
+        return self.memory_report()["total_bytes"]
+
+    def log_memory(self):
+        """ This is a method that writes the memory report to the debug log. """
+        for line in Memory_Report_Class.lines(self.memory_report()):
+            logging.debug("\033[33m %s \033[0m", line)
+
+    def set_mine(self, index, value):
+        """ This is a method that sets the mine layer for one cell (by flat index) without touching the adjacency counts.
+        Use add_mine or remove_mine if you want the counts updated too. """
+        value = 1 if value else 0
+        if self.mines[index] == value:
+            return
+        self.mines[index] = value
+        self.changed_cells.add(index)
+        if self.revealed[index]:                    ## a revealed cell changing sides moves from one counter to the other
+            if value:
+                self.revealed_safe_count -= 1
+                self.revealed_mine_count += 1
+            else:
+                self.revealed_mine_count -= 1
+                self.revealed_safe_count += 1
+
+    def set_revealed(self, index, value):
+        """ This is a method that reveals or hides one cell (by flat index) and keeps the revealed counters up to date. """
+        value = 1 if value else 0
+        if self.revealed[index] == value:           ## no change, so the counters don't change either
+            return
+        self.revealed[index] = value
+        self.changed_cells.add(index)
+        step = 1 if value else -1
+        if self.mines[index]:
+            self.revealed_mine_count += step
+        else:
+            self.revealed_safe_count += step
+
+    def set_flagged(self, index, value):
+        """ This is a method that puts a flag on or takes a flag off one cell (by flat index). It also adds one to (or takes
+        one off) the flag count of every cell in the 3x3 around it, so chording never has to count the flags itself.
+        The counts are changed before the flag is, so a chunk that works its counts out right then doesn't count it twice. """
+        value = 1 if value else 0
+        if self.flagged[index] == value:
+            return
+        step = 1 if value else -1
+        adjacent_flags = self.adjacent_flags
+        width = self.width
+        for neighbour in self.neighbourhood(index % width, index // width):
+            adjacent_flags[neighbour] += step
+        self.flagged[index] = value
+        self.changed_cells.add(index)
+
+    def take_changed_cells(self):
+        """ This is a method that hands back the set of cells (flat indices) changed since the last time it was called,
+        and starts a fresh set. It also marks the rows of those cells as dirty so display knows to draw them again. """
+        changed = self.changed_cells
+        self.changed_cells = set()
+        width = self.width
+        self.dirty_rows.update(index // width for index in changed)
+        return changed
+
+    def recount_revealed(self):
+        """ This is a method that counts the revealed safe cells and revealed mines the slow way, by looking at the whole board.
+        It's only used to double check the live counters. """
+        revealed_int = int.from_bytes(self.revealed, "little")     ## one byte per cell, so bit_count() counts the cells
+        mine_int = int.from_bytes(self.mines, "little")
+        revealed_mines = (revealed_int & mine_int).bit_count()
+        revealed_safe = revealed_int.bit_count() - revealed_mines
+        return revealed_safe, revealed_mines
+
+    def verify_counters(self):
+        """ This is a method that checks the live counters against a full recount. It raises an AssertionError if they don't match. """
+        recounted = self.recount_revealed()
+        live = (self.revealed_safe_count, self.revealed_mine_count)
+        assert live == recounted, f"Revealed counters out of sync. live (safe, mines): {live} | recount: {recounted}"
+
+    def count_flags(self):
+        """ This is a method that counts the flags on the board. """
+        return self.flagged.count(1)
+
+    def state_digest(self):
+        """ This is a method that gives a SHA-256 of the mines, revealed and flagged layers, so two boards can be checked
+        for being in exactly the same state (the move journal uses this to check a replay). """
+        digest = hashlib.sha256()
+        for layer in (self.mines, self.revealed, self.flagged):
+            digest.update(bytes(layer[:]))
+        return digest.hexdigest()
+
+    def numbered_indices(self):
+        """ This is a method that finds every revealed cell with a number on it, without looking at the cells one by one
+        in Python. The revealed layer and a 'has a number' layer are anded together as big integers first. """
+        total_cells = self.width * self.height
+        revealed_int = int.from_bytes(bytes(self.revealed[:]), "little")
+        numbered_int = int.from_bytes(self.adjacent.translate(NONZERO_TABLE), "little")
+        both = (revealed_int & numbered_int).to_bytes(total_cells, "little")
+        result = []
+        index = both.find(1)
+        while index != -1:
+            result.append(index)
+            index = both.find(1, index + 1)
+        return result
+
+    def numbered_among(self, indices):
+        """ This is a method that gives the cells out of indices (flat indices) that are revealed and have a number,
+        which is what the engine keeps in numbered_cells after every move. """
+        revealed, adjacent = self.revealed, self.adjacent
+        return [index for index in indices if revealed[index] and adjacent[index]]
+
+    def load_layers(self, mines, revealed, flagged, adjacent=None):
+        """ This is a method that sets every layer at once from flat bytes (one byte per cell), for loading a saved game.
+        The adjacent counts are worked out again unless they're given, and the counters come from a recount. """
+        self.mines[:] = mines
+        self.revealed[:] = revealed
+        self.flagged[:] = flagged
+        self.num_mines = mines.count(1)
+        if adjacent is None:
+            self.surrounding_counter()
+        else:
+            self.adjacent[:] = adjacent
+        self.count_adjacent_flags()
+        self.revealed_safe_count, self.revealed_mine_count = self.recount_revealed()
+        self.changed_cells = set()
+        self.row_cache.clear()
+
+    def place_mines(self):
+        """ This is a method that places mines on the grid. It picks flat indices (y * width + x) straight away instead of
+        building a list of every coordinate on the board first, and it picks how to do that based on how crowded the board is:  \n
+        Sparse boards just pick random indices and throw away repeats (a set remembers which ones were taken).
+        This only uses memory for the mines themselves, so a huge board with a few mines is no problem.  \n
+        Dense boards would throw away too many repeats that way, so they use a partial Fisher-Yates shuffle over an array
+        of every index, which only needs num_mines swaps. """
+
+        mines = self.mines
+        for index in self.mine_indices():
+            mines[index] = 1
+
+    def mine_indices(self):
+        """ This is a method that picks the flat indices of the mines (see place_mines) and yields them one at a time. """
+        total_cells = self.width * self.height
+        rng = self.rng
+        if self.num_mines * SPARSE_MINE_RATIO <= total_cells:          ## SPARSE: rejection sampling
+            chosen = set()
+            while len(chosen) < self.num_mines:
+                chosen.add(rng.randrange(total_cells))                  ## if the index was already picked the set just ignores it
+            yield from chosen
+        else:                                                           ## DENSE: partial Fisher-Yates shuffle
+            typecode = "I" if total_cells < 2 ** 32 else "Q"            ## 4 bytes per index unless the board is truly gigantic
+            pool = array(typecode, range(total_cells))
+            for i in range(self.num_mines):
+                j = rng.randrange(i, total_cells)                       ## pick from the part of the pool that hasn't been used yet
+                pool[i], pool[j] = pool[j], pool[i]
+                yield pool[i]
+
+    def surrounding_counter(self):
+        """ This is a method that counts the number of adjacent mines for each cell in the grid. The counting itself is
+        done by adjacency_counts. """
+        self.adjacent[:] = self.adjacency_counts(self.mines, self.width, self.height)
+
+    def count_adjacent_flags(self):
+        """ This is a method that works out the flag count of every cell from the whole flagged layer in one go, for when
+        the flags were all set at once (like loading a game) instead of one at a time through set_flagged. """
+        self.adjacent_flags[:] = self.adjacency_counts(self.flagged, self.width, self.height, include_centre=True)
+
+    @staticmethod
+    def adjacency_counts(mines, width, height, include_centre=False):
+        """ This takes a flat mine layer (one byte per cell, width by height) and gives back the adjacent mine counts
+        for every cell as bytes, with 0 for the mines themselves.
+        With include_centre it gives the plain 3x3 count instead (the cell itself counts, and mines get a count too),
+        which is what the flag counts need.  \n
+        Instead of checking the 8 neighbours of every cell one by one, it packs the whole mine layer into one big integer
+        (one byte per cell) and adds shifted copies of it together. Shifting by one byte moves every cell one column over,
+        and shifting by a whole row moves every cell one row over, so the sum of the shifted copies is the 3x3 count for
+        every cell at once. Python does the big integer math in C, so it's very fast even on huge boards.  \n
+        Each row gets one blank padding column at the end so the left and right edges don't wrap into the next row. """
+
+        stride = width + 1                                          ## row length including the padding column
+        padded = bytearray(stride * height)
+        for y in range(height):                                     ## copy each row of mines in, leaving the padding column as 0
+            padded[y * stride:y * stride + width] = mines[y * width:(y + 1) * width]
+        mine_int = int.from_bytes(padded, "little")                 ## byte i of the bytearray becomes bits 8i to 8i+7 of the integer
+
+        row_shift = 8 * stride
+        row_sums = mine_int + (mine_int << 8) + (mine_int >> 8)     ## left + center + right for every cell
+        counts = row_sums + (row_sums << row_shift) + (row_sums >> row_shift)   ## rows above and below
+        ## The biggest possible count is 9, so no byte ever carries into its neighbour.
+
+        if not include_centre:
+            counts -= mine_int                                      ## minus the cell itself
+            not_mine_int = int.from_bytes(padded.translate(NOT_MINE_TABLE), "little")   ## 0xFF for safe cells, 0x00 for mines
+            counts &= not_mine_int                                  ## mines don't count their neighbours, same as before
+
+        counted = counts.to_bytes(stride * (height + 1), "little")  ## one spare row because of the shift up
+        result = bytearray(width * height)
+        for y in range(height):                                     ## copy each row back out, dropping the padding column
+            result[y * width:(y + 1) * width] = counted[y * stride:y * stride + width]
+        return result
+
+    def verify_adjacent(self):
+        """ This is a method that checks the adjacency counts against the old way of counting them, where every cell looks
+        at its 8 neighbours one by one. It raises an AssertionError at the first cell that doesn't match. It's slow, so it's
+        only for checking surrounding_counter, add_mine and remove_mine. """
+        width, height = self.width, self.height
+        mines = bytes(self.mines[:])
+        for y in range(height):
+            for x in range(width):
+                count = 0
+                if not mines[y * width + x]:                        ## mines don't keep a count
+                    for dy in range(-1, 2):
+                        for dx in range(-1, 2):
+                            new_x = x + dx
+                            new_y = y + dy
+                            if (dx or dy) and 0 <= new_x < width and 0 <= new_y < height:
+                                count += mines[new_y * width + new_x]
+                live = self.adjacent[y * width + x]
+                assert live == count, f"Adjacency count out of sync at ({x}, {y}). live: {live} | recount: {count}"
+
+    def add_mine(self, x, y):
+        """ This is a method that puts a mine at (x, y) and updates only the 3x3 area of adjacency counts around it,
+        so you don't need to run surrounding_counter again for a single change. """
+
+        width, height = self.width, self.height
+        index = y * width + x
+        if self.mines[index]:                                       ## already a mine, nothing to do
+            return
+        self.set_mine(index, True)
+        self.adjacent[index] = 0                                    ## mines don't keep a count
+        self.num_mines += 1
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                new_x = x + dx
+                new_y = y + dy
+                if (dx or dy) and 0 <= new_x < width and 0 <= new_y < height:
+                    neighbour = new_y * width + new_x
+                    if not self.mines[neighbour]:
+                        self.adjacent[neighbour] += 1
+
+    def remove_mine(self, x, y):
+        """ This is a method that takes the mine away from (x, y) and updates only the 3x3 area of adjacency counts around it. """
+
+        width, height = self.width, self.height
+        index = y * width + x
+        if not self.mines[index]:                                   ## not a mine, nothing to do
+            return
+        self.set_mine(index, False)
+        self.num_mines -= 1
+        count = 0
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                new_x = x + dx
+                new_y = y + dy
+                if (dx or dy) and 0 <= new_x < width and 0 <= new_y < height:
+                    neighbour = new_y * width + new_x
+                    if self.mines[neighbour]:
+                        count += 1                                  ## the cell itself now needs its own count
+                    else:
+                        self.adjacent[neighbour] -= 1
+        self.adjacent[index] = count
+
+    def neighbourhood(self, x, y):
+        """ This is a method that gives the flat indices of the 3x3 around (x, y), itself included and cut off at the
+        edges, row by row from the top left. """
+        return [new_y * self.width + new_x
+                for new_y in range(max(0, y - 1), min(self.height, y + 2))
+                for new_x in range(max(0, x - 1), min(self.width, x + 2))]
+
+    def safe_zone(self, x, y, opening=False):
+        """ This is a method that gives the flat indices first-click safety keeps clear: just (x, y), or the 3x3 around it
+        (cut off at the edges) if opening is True. """
+        if not opening:
+            return [y * self.width + x]
+        return self.neighbourhood(x, y)
+
+    def relocate_mines(self, x, y, opening=False):
+        """ This is a method for first-click safety. It moves the mines in the safe zone around (x, y) to random free cells
+        somewhere else, with add_mine and remove_mine, so only the 3x3 counts around each moved mine change. There's no
+        surrounding_counter and no new board. If there's no room to clear the whole 3x3 it just clears (x, y).
+        Returns how many mines were moved. """
+        zone = self.safe_zone(x, y, opening)
+        mines = self.mines
+        moving = [index for index in zone if mines[index]]
+        if not moving:
+            return 0
+        total_cells = self.width * self.height
+        free_outside = total_cells - len(zone) - (self.num_mines - len(moving))
+        if free_outside < len(moving):
+            return self.relocate_mines(x, y) if opening else 0
+        targets = self.relocation_targets(set(zone), len(moving), free_outside)
+        width = self.width
+        for index in moving:
+            self.remove_mine(index % width, index // width)
+        for index in targets:
+            self.add_mine(index % width, index // width)
+        return len(moving)
+
+    def relocation_targets(self, zone, count, free_outside):
+        """ This is a method that picks count random cells outside zone that aren't mines (or revealed), with the grid's own
+        random generator so a seeded board always moves its mines to the same place. Like place_mines, it throws away bad
+        picks if there's plenty of room, and only lists the free cells if the board is crowded. """
+        total_cells = self.width * self.height
+        mines, revealed, rng = self.mines, self.revealed, self.rng
+        if free_outside * SPARSE_MINE_RATIO >= total_cells:
+            chosen = set()
+            while len(chosen) < count:
+                index = rng.randrange(total_cells)
+                if index not in zone and not mines[index] and not revealed[index]:
+                    chosen.add(index)
+            return sorted(chosen)
+        free = [index for index in range(total_cells) if index not in zone and not mines[index] and not revealed[index]]
+        return sorted(rng.sample(free, count))
+
+    def parse_move(self, move):
+        """ This is a method that turns a move like "B3" or "AB123" into (x, y) coordinates on this grid.
+        It returns None if the move isn't valid or is off the board. """
+        return Coordinate_Codec_Class.parse(move, self.width, self.height)
+
+    def cluster_reveal(self, x, y):
+        """ This is a method that reveals all cells in a cluster of cells that are not adjacent to any mines.  \n
+        X and Y are the coordinates of the cell that was clicked.  \n
+        First it makes a deque of the cell that was clicked. Then it iterates over the deque.  \n
+        Only cells with no adjacent mines are added to the deque. If the clicked cell has adjacent mines, it is
+        immediately revealed and the process stops. Oh also it uses a deque, its NOT a recursive function!
+        I heard that deque is generally better than recursive functions for this kind of thing."""
+
+        to_check = deque([(x, y)])             ## We start with a deque of the cell that was clicked
+        first_cell = self.grid_matrix[y][x]    ## Get the cell that was clicked
+        if first_cell.adjacent_mines > 0:      ## If the cell that was clicked is adjacent to any mines
+            first_cell.is_revealed = True      ## reveal the cell and return
+            return
+        while to_check:                        ## while there are still cells to check
+            x, y = to_check.popleft()          ## get the leftmost cell in the deque with tuple unpacking
+            for dy in range(-1, 2):
+                for dx in range(-1, 2):        ## Iterate over the 3x3 grid around the current cell
+                    new_x = x + dx             ## x is -1 means left, 0 means center, 1 means right
+                    new_y = y + dy             ## y is -1 means up, 0 means center, 1 means down
+                    if 0 <= new_x < self.width and 0 <= new_y < self.height:     ## if the new coordinates are within the grid,
+                        current_cell = self.grid_matrix[new_y][new_x]            ## get the cell at the new coordinates.
+                        if not current_cell.is_revealed:                         ## if the cell is not revealed,  
+                            current_cell.is_revealed = True                      ## reveal the cell.
+                            if current_cell.adjacent_mines == 0:                 ## IF the cell is not adjacent to any mines,
+                                to_check.append((new_x, new_y))                  ## add it to the deque and repeat the process.
+
+    def special_reveal(self, x, y):
+        """ This is a method that reveals all cells that are adjacent to the cell that was clicked (a 3x3 area),
+        BUT it will skip any cells that are flagged. It only goes ahead if there are at least as many flags around the
+        cell as its number, and since set_flagged keeps adjacent_flags up to date that's one comparison, not a recount. """
+
+        width = self.width
+        index = y * width + x
+        if self.adjacent_flags[index] < self.adjacent[index]:      ## not enough flags down yet, so nothing happens
+            return
+        mines, revealed, flagged, adjacent = self.mines, self.revealed, self.flagged, self.adjacent
+        for neighbour in self.neighbourhood(x, y):                  ## the 3x3 grid around the cell
+            if not revealed[neighbour] and not flagged[neighbour]:  ## if the cell is not revealed and not flagged,
+                if mines[neighbour]:                                ## if the cell is a mine,
+                    return "HIT"                                    ## return "HIT" to end the game.
+                self.set_revealed(neighbour, True)
+                if adjacent[neighbour] == 0:
+                    self.cluster_reveal(neighbour % width, neighbour // width)   ## no adjacent mines, so reveal the cluster.
+
+    def chord_cascade(self, seeds):
+        """ This is a method for auto-chord. It chords every cell in seeds (flat indices) that's a revealed number with all
+        its flags down, then every numbered cell those chords reveal, and so on, with a work queue instead of recursion.
+        A cell only goes in the queue when it gets revealed, and checking it is one comparison, so the work goes with the
+        number of cells revealed. Returns "HIT" if a chord steps on a mine (which only happens if a flag is wrong). """
+
+        width = self.width
+        revealed, adjacent, adjacent_flags = self.revealed, self.adjacent, self.adjacent_flags
+        changed = self.changed_cells                                ## every chord's new cells get added back in here
+        to_chord = deque(seeds)
+        try:
+            while to_chord:
+                index = to_chord.popleft()
+                count = adjacent[index]
+                if not count or not revealed[index] or adjacent_flags[index] < count:
                     continue
+                self.changed_cells = set()                          ## so the cells this chord reveals can be told apart
+                hit = self.special_reveal(index % width, index // width)
+                new_cells = self.changed_cells
+                changed |= new_cells
+                if hit == "HIT":
+                    return "HIT"
+                to_chord.extend(new_cells)
+        finally:
+            self.changed_cells = changed
+
+    def column_label(self, x):
+        """ This is a method that gives the header label of column x. It comes from the same codec that reads the moves,
+        so what you see on top of a column is always what you type to play it. """
+        return Coordinate_Codec_Class.column_label(x)
+
+    def gutter_width(self, last_row):
+        """ This is a method that works out how wide the row number column on the left needs to be. It's at least 4 wide
+        (that's what the normal boards use) and grows when the row numbers get longer. """
+        return max(4, len(str(last_row + 1)) + 2)
+
+    def viewport_size(self):
+        """ This is a method that works out how many columns and rows of the board fit in the terminal right now.
+        Each cell is 3 characters wide, and a few lines are kept free for the headers, borders, status line and prompt. """
+        import shutil                                                   ## only loaded once a viewport gets drawn
+        columns, lines = shutil.get_terminal_size(fallback=(80, 24))
+        gutter = self.gutter_width(self.height - 1)
+        header_lines = len(self.column_label(self.width - 1))
+        view_width = max(1, (columns - gutter - 2) // 3)               ## -2 for the border bars
+        view_height = max(1, lines - header_lines - VIEWPORT_RESERVED_LINES)
+        return min(view_width, self.width), min(view_height, self.height)
+
+    def clamp_view(self):
+        """ This is a method that keeps the viewport inside the board. """
+        view_width, view_height = self.viewport_size()
+        self.view_x = max(0, min(self.view_x, self.width - view_width))
+        self.view_y = max(0, min(self.view_y, self.height - view_height))
+
+    def pan_view(self, dx, dy):
+        """ This is a method that moves the viewport by dx columns and dy rows. """
+        self.view_x += dx
+        self.view_y += dy
+        self.clamp_view()
+
+    def center_view(self, x, y):
+        """ This is a method that moves the viewport so the cell at (x, y) is in the middle of the screen. """
+        view_width, view_height = self.viewport_size()
+        self.view_x = x - view_width // 2
+        self.view_y = y - view_height // 2
+        self.clamp_view()
+
+    def render_header(self, x0, x1, gutter):
+        """ This is a method that builds the column header lines for columns x0 up to (not including) x1.  \n
+        Labels longer than one character are written top to bottom, one character per line, so every label stays lined up
+        over its own column no matter how wide the board is or where the viewport is. """
+        labels = [self.column_label(x) for x in range(x0, x1)]
+        label_len = max(len(label) for label in labels)
+        lines = []
+        for line_number in range(label_len):
+            parts = [" " * gutter]
+            for label in labels:
+                label = label.rjust(label_len)                  ## shorter labels sit at the bottom
+                parts.append(f"  {label[line_number]}")
+            lines.append("".join(parts).rstrip() + "\n")
+        return lines
+
+    def render_row(self, y, x0, x1, gutter, overlay=None, overlay_default="▒▒▒"):
+        """ This is a method that builds the text for one row of the grid (row number, border bars and the cells from column
+        x0 up to but not including x1). If an overlay is given (flat index -> 3 character string), hidden unflagged cells
+        are drawn with their overlay text, or overlay_default if they're not in it. With show_all on, every cell is drawn
+        as if it was revealed, straight from the mine and adjacent layers. """
+        start = y * self.width
+        parts = [str(y + 1).ljust(gutter), "|"]                  ## the row number, padded out to the gutter width
+        revealed_row = b"\x01" * (x1 - x0) if self.show_all else self.revealed[start + x0:start + x1]
+        index = start + x0
+        for revealed, flagged, mine, adjacent in zip(revealed_row, self.flagged[start + x0:start + x1],
+                                                     self.mines[start + x0:start + x1], self.adjacent[start + x0:start + x1]):
+            if not revealed:                                ## if the cell is not revealed it can be either flagged or blank
+                if flagged:
+                    parts.append(" ⚑ ")
+                elif overlay is not None:
+                    parts.append(overlay.get(index, overlay_default))
+                else:
+                    parts.append("▒▒▒")
+            elif mine:
+                parts.append(" X ")                         ## You wouldn't see a mine unless you either won or lost (or turned on reveal)
+            else:
+                parts.append(CELL_NUMBER_STRINGS[adjacent]) ## blank if there's no adjacent mines, otherwise the number
+            index += 1
+        parts.append("|\n")                                 ## right-side border bar   
+        return "".join(parts)
+
+    def view_window(self):
+        """ This is a method that works out which part of the board gets drawn: (x0, y0, x1, y1, gutter).
+        That's the whole board, or just the viewport if it's on. """
+        if self.viewport:
+            self.clamp_view()                               ## the terminal might have been resized since last time
+            view_width, view_height = self.viewport_size()
+            x0, y0 = self.view_x, self.view_y
+            x1, y1 = x0 + view_width, y0 + view_height
+        else:
+            x0, y0, x1, y1 = 0, 0, self.width, self.height
+        return x0, y0, x1, y1, self.gutter_width(y1 - 1)
+
+    def frame_top(self, x0, y0, x1, y1, gutter):
+        """ This is a method that builds the lines above the rows (viewport line and column headers) and the border bar. """
+        frame = ["\n"]
+        if self.viewport:
+            frame.append(f" Viewing columns {self.column_label(x0)}-{self.column_label(x1 - 1)}, rows {y0 + 1}-{y1} "
+                         f"of a {self.width} by {self.height} board.\n")
+        frame.extend(self.render_header(x0, x1, gutter))
+        border = " " * (gutter + 1) + "---" * (x1 - x0) + "\n"   ## border bar
+        frame.append(border)
+        return frame, border
+
+    def display(self, mines_remaining):
+        """ This is a method that controls the display of the grid. It prints the grid to the console and controls 
+        how the cells are displayed based on their state.  \n
+        The whole frame is built up in a list of strings and written out with a single write call at the end.
+        Each row's text is cached, and only the rows that had a cell change since the last frame are built again.  \n
+        If the viewport is on, only the part of the board that fits in the terminal gets drawn, so the cost of a frame
+        depends on the size of the terminal and not the size of the board. """
+        ## Undernote: It looks janky because of all the ASCII formatting.               
+
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+        if debug:
+            logging.debug("\033[33m Display method initiated. \033[0m")
+            logging.debug("GRID LENGTH: %s GRID WIDTH: %s", self.height, self.width)
+            logging.debug("\033[33m self.difficulty: %s \033[0m", self.difficulty)
+
+        x0, y0, x1, y1, gutter = self.view_window()
+
+        self.take_changed_cells()                           ## marks the rows of any changed cells as dirty
+        row_cache = self.row_cache
+        window = (x0, x1, gutter, self.show_all)
+        if self.row_cache_window != window:                 ## if the columns on screen (or show_all) changed, every cached row is out of date
+            row_cache.clear()
+            self.row_cache_window = window
+        for y in self.dirty_rows:
+            row_cache.pop(y, None)
+        if debug:
+            logging.debug("\033[33m Dirty rows: %s | Cached rows: %s \033[0m", len(self.dirty_rows), len(row_cache))
+        self.dirty_rows.clear()
+        if len(row_cache) > 4 * (y1 - y0):                  ## don't let rows that scrolled off screen pile up forever
+            for y in [y for y in row_cache if not y0 <= y < y1]:
+                del row_cache[y]
+
+        frame, border = self.frame_top(x0, y0, x1, y1, gutter)
+        for y in range(y0, y1):
+            row_text = row_cache.get(y)
+            if row_text is None:                            ## only rows that changed (or were never drawn) get built again
+                row_text = self.render_row(y, x0, x1, gutter)
+                row_cache[y] = row_text
+            frame.append(row_text)
+        frame.append(border)
+        sys.stdout.write("".join(frame))                    ## one write for the whole frame
+
+    def display_overlay(self, overlay, overlay_default="▒▒▒"):
+        """ This is a method that draws the grid once with an overlay on the hidden cells (flat index -> 3 character string),
+        for example the mine chances from the hint command. It doesn't use or change the row cache. """
+        x0, y0, x1, y1, gutter = self.view_window()
+        frame, border = self.frame_top(x0, y0, x1, y1, gutter)
+        for y in range(y0, y1):
+            frame.append(self.render_row(y, x0, x1, gutter, overlay, overlay_default))
+        frame.append(border)
+        sys.stdout.write("".join(frame))
+
+    def reveal_toggle_func(self, reason):
+        """ This is a method that shows the whole board, for winning and losing ("GAME"), or switches showing it on and off
+        for testing ("REVEAL"). It only sets show_all, which render_row looks at when it draws, so it's the same cost on
+        any board size and the player's real progress (and check_win) is left alone. """
+        if reason == "GAME":
+            self.game_over_shown = True
+        if reason == "REVEAL":
+            self.reveal_toggle = not self.reveal_toggle     ## switch the toggle
+        self.show_all = self.reveal_toggle or self.game_over_shown   ## the display notices the change and draws every row again
+        logging.debug("\033[33m Reveal toggle is %s \033[0m", self.reveal_toggle)                    
+
+    def check_win(self):
+        """ This is a method that checks if the player has won the game.   \n
+        The math is pretty simple. If every safe cell is revealed (and no mines are), then the player has won.
+        The grid keeps these counts up to date as cells get revealed, so this doesn't have to scan the board. """
+        ## Undernote: This logic is independent of flagging. The player can win regardless of whether they flagged all the mines.
+
+        if self.debug_checks:                       ## Only in debug assertion mode, compare with a full recount
+            self.verify_counters()
+        safe_cells = self.width * self.height - self.num_mines
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug("\033[33m Safe cells: %s | Revealed safe cells: %s | Revealed mines: %s \033[0m",
+                          safe_cells, self.revealed_safe_count, self.revealed_mine_count)
+        if self.revealed_safe_count == safe_cells and self.revealed_mine_count == 0:   ## a revealed mine means the game was lost
+            self.reveal_toggle_func("GAME")
+            logging.debug("\033[33m Win condition met. \033[0m")
+            return True
+        
+class Chunk_Class:
+    """ A chunk is one CHUNK_SIZE by CHUNK_SIZE square of a chunked grid. It has the same layers as the normal grid
+    but only for its own cells. The adjacent and adjacent_flags layers are left as None until something actually needs
+    them, because working them out means looking at the chunks around it too. """
+
+    __slots__ = ("chunk_x", "chunk_y", "mines", "adjacent", "adjacent_flags", "revealed", "flagged")
+
+    def __init__(self, chunk_x, chunk_y, mines):
+        cells = CHUNK_SIZE * CHUNK_SIZE
+        self.chunk_x = chunk_x                  ## where the chunk is, counted in chunks
+        self.chunk_y = chunk_y
+        self.mines = mines
+        self.adjacent = None
+        self.adjacent_flags = None
+        self.revealed = bytearray(cells)
+        self.flagged = bytearray(cells)
+
+class Chunked_Layer_Class:
+    """ This makes one layer of a chunked grid (like "mines" or "revealed") look like the flat bytearray a normal grid has.
+    You index it with the same flat index (y * width + x) and it finds the right chunk and the right spot inside it.
+    Slices work too, as long as they stay inside one row, which is all the display needs. """
+
+    __slots__ = ("grid", "name")
+
+    def __init__(self, grid, name):
+        self.grid = grid
+        self.name = name
+
+    def __len__(self):
+        return self.grid.width * self.grid.height
+
+    def __getitem__(self, index):
+        grid = self.grid
+        if isinstance(index, slice):                    ## a piece of a single row, glued together from the chunks it crosses
+            start, stop, _ = index.indices(len(self))
+            y, x = divmod(start, grid.width)
+            end_x = x + (stop - start)
+            parts = []
+            while x < end_x:
+                chunk_x, local_x = divmod(x, CHUNK_SIZE)
+                take = min(CHUNK_SIZE - local_x, end_x - x)
+                layer = grid.chunk_layer(grid.get_chunk(chunk_x, y // CHUNK_SIZE), self.name)
+                local_start = (y % CHUNK_SIZE) * CHUNK_SIZE + local_x
+                parts.append(layer[local_start:local_start + take])
+                x += take
+            return b"".join(parts)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):                  ## off the board, so iteration and sum() stop here instead of making chunks
+            raise IndexError("chunked layer index out of range")
+        y, x = divmod(index, grid.width)
+        chunk = grid.get_chunk(x // CHUNK_SIZE, y // CHUNK_SIZE)
+        return grid.chunk_layer(chunk, self.name)[(y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE]
+
+    def __setitem__(self, index, value):
+        grid = self.grid
+        y, x = divmod(index, grid.width)
+        chunk_x, chunk_y = x // CHUNK_SIZE, y // CHUNK_SIZE
+        chunk = grid.get_chunk(chunk_x, chunk_y)
+        grid.chunk_layer(chunk, self.name)[(y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE] = value
+        grid.keep_chunk(chunk_x, chunk_y)               ## the chunk now has state that can't be made again from the seed
+
+    def __iter__(self):
+        width = self.grid.width
+        for start in range(0, len(self), width):        ## a row at a time, so each chunk is only looked up once per row
+            yield from self[start:start + width]
+
+class Chunked_Grid_Class(Grid_Class):
+    """ The chunked grid is a version of the grid for UNLIMITED mode that doesn't make the whole board up front.  \n
+    The board is split into CHUNK_SIZE by CHUNK_SIZE chunks, and each chunk is only made the first time something looks
+    at it. The mines in a chunk come from the seed plus the chunk's coordinates, so the same chunk always gets the same
+    mines no matter when (or how many times) it's made. Instead of a fixed number of mines for the whole board,
+    every chunk gets its share based on the mine density.  \n
+    Chunks are kept in two dictionaries. Chunks the player has touched (revealed or flagged something, or had mines moved)
+    go in hot_chunks and stay forever. Chunks that were only looked at go in cold_chunks, which only keeps the most
+    recently used MAX_COLD_CHUNKS and throws away the oldest. Throwing one away is fine because it can be made again
+    from the seed. So memory goes with how much of the board has been explored, not how big the board is.  \n
+    Everything else (grid_matrix, special_reveal, the display) works the same way as the normal grid, because the layers
+    look the same from the outside. cluster_reveal is the exception: going through the layers one cell at a time is far
+    too slow for an opening that covers millions of cells, so it works on each chunk's layers directly, with the same
+    shift-and-mask idea as the bitboard grid. """
+
+    chunk_full_bits = (1 << (CHUNK_SIZE * CHUNK_SIZE)) - 1                  ## every cell of a chunk, one bit each at y * CHUNK_SIZE + x
+    chunk_left_bits = sum(1 << (y * CHUNK_SIZE) for y in range(CHUNK_SIZE))  ## the first column
+    chunk_right_bits = chunk_left_bits << (CHUNK_SIZE - 1)                  ## the last column
+    chunk_top_bits = (1 << CHUNK_SIZE) - 1                                  ## the first row
+    chunk_bottom_bits = chunk_top_bits << (CHUNK_SIZE * (CHUNK_SIZE - 1))   ## the last row
+
+    def create_layers(self):
+        """ This is a method that sets up the chunk storage and the layer views instead of making flat layers. """
+        self.chunk_seed = self.seed if self.seed is not None else self.rng.randrange(2 ** 63)   ## every chunk needs the same seed
+        self.density = self.num_mines / (self.width * self.height)
+        self.num_mines = self.count_board_mines()   ## the real total once every chunk gets its share of the density
+        self.hot_chunks = {}                        ## (chunk_x, chunk_y) -> chunk with player state, never thrown away
+        self.cold_chunks = OrderedDict()            ## (chunk_x, chunk_y) -> chunk with no player state, oldest first
+        self.mines = Chunked_Layer_Class(self, "mines")
+        self.revealed = Chunked_Layer_Class(self, "revealed")
+        self.flagged = Chunked_Layer_Class(self, "flagged")
+        self.adjacent = Chunked_Layer_Class(self, "adjacent")
+        self.adjacent_flags = Chunked_Layer_Class(self, "adjacent_flags")
+
+    def chunk_cells(self, chunk_x, chunk_y):
+        """ This is a method that gives the width and height of the part of a chunk that is actually on the board.
+        Chunks on the right and bottom edges can be cut off. """
+        width = min(CHUNK_SIZE, self.width - chunk_x * CHUNK_SIZE)
+        height = min(CHUNK_SIZE, self.height - chunk_y * CHUNK_SIZE)
+        return width, height
+
+    def chunk_mine_count(self, chunk_width, chunk_height):
+        """ This is a method that works out how many mines a chunk gets, from the density and how many of its cells are on the board. """
+        return round(self.density * chunk_width * chunk_height)
+
+    def count_board_mines(self):
+        """ This is a method that adds up the mines of every chunk without making any of them. There are only four kinds of
+        chunk (full, cut off on the right, cut off on the bottom, and the bottom right corner), so this is quick. """
+        full_x, edge_width = divmod(self.width, CHUNK_SIZE)
+        full_y, edge_height = divmod(self.height, CHUNK_SIZE)
+        total = full_x * full_y * self.chunk_mine_count(CHUNK_SIZE, CHUNK_SIZE)
+        total += full_y * self.chunk_mine_count(edge_width, CHUNK_SIZE)
+        total += full_x * self.chunk_mine_count(CHUNK_SIZE, edge_height)
+        total += self.chunk_mine_count(edge_width, edge_height)
+        return total
+
+    def generate_chunk(self, chunk_x, chunk_y):
+        """ This is a method that makes a chunk, placing its mines with a random generator seeded from the board seed and
+        the chunk coordinates. Only cells that are on the board can get a mine. """
+        chunk_rng = random.Random(f"{self.chunk_seed}:{chunk_x}:{chunk_y}")    ## string seeds give the same numbers every run
+        chunk_width, chunk_height = self.chunk_cells(chunk_x, chunk_y)
+        on_board = [y * CHUNK_SIZE + x for y in range(chunk_height) for x in range(chunk_width)]
+        mines = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        for index in chunk_rng.sample(on_board, self.chunk_mine_count(chunk_width, chunk_height)):
+            mines[index] = 1
+        return Chunk_Class(chunk_x, chunk_y, mines)
 
-        def minesweeper_help(self):
-            print("To check a square, enter a letter followed by a number. (e.g. a1, B2, c3, etc.)")
-            print("To flag, Type '-f' followed by the square you want to flag. (e.g. '-f a1', '-f B2', '-f c3', etc.)")
-            print("Flags can be removed by flagging the same square again.")
-            print("You can also AUTO search a 3x3 area around a revealed cell, skipping the flagged squares. ")
-            print("That works exactly the same way as it would in normal minesweeper. Simply enter any revealed cell. ")
-            print("Type 'reveal' to toggle REVEAL mode. This will reveal the mine locations (For testing purposes).")
-            print("Type 'reset', 'restart', 'exit', or 'quit' at any point to to reset the game.")
-            print("Type 'debug' to toggle debug logging on or off.")
-            print("Type 'help' at any point to repeat this message.")
-
-        def difficulty_input(self):
-            """ This is a function that takes the player's input for the difficulty level.  \n
-            It will set the self.difficulty attribute and then unpack difficulty_dict values. Or take player's input for custom mode.
-            Then it sets self.width, self.height, and self.num_mines. """
-
-            logging.debug(f"\033[33m Difficulty input initiated. \033[0m")
-            if self.previous_times:
-                print("Previous times: ")
-                for time, diff in self.previous_times:
-                    print(f"Difficulty: {diff}   |  time: {time} seconds")
-                print()
-            print("Available difficulty presets (You can change these in the code really easily):")
-            for item in self.difficulty_dict:
-                logging.debug(f"\033[33m {item} : {self.difficulty_dict[item]} \033[0m")
-                                    
-            for option in self.difficulty_dict:                                     ## This section is here so that it will dynamically update
-                if option != "C" and option != "U":                                 ## the difficulty presets in the game menu if you change them.
-                    print(f"{option}: {self.difficulty_dict[option][3]}: ", end="")                             ## index 3 is display name
-                    print(f"{self.difficulty_dict[option][0]} by {self.difficulty_dict[option][1]} ", end="")   ## 0 is width, 1 is height
-                    print(f"with {self.difficulty_dict[option][2]} mines.", end="")                             ## index 2 is number of mines
-                    print(f"   |  {option}")
-                if option == "C":
-                    print(f"C: CUSTOM:  Choose your own settings.  enter:  C")
-                if option == "U":
-                    print(f"U: UNLIMITED:  For hardcore testing. Use at your own risk.")
+    def get_chunk(self, chunk_x, chunk_y):
+        """ This is a method that finds a chunk, making it if it doesn't exist yet. """
+        key = (chunk_x, chunk_y)
+        chunk = self.hot_chunks.get(key)
+        if chunk is not None:
+            return chunk
+        chunk = self.cold_chunks.get(key)
+        if chunk is not None:
+            self.cold_chunks.move_to_end(key)       ## most recently used goes to the end
+            return chunk
+        chunk = self.generate_chunk(chunk_x, chunk_y)
+        self.cold_chunks[key] = chunk
+        if len(self.cold_chunks) > MAX_COLD_CHUNKS:
+            self.cold_chunks.popitem(last=False)    ## throw away the least recently used chunk, it can be made again
+        return chunk
 
+    def keep_chunk(self, chunk_x, chunk_y):
+        """ This is a method that moves a chunk from the cold chunks to the hot chunks, so it never gets thrown away. """
+        key = (chunk_x, chunk_y)
+        chunk = self.cold_chunks.pop(key, None)
+        if chunk is not None:
+            self.hot_chunks[key] = chunk
+
+    def chunk_layer(self, chunk, name):
+        """ This is a method that gives one layer of a chunk, working out the adjacent or adjacent_flags layer first if it's needed. """
+        if name == "adjacent" and chunk.adjacent is None:
+            self.count_chunk_adjacent(chunk)
+        elif name == "adjacent_flags" and chunk.adjacent_flags is None:
+            chunk.adjacent_flags = self.count_chunk_patch(chunk, self.flagged, include_centre=True)
+        return getattr(chunk, name)
+
+    def count_chunk_adjacent(self, chunk):
+        """ This is a method that works out the adjacent mine counts for a chunk (see count_chunk_patch). """
+        chunk.adjacent = self.count_chunk_patch(chunk, self.mines)
+
+    def count_chunk_patch(self, chunk, layer, include_centre=False):
+        """ This is a method that counts one layer (mines or flags) around every cell of a chunk. It copies the chunk's part
+        of the layer plus a one cell border from the chunks around it into a patch, counts the patch with adjacency_counts,
+        and keeps the middle. """
+        chunk_x, chunk_y = chunk.chunk_x, chunk.chunk_y
+        patch_size = CHUNK_SIZE + 2
+        patch = bytearray(patch_size * patch_size)
+        for y in range(patch_size):
+            board_y = chunk_y * CHUNK_SIZE + y - 1
+            if not 0 <= board_y < self.height:
+                continue
+            start_x = max(0, chunk_x * CHUNK_SIZE - 1)
+            end_x = min(self.width, (chunk_x + 1) * CHUNK_SIZE + 1)
+            patch_x = start_x - (chunk_x * CHUNK_SIZE - 1)
+            patch[y * patch_size + patch_x:y * patch_size + patch_x + end_x - start_x] = layer[board_y * self.width + start_x:board_y * self.width + end_x]
+        counted = self.adjacency_counts(patch, patch_size, patch_size, include_centre)
+        counts = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        for y in range(CHUNK_SIZE):
+            counts[y * CHUNK_SIZE:(y + 1) * CHUNK_SIZE] = counted[(y + 1) * patch_size + 1:(y + 1) * patch_size + 1 + CHUNK_SIZE]
+        return counts
+
+    def place_mines(self):
+        """ Mines in a chunked grid are placed one chunk at a time, when the chunk is made, so there's nothing to do here. """
+
+    def surrounding_counter(self):
+        """ Adjacent counts in a chunked grid are worked out one chunk at a time, when they're needed, so there's nothing to do here. """
+
+    def touch_adjacent(self, x, y):
+        """ This is a method that makes sure the adjacent counts around (x, y) are worked out before a mine there changes.
+        Otherwise a chunk counted after the change would count the new mine and then get the +1 from add_mine on top. """
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                new_x = x + dx
+                new_y = y + dy
+                if 0 <= new_x < self.width and 0 <= new_y < self.height:
+                    self.adjacent[new_y * self.width + new_x]
+
+    def add_mine(self, x, y):
+        self.touch_adjacent(x, y)
+        super().add_mine(x, y)
+
+    def remove_mine(self, x, y):
+        self.touch_adjacent(x, y)
+        super().remove_mine(x, y)
+
+    def relocate_mines(self, x, y, opening=False):
+        """ Moving mines somewhere random on a board this big would make chunks far away for nothing, so a chunked grid
+        just takes away the mines in the safe zone. The board ends up with that many mines less. """
+        width = self.width
+        moving = [index for index in self.safe_zone(x, y, opening) if self.mines[index]]
+        for index in moving:
+            self.remove_mine(index % width, index // width)
+        return len(moving)
+
+    def pack_chunk_bits(self, layer):
+        """ This is a method that turns one layer of a chunk (one byte per cell, 0 or 1) into an int with one bit per cell.
+        A chunk has no padding bits (see chunk_dilate), so it's just the bytes as "0"/"1" text, backwards. """
+        return int(layer.translate(BYTES_TO_BIT_CHARS)[::-1] or b"0", 2)
+
+    def unpack_chunk_bits(self, bits):
+        """ This is a method that turns a chunk's bit int back into bytes (one byte per cell). """
+        return format(bits, f"0{CHUNK_SIZE * CHUNK_SIZE}b")[::-1].encode().translate(BIT_CHARS_TO_BYTES)
+
+    def chunk_board_bits(self, chunk_x, chunk_y):
+        """ This is a method that gives the bits of the cells of a chunk that are actually on the board. """
+        chunk_width, chunk_height = self.chunk_cells(chunk_x, chunk_y)
+        row = (1 << chunk_width) - 1
+        return sum(row << (y * CHUNK_SIZE) for y in range(chunk_height))
+
+    def chunk_dilate(self, bits):
+        """ This is a method that grows a set of cells in one chunk by one cell in every direction, like the bitboard
+        grid's dilate. There are no padding bits, so the left and right shifts mask off what wrapped into the next row
+        (and off the end of the chunk, or the shift down would bring it back). """
+        row = (bits | ((bits << 1) & ~self.chunk_left_bits) | ((bits >> 1) & ~self.chunk_right_bits)) & self.chunk_full_bits
+        return (row | (row << CHUNK_SIZE) | (row >> CHUNK_SIZE)) & self.chunk_full_bits
+
+    def chunk_spill(self, bits):
+        """ This is a method that finds the cells in the 8 chunks around a chunk that touch any of bits. Returns a
+        dictionary of (chunk dx, chunk dy) -> bits in that chunk. Only the edges and corners of bits can spill over. """
+        size, last = CHUNK_SIZE, CHUNK_SIZE - 1
+        spill = {}
+        left = bits & self.chunk_left_bits
+        if left:                                                    ## the first column touches the last column of the chunk on the left
+            moved = left << last
+            spill[(-1, 0)] = (moved | (moved << size) | (moved >> size)) & self.chunk_right_bits
+        right = bits & self.chunk_right_bits
+        if right:
+            moved = right >> last
+            spill[(1, 0)] = (moved | (moved << size) | (moved >> size)) & self.chunk_left_bits
+        top = bits & self.chunk_top_bits
+        if top:                                                     ## the first row touches the last row of the chunk above
+            moved = top << (size * last)
+            spill[(0, -1)] = (moved | (moved << 1) | (moved >> 1)) & self.chunk_bottom_bits
+        bottom = bits & self.chunk_bottom_bits
+        if bottom:
+            moved = bottom >> (size * last)
+            spill[(0, 1)] = (moved | (moved << 1) | (moved >> 1)) & self.chunk_top_bits
+        if bits & 1:                                                ## and each corner touches one corner of a diagonal chunk
+            spill[(-1, -1)] = 1 << (size * size - 1)
+        if bits >> last & 1:
+            spill[(1, -1)] = 1 << (size * last)
+        if bits >> (size * last) & 1:
+            spill[(-1, 1)] = 1 << last
+        if bits >> (size * size - 1) & 1:
+            spill[(1, 1)] = 1
+        return spill
+
+    def chunk_fill_state(self, chunk_x, chunk_y):
+        """ This is a method that gets a chunk ready for cluster_reveal. Returns [chunk, cells the opening can spread
+        through, opening so far, cells to reveal, revealed bits, mine bits, on-board bits]. """
+        chunk = self.get_chunk(chunk_x, chunk_y)
+        board_bits = self.chunk_board_bits(chunk_x, chunk_y)
+        zero_bits = self.pack_chunk_bits(self.chunk_layer(chunk, "adjacent").translate(ZERO_COUNT_TABLE))
+        mine_bits = self.pack_chunk_bits(chunk.mines)
+        revealed_bits = self.pack_chunk_bits(chunk.revealed)
+        open_bits = zero_bits & ~mine_bits & ~revealed_bits & board_bits   ## mines have a count of 0 too, so leave them out
+        return [chunk, open_bits, 0, 0, revealed_bits, mine_bits, board_bits]
+
+    def cluster_reveal(self, x, y):
+        """ This is a method that reveals the same cells as Grid_Class.cluster_reveal, but a chunk at a time.  \n
+        Inside a chunk the opening grows with shifts and masks until it stops changing, the same as the bitboard grid.
+        Whenever the opening reaches the edge of a chunk, the cells it touches in the next chunk get revealed too, and
+        the ones that are unrevealed zero cells carry the opening on in that chunk (a work queue of chunks, not cells).
+        At the end every chunk that changed gets its revealed layer written back in one go. """
+
+        width = self.width
+        index = y * width + x
+        if self.adjacent[index] > 0:                ## If the cell that was clicked is adjacent to any mines
+            self.set_revealed(index, True)          ## reveal the cell and return
+            return
+        size = CHUNK_SIZE
+        chunks_x, chunks_y = -(-self.width // size), -(-self.height // size)
+        start = (x // size, y // size)
+        seed = 1 << ((y % size) * size + x % size)
+        fills = {start: self.chunk_fill_state(*start)}     ## (chunk_x, chunk_y) -> chunk_fill_state
+        fills[start][1] |= seed                     ## the clicked cell spreads even if it was revealed already
+        pending = {start: seed}                     ## chunk -> cells waiting to spread in it
+        to_check = deque([start])
+        while to_check:
+            key = to_check.popleft()
+            state = fills[key]
+            available = state[1] & ~state[2]
+            grown = pending.pop(key) & available
+            if not grown:
+                continue
             while True:
-                logging.debug(f"\033[33m Difficulty input loop initiated. \033[0m")
-                user_input = input("Enter difficulty level: ").upper()
-
-                if user_input in self.difficulty_dict:                              ## If the user input is in the dictionary,
-                    self.difficulty_setting = self.difficulty_dict[user_input][3]   ## set the difficulty setting to its name (index 3)
-                    ## If its in the dictionary then proceed with setup:                                                         ## return "NOQUIT" to continue the game
-                    if self.difficulty_setting == "CUSTOM":
-                        print("You have chosen CUSTOM")                             ## If the difficulty is custom,                
-                        ## CUSTOM DIFFICULTY                                     
-                        try:
-                            self.width = int(input("Enter width (MAX 26): "))       ## 26 letters in the alphabet
-                            if self.width > 26 or self.width < 3:                   ## width cannot be less than 3 or greater than 26
-                                print("Invalid input. Width cannot be less than 3 or exceed 26.")
-                                continue
-                            self.height = int(input("Enter height: (MAX 26): "))    ## Technically I'm less limited with the height but I like symmetry
-                            if self.height > 26 or self.height < 3:                 ## height cannot be less than 3 or greater than 26
-                                print("Invalid input. Height cannot be less than 3 or exceed 26.")
-                                continue
-                            self.num_mines = int(input("Enter number of mines: "))
-                            if self.num_mines > self.width * self.height or self.num_mines < 1:
-                                print("Invalid input. Number of mines cannot exceed the number of cells or be less than 1.")
-                                self.mines_remaining = self.num_mines
-                                continue
-                            return "NOQUIT"                        
-                        except ValueError:
-                            logging.debug(f"\033[33m ValueError triggered \033[0m")
-                            print("Invalid input. Please enter a valid integer.")
-                            continue
-                    elif self.difficulty_setting == "UNLIMITED":
-                        ## I have tested this WORKING at 1000 x 1000 grid with 10 mines! Whether it will go beyond that, who knows.
-                        print("You have chosen the UNLIMITED difficulty. Note this is not intended for playing.")
-                        print("The move dictionary will still work up to 26 columns (width). But passed that it will stop working.")                      
-                        try:
-                            self.width = int(input("Enter width (NO LIMIT): "))       ## We are playing with fire
-                            if self.width < 1:                                        ## width cannot be less than 1
-                                print("Invalid input. Width cannot be less than 1")
-                                continue
-                            self.height = int(input("Enter height: (NO LIMIT): "))
-                            if self.height < 1:                         
-                                print("Invalid input. Height cannot be less than 1")
-                                continue
-                            self.num_mines = int(input("Enter number of mines: "))
-                            if self.num_mines > self.width * self.height or self.num_mines < 1:
-                                print("Invalid input. Number of mines cannot exceed the number of cells or be less than 1.")
-                                self.mines_remaining = self.num_mines
-                                continue
-                            return "NOQUIT"                        
-                        except ValueError:
-                            logging.debug(f"\033[33m ValueError triggered \033[0m")
-                            print("Invalid input. Please enter a valid integer.")
-                            continue
-                    else:                                         ## If its in the dictionary but not custom or unlimited, then its one of the presets.
-                        self.width = self.difficulty_dict[user_input][0]            ## index 0 is width
-                        self.height = self.difficulty_dict[user_input][1]           ## index 1 is height
-                        self.num_mines = self.difficulty_dict[user_input][2]        ## index 2 is number of mines
-                        self.mines_remaining = self.num_mines                    
-                        return "NOQUIT"                  
-
-                ## If the user input is not in the difficulty dictionary, then its one of the following:
-                elif user_input == "HELP":
-                    self.minesweeper_help()
-                    continue
-                elif user_input == "EXIT" or user_input == "QUIT":
-                    logging.debug("\033[33m User has requested to quit the game. \033[0m")
-                    return "QUIT"
-                elif user_input == "RESET" or user_input == "RESTART":
-                    print("The game hasn't started, there's nothing to reset. You can quit or exit though.")
-                elif user_input == "REVEAL":
-                    print("You can't reveal the grid before the game starts. Use it during the game.")
+                more = grown | (self.chunk_dilate(grown) & available)
+                if more == grown:                   ## fixed point, nothing new to spread to in this chunk
+                    break
+                grown = more
+            state[2] |= grown
+            state[3] |= self.chunk_dilate(grown)
+            for (dx, dy), bits in self.chunk_spill(grown).items():
+                neighbour = (key[0] + dx, key[1] + dy)
+                if not (0 <= neighbour[0] < chunks_x and 0 <= neighbour[1] < chunks_y):
                     continue
-                elif user_input == "DEBUG":
-                    if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
-                        logging.getLogger().setLevel(logging.INFO)
-                        print("DEBUG logging turned off.")
+                neighbour_state = fills.get(neighbour)
+                if neighbour_state is None:
+                    neighbour_state = fills[neighbour] = self.chunk_fill_state(*neighbour)
+                neighbour_state[3] |= bits
+                seeds = bits & neighbour_state[1] & ~neighbour_state[2]
+                if seeds:
+                    if neighbour in pending:
+                        pending[neighbour] |= seeds
                     else:
-                        logging.getLogger().setLevel(logging.DEBUG)
-                        print("DEBUG should be turned on.")
-                        logging.debug(f"\033[33m DEBUG logging turned on. \033[0m")
+                        pending[neighbour] = seeds
+                        to_check.append(neighbour)
+
+        changed = self.changed_cells
+        for (chunk_x, chunk_y), (chunk, _, _, reveal_bits, revealed_bits, mine_bits, board_bits) in fills.items():
+            new_bits = reveal_bits & board_bits & ~revealed_bits
+            if not new_bits:
+                continue
+            chunk.revealed[:] = self.unpack_chunk_bits(revealed_bits | new_bits)
+            key = (chunk_x, chunk_y)
+            if self.hot_chunks.get(key) is not chunk:   ## keep_chunk, but it might have left the cold chunks during the fill
+                self.cold_chunks.pop(key, None)
+                self.hot_chunks[key] = chunk
+            new_mines = (new_bits & mine_bits).bit_count()
+            self.revealed_mine_count += new_mines
+            self.revealed_safe_count += new_bits.bit_count() - new_mines
+            text = format(new_bits, "b")[::-1]      ## find the new cells so the display and the engine know what changed
+            left, top = chunk_x * size, chunk_y * size
+            position = text.find("1")
+            while position != -1:
+                local_y, local_x = divmod(position, size)
+                changed.add((top + local_y) * width + left + local_x)
+                position = text.find("1", position + 1)
+
+    def recount_revealed(self):
+        """ This is a method that counts the revealed safe cells and revealed mines the slow way. Only hot chunks can have
+        revealed cells, so those are the only ones it needs to look at. """
+        revealed_safe = revealed_mines = 0
+        for chunk in self.hot_chunks.values():
+            revealed_int = int.from_bytes(chunk.revealed, "little")
+            chunk_mines = (revealed_int & int.from_bytes(chunk.mines, "little")).bit_count()
+            revealed_mines += chunk_mines
+            revealed_safe += revealed_int.bit_count() - chunk_mines
+        return revealed_safe, revealed_mines
+
+    def count_adjacent_flags(self):
+        """ This is a method that throws away every chunk's flag counts, so they get worked out again when they're needed. """
+        for chunks in (self.hot_chunks, self.cold_chunks):
+            for chunk in chunks.values():
+                chunk.adjacent_flags = None
+
+    def count_flags(self):
+        """ This is a method that counts the flags. Only hot chunks can have any. """
+        return sum(chunk.flagged.count(1) for chunk in self.hot_chunks.values())
+
+    def state_digest(self):
+        """ This is a method that gives a SHA-256 of the hot chunks (in order), which hold everything the player changed. """
+        digest = hashlib.sha256()
+        for key in sorted(self.hot_chunks):
+            chunk = self.hot_chunks[key]
+            digest.update(f"{key[0]}:{key[1]};".encode())
+            for layer in (chunk.mines, chunk.revealed, chunk.flagged):
+                digest.update(layer)
+        return digest.hexdigest()
+
+    def numbered_indices(self):
+        """ This is a method that finds every revealed cell with a number on it. Only hot chunks can have revealed cells. """
+        result = []
+        for chunk in self.hot_chunks.values():
+            if not any(chunk.revealed):
+                continue
+            adjacent = self.chunk_layer(chunk, "adjacent")
+            left, top = chunk.chunk_x * CHUNK_SIZE, chunk.chunk_y * CHUNK_SIZE
+            for local, (revealed, count) in enumerate(zip(chunk.revealed, adjacent)):
+                if revealed and count:
+                    local_y, local_x = divmod(local, CHUNK_SIZE)
+                    result.append((top + local_y) * self.width + left + local_x)
+        return result
+
+    def numbered_among(self, indices):
+        """ This is a method that does the same as Grid_Class.numbered_among, but looks each chunk up once instead of
+        going through the layer views for every cell (a big opening changes millions of cells). """
+        width = self.width
+        layers = {}                                 ## (chunk_x, chunk_y) -> (revealed, adjacent) of that chunk
+        result = []
+        for index in indices:
+            y, x = divmod(index, width)
+            key = (x // CHUNK_SIZE, y // CHUNK_SIZE)
+            chunk_layers = layers.get(key)
+            if chunk_layers is None:
+                chunk = self.get_chunk(*key)
+                chunk_layers = layers[key] = (chunk.revealed, self.chunk_layer(chunk, "adjacent"))
+            local = (y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE
+            if chunk_layers[0][local] and chunk_layers[1][local]:
+                result.append(index)
+        return result
+
+    def memory_components(self):
+        """ A chunked grid's memory is its chunks, so the report follows memory as the player explores. """
+        return {
+            "hot_chunks": self.hot_chunks,
+            "cold_chunks": self.cold_chunks,
+            "render_cache": self.row_cache,
+            "dirty_rows": self.dirty_rows,
+            "changed_cells": self.changed_cells,
+        }
+
+class Bit_Layer_Class:
+    """ This makes one of a bitboard grid's int layers look like the flat bytearray a normal grid has (0 or 1 per cell),
+    the same way Chunked_Layer_Class does for chunked grids. Reading is fine, but writing one cell makes a whole new int,
+    so anything that changes lots of cells at once should work on the ints directly (like cluster_reveal does). """
+
+    __slots__ = ("grid", "name")
+
+    def __init__(self, grid, name):
+        self.grid = grid
+        self.name = name                                ## the attribute on the grid that holds the int, like "mine_bits"
+
+    def __len__(self):
+        return self.grid.width * self.grid.height
+
+    def __getitem__(self, index):
+        grid = self.grid
+        bits = getattr(grid, self.name)
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self))
+            if start >= stop:
+                return b""
+            y, x = divmod(start, grid.width)
+            if x + (stop - start) <= grid.width:        ## a piece of a single row, which is all the display needs
+                length = stop - start
+                piece = (bits >> (y * grid.stride + x)) & ((1 << length) - 1)
+                return format(piece, f"0{length}b")[::-1].encode().translate(BIT_CHARS_TO_BYTES)
+            return bytes(grid.unpack_bits(bits)[start:stop])
+        if index < 0:
+            index += len(self)
+        return (bits >> (index + index // grid.width)) & 1   ## every row before this one has a padding bit
+
+    def __setitem__(self, index, value):
+        grid = self.grid
+        bit = 1 << (index + index // grid.width)
+        bits = getattr(grid, self.name)
+        setattr(grid, self.name, bits | bit if value else bits & ~bit)
+
+    def __iter__(self):
+        return iter(self.grid.unpack_bits(getattr(self.grid, self.name)))
+
+    def count(self, value):
+        ones = getattr(self.grid, self.name).bit_count()
+        return ones if value else len(self) - ones
+
+class Bitboard_Grid_Class(Grid_Class):
+    """ The bitboard grid is another way of storing the board. The mines, revealed, flagged and zero (safe cells with no
+    adjacent mines) layers are each one big Python int with one bit per cell, at bit y * stride + x. Like adjacency_counts,
+    every row gets one padding bit at the end (stride = width + 1) so shifting left and right can't wrap into the next row.
+    The adjacent mine counts stay in a bytearray, because they don't fit in one bit.  
+
+    The point is cluster_reveal. Instead of a BFS that looks at one neighbour at a time, it grows the opening with shifts
+    and masks over the whole board at once until it stops changing, which Python does in C.
+    It reveals exactly the same cells as the normal cluster_reveal.  
+
+    Everything else works through Bit_Layer_Class views, so the rest of the game can't tell the difference. """
+
+    def create_layers(self):
+        """ This is a method that makes the int layers and the bytearray-looking views over them. """
+        total_cells = self.width * self.height
+        self.stride = self.width + 1                ## row length in bits, including the padding bit
+        self.mine_bits = 0
+        self.revealed_bits = 0
+        self.flagged_bits = 0
+        self.zero_bits = 0
+        self.board_bits = self.pack_bits(b"\x01" * total_cells)    ## every real cell, no padding bits
+        self.mines = Bit_Layer_Class(self, "mine_bits")
+        self.revealed = Bit_Layer_Class(self, "revealed_bits")
+        self.flagged = Bit_Layer_Class(self, "flagged_bits")
+        self.adjacent = bytearray(total_cells)
+        self.adjacent_flags = bytearray(total_cells)
+
+    def pack_bits(self, layer):
+        """ This is a method that turns a flat layer (one byte per cell, 0 or 1) into a bitboard int.
+        The bytes become "0"/"1" text, backwards because the first cell is the lowest bit, and int(text, 2) does the rest. """
+        width, stride = self.width, self.stride
+        padded = bytearray(stride * self.height)
+        for y in range(self.height):                ## copy each row in, leaving the padding bit as 0
+            padded[y * stride:y * stride + width] = layer[y * width:(y + 1) * width]
+        return int(padded.translate(BYTES_TO_BIT_CHARS)[::-1] or b"0", 2)
+
+    def unpack_bits(self, bits):
+        """ This is a method that turns a bitboard int back into a flat layer (a bytearray, one byte per cell). """
+        width, stride = self.width, self.stride
+        unpacked = format(bits, f"0{stride * self.height}b")[::-1].encode().translate(BIT_CHARS_TO_BYTES)
+        layer = bytearray(width * self.height)
+        for y in range(self.height):                ## copy each row back out, dropping the padding bit
+            layer[y * width:(y + 1) * width] = unpacked[y * stride:y * stride + width]
+        return layer
+
+    def place_mines(self):
+        """ This is a method that places the mines the same way as the normal grid (same seed, same mines), but builds
+        the bytes first and packs them into the int once, instead of making a new int for every mine. """
+        layer = bytearray(self.width * self.height)
+        for index in self.mine_indices():
+            layer[index] = 1
+        self.mine_bits = self.pack_bits(layer)
+
+    def surrounding_counter(self):
+        """ This is a method that counts the adjacent mines (with adjacency_counts) and then works out the zero layer. """
+        self.adjacent[:] = self.adjacency_counts(self.unpack_bits(self.mine_bits), self.width, self.height)
+        self.zero_bits = self.pack_bits(self.adjacent.translate(ZERO_COUNT_TABLE)) & ~self.mine_bits
+
+    def load_layers(self, mines, revealed, flagged, adjacent=None):
+        """ This is a method that sets every layer at once from flat bytes, packing each one into its int in one go. """
+        self.mine_bits = self.pack_bits(mines)
+        self.revealed_bits = self.pack_bits(revealed)
+        self.flagged_bits = self.pack_bits(flagged)
+        self.num_mines = mines.count(1)
+        if adjacent is None:
+            self.surrounding_counter()
+        else:
+            self.adjacent[:] = adjacent
+            self.zero_bits = self.pack_bits(self.adjacent.translate(ZERO_COUNT_TABLE)) & ~self.mine_bits
+        self.count_adjacent_flags()
+        self.revealed_safe_count, self.revealed_mine_count = self.recount_revealed()
+        self.changed_cells = set()
+        self.row_cache.clear()
+
+    def count_adjacent_flags(self):
+        """ This is a method that works out every flag count from the flagged int, unpacked once instead of cell by cell. """
+        self.adjacent_flags[:] = self.adjacency_counts(self.unpack_bits(self.flagged_bits), self.width, self.height, include_centre=True)
+
+    def update_zero_bits(self, x, y):
+        """ This is a method that fixes the zero layer in the 3x3 area around (x, y) after a mine was added or removed. """
+        for new_y in range(max(0, y - 1), min(self.height, y + 2)):
+            for new_x in range(max(0, x - 1), min(self.width, x + 2)):
+                bit = 1 << (new_y * self.stride + new_x)
+                if self.adjacent[new_y * self.width + new_x] == 0 and not self.mine_bits & bit:
+                    self.zero_bits |= bit
                 else:
-                    print("Invalid input. Please enter a valid difficulty level.")
+                    self.zero_bits &= ~bit
+
+    def add_mine(self, x, y):
+        super().add_mine(x, y)
+        self.update_zero_bits(x, y)
+
+    def remove_mine(self, x, y):
+        super().remove_mine(x, y)
+        self.update_zero_bits(x, y)
+
+    def dilate(self, bits):
+        """ This is a method that grows a set of cells by one cell in every direction (the 3x3 area around each one). """
+        stride = self.stride
+        row = bits | (bits << 1) | (bits >> 1)                      ## left + center + right
+        return (row | (row << stride) | (row >> stride)) & self.board_bits   ## rows above and below, minus the padding bits
+
+    def cluster_reveal(self, x, y):
+        """ This is a method that reveals the same cells as Grid_Class.cluster_reveal, but with whole-board bit operations.  \n
+        The BFS version only keeps spreading through zero cells that weren't revealed yet, and reveals every cell around
+        the cells it spreads through. So here, the opening starts as the clicked cell and keeps growing by one cell in
+        every direction (kept to the unrevealed zero cells) until it stops changing. Then every cell around the opening
+        gets revealed in one go. """
+
+        width = self.width
+        index = y * width + x
+        if self.adjacent[index] > 0:                ## If the cell that was clicked is adjacent to any mines
+            self.set_revealed(index, True)          ## reveal the cell and return
+            return
+        revealed_bits = self.revealed_bits
+        open_bits = self.zero_bits & ~revealed_bits ## the cells the opening is allowed to spread through
+        opening = 1 << (y * self.stride + x)
+        while True:
+            grown = opening | (self.dilate(opening) & open_bits)
+            if grown == opening:                    ## fixed point, nothing new to spread to
+                break
+            opening = grown
+        new_bits = self.dilate(opening) & ~revealed_bits
+        if not new_bits:
+            return
+        self.revealed_bits = revealed_bits | new_bits
+        new_mines = (new_bits & self.mine_bits).bit_count()
+        self.revealed_mine_count += new_mines
+        self.revealed_safe_count += new_bits.bit_count() - new_mines
+
+        text = format(new_bits, "b")[::-1]          ## find the new cells so the display and the engine know what changed
+        stride = self.stride
+        changed = self.changed_cells
+        position = text.find("1")
+        while position != -1:
+            cell_y, cell_x = divmod(position, stride)
+            changed.add(cell_y * width + cell_x)
+            position = text.find("1", position + 1)
+
+    def recount_revealed(self):
+        """ This is a method that counts the revealed safe cells and revealed mines the slow way (well, with bit_count). """
+        revealed_mines = (self.revealed_bits & self.mine_bits).bit_count()
+        return self.revealed_bits.bit_count() - revealed_mines, revealed_mines
+
+    def memory_components(self):
+        """ A bitboard grid's layers are the ints behind the views, plus the adjacent counts and the board mask. """
+        return {
+            "mines": self.mine_bits,
+            "revealed": self.revealed_bits,
+            "flagged": self.flagged_bits,
+            "zero": self.zero_bits,
+            "board_mask": self.board_bits,
+            "adjacent": self.adjacent,
+            "adjacent_flags": self.adjacent_flags,
+            "render_cache": self.row_cache,
+            "dirty_rows": self.dirty_rows,
+            "changed_cells": self.changed_cells,
+        }
+
+###### SAVE FILES ######
+
+class Save_File_Class:
+    """ The save file is a small binary header followed by the layers, packed 8 cells to a byte.  \n
+    The header has the board kind, the size, the number of mines, the mine density (for chunked boards), the elapsed time,
+    then the difficulty name and the seed as length-prefixed text. A normal or bitboard grid then has the mines, revealed
+    and flagged layers for the whole board (plus the adjacent counts, if they were saved too). A chunked grid only saves
+    its hot chunks, because every other chunk can be made again from the seed.  \n
+    Loading reads the file through mmap and turns each packed layer into bytes with big integer operations, so even a
+    board with millions of cells loads in milliseconds without going through the cells one by one. """
+
+    MAGIC = b"MSWP"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHBBQQQdd")   ## magic, version, kind, options, width, height, mines, density, elapsed seconds
+    TEXT_LENGTH = struct.Struct("<H")
+    CHUNK_HEADER = struct.Struct("<QQ")     ## chunk_x, chunk_y
+    CHUNK_COUNT = struct.Struct("<I")
+    KINDS = {"GRID": 0, "BITBOARD": 1, "CHUNKED": 2}
+    STORE_ADJACENT = 1                      ## options bit: the adjacent counts are in the file too
+
+    @staticmethod
+    def pack_layer(layer, cell_count):
+        """ This packs a flat layer (one byte per cell, 0 or 1) into cell_count bits, lowest bit first. """
+        text = bytes(layer).translate(BYTES_TO_BIT_CHARS)[::-1]
+        return int(text or b"0", 2).to_bytes((cell_count + 7) // 8, "little")
+
+    @staticmethod
+    def unpack_layer(data, cell_count):
+        """ This unpacks cell_count bits back into a flat layer (one byte per cell). """
+        bits = int.from_bytes(data, "little")
+        return format(bits, f"0{cell_count}b")[::-1].encode().translate(BIT_CHARS_TO_BYTES)
+
+    @classmethod
+    def pack_text(cls, text):
+        data = text.encode("utf-8")
+        return cls.TEXT_LENGTH.pack(len(data)) + data
+
+    @classmethod
+    def save(cls, path, grid, elapsed=0.0, store_adjacent=False):
+        """ This saves a grid to path. Returns the number of bytes written. """
+        if isinstance(grid, Chunked_Grid_Class):
+            kind, density = "CHUNKED", grid.density
+            store_adjacent = False                      ## chunks work out their adjacent counts when they need them anyway
+        else:
+            kind, density = ("BITBOARD" if isinstance(grid, Bitboard_Grid_Class) else "GRID"), 0.0
+        options = cls.STORE_ADJACENT if store_adjacent else 0
+        parts = [
+            cls.HEADER.pack(cls.MAGIC, cls.VERSION, cls.KINDS[kind], options, grid.width, grid.height,
+                            grid.num_mines, density, float(elapsed)),
+            cls.pack_text(grid.difficulty),
+            cls.pack_text(json.dumps(grid.seed)),
+            cls.pack_text(json.dumps(grid.chunk_seed) if kind == "CHUNKED" else ""),
+        ]
+        if kind == "CHUNKED":
+            chunk_cells = CHUNK_SIZE * CHUNK_SIZE
+            parts.append(cls.CHUNK_COUNT.pack(len(grid.hot_chunks)))
+            for chunk in grid.hot_chunks.values():
+                parts.append(cls.CHUNK_HEADER.pack(chunk.chunk_x, chunk.chunk_y))
+                for layer in (chunk.mines, chunk.revealed, chunk.flagged):
+                    parts.append(cls.pack_layer(layer, chunk_cells))
+        else:
+            cell_count = grid.width * grid.height
+            for layer in (grid.mines, grid.revealed, grid.flagged):
+                parts.append(cls.pack_layer(layer[:], cell_count))
+            if store_adjacent:
+                parts.append(bytes(grid.adjacent))
+        data = b"".join(parts)
+        with open(path, "wb") as save_file:
+            save_file.write(data)
+        return len(data)
+
+    @classmethod
+    def load(cls, path):
+        """ This loads a grid from path. Returns (grid, elapsed seconds). Raises ValueError if it isn't a save file. """
+        with open(path, "rb") as save_file, mmap.mmap(save_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if len(data) < cls.HEADER.size:
+                raise ValueError("The file is too short to be a save file.")
+            (magic, version, kind_number, options, width, height, num_mines, density,
+             elapsed) = cls.HEADER.unpack_from(data, 0)
+            if magic != cls.MAGIC:
+                raise ValueError("That isn't a minesweeper save file.")
+            if version != cls.VERSION:
+                raise ValueError(f"Save file version {version} isn't supported.")
+            kinds = {number: name for name, number in cls.KINDS.items()}
+            if kind_number not in kinds:
+                raise ValueError(f"Unknown board kind {kind_number} in the save file.")
+            kind = kinds[kind_number]
+            offset = cls.HEADER.size
+            texts = []
+            for _ in range(3):                                  ## difficulty, seed, chunk seed
+                (length,) = cls.TEXT_LENGTH.unpack_from(data, offset)
+                offset += cls.TEXT_LENGTH.size
+                texts.append(data[offset:offset + length].decode("utf-8"))
+                offset += length
+            difficulty, seed_text, chunk_seed_text = texts
+            seed = json.loads(seed_text)
+
+            if kind == "CHUNKED":
+                grid = Chunked_Grid_Class(width, height, density * width * height, difficulty, json.loads(chunk_seed_text))
+                grid.seed = seed
+                chunk_cells = CHUNK_SIZE * CHUNK_SIZE
+                layer_size = chunk_cells // 8
+                (chunk_count,) = cls.CHUNK_COUNT.unpack_from(data, offset)
+                offset += cls.CHUNK_COUNT.size
+                for _ in range(chunk_count):
+                    chunk_x, chunk_y = cls.CHUNK_HEADER.unpack_from(data, offset)
+                    offset += cls.CHUNK_HEADER.size
+                    layers = []
+                    for _ in range(3):
+                        layers.append(bytearray(cls.unpack_layer(data[offset:offset + layer_size], chunk_cells)))
+                        offset += layer_size
+                    chunk = Chunk_Class(chunk_x, chunk_y, layers[0])
+                    chunk.revealed, chunk.flagged = layers[1], layers[2]
+                    grid.hot_chunks[(chunk_x, chunk_y)] = chunk
+                grid.num_mines = num_mines
+                grid.revealed_safe_count, grid.revealed_mine_count = grid.recount_revealed()
+            else:
+                cell_count = width * height
+                layer_size = (cell_count + 7) // 8
+                layers = []
+                for _ in range(3):
+                    layers.append(cls.unpack_layer(data[offset:offset + layer_size], cell_count))
+                    offset += layer_size
+                adjacent = None
+                if options & cls.STORE_ADJACENT:
+                    adjacent = data[offset:offset + cell_count]
+                    offset += cell_count
+                if offset > len(data):
+                    raise ValueError("The save file is cut short.")
+                grid_class = Bitboard_Grid_Class if kind == "BITBOARD" else Grid_Class
+                grid = grid_class(width, height, 0, difficulty, seed)   ## an empty board, the saved layers go on top
+                grid.load_layers(*layers, adjacent=adjacent)
+        return grid, elapsed
+
+###### MOVE JOURNAL ######
+
+class Move_Journal_Class:
+    """ The move journal records a game as JSON lines, one line at a time as they happen (the file is only ever appended to).  \n
+    The first line is a header with everything needed to make the exact same board again: the size, the number of mines,
+    the difficulty, the board backend, the seed (games always get a real seed, see Game_Engine_Class.new_game) and
+    whether auto-chord was on. A game loaded from a save file names the save file instead. Then there's one line per
+    move with the time since the start, the action (reveal, flag, chord, toggle_reveal or toggle_auto_chord), the cell,
+    the status and how many cells changed. The last line has the final counters and a digest of the board, so a replay can check it ended up in the same place.  \n
+    minesweeper_replay.py plays a journal back. """
+
+    VERSION = 2                                 ## 2: winning or losing doesn't reveal every cell any more, it only draws them
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_file = None                ## opened on the first write, so a game that never starts leaves no file
+        self.start = time.monotonic()
+        self.move_count = 0
+
+    @classmethod
+    def in_directory(cls, directory):
+        """ This makes a journal with a new file name (the time it started) in directory. """
+        os.makedirs(directory, exist_ok=True)
+        name = f"game-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1000000:06d}.jsonl"
+        return cls(os.path.join(directory, name))
+
+    def write(self, record):
+        if self.journal_file is None:
+            self.journal_file = open(self.path, "a", buffering=1)   ## line buffered, so a crash loses at most one line
+        self.journal_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def write_header(self, grid, requested_mines, save_file=None, auto_chord=False, first_click="CELL"):
+        """ This writes the header line. requested_mines is the number passed to new_game (a chunked grid works out its
+        real total from it, so that's what it needs to get again). auto_chord is whether the game started with auto-chord on,
+        and first_click is the engine's first_click mode, since moving the mines off the first click changes the board. """
+        self.start = time.monotonic()
+        self.write({
+            "type": "header",
+            "version": self.VERSION,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "width": grid.width,
+            "height": grid.height,
+            "mines": requested_mines,
+            "difficulty": grid.difficulty,
+            "grid": type(grid).__name__,
+            "seed": grid.seed,
+            "save_file": save_file,
+            "auto_chord": auto_chord,
+            "first_click": first_click,
+        })
+
+    def record(self, action, x, y, status, changed_count):
+        """ This writes one move. """
+        self.move_count += 1
+        self.write({
+            "type": "move",
+            "n": self.move_count,
+            "t": round(time.monotonic() - self.start, 4),
+            "action": action,
+            "x": x,
+            "y": y,
+            "status": status,
+            "changed": changed_count,
+        })
+
+    def close(self, engine):
+        """ This writes the final line (counters and board digest) and closes the file. """
+        if self.journal_file is None:
+            return
+        grid = engine.grid
+        self.write({
+            "type": "end",
+            "moves": self.move_count,
+            "t": round(time.monotonic() - self.start, 4),
+            "game_over": engine.game_over,
+            "mines_remaining": engine.mines_remaining,
+            "revealed_safe": grid.revealed_safe_count,
+            "revealed_mines": grid.revealed_mine_count,
+            "digest": grid.state_digest(),
+        })
+        self.journal_file.close()
+
+    @staticmethod
+    def read(path):
+        """ This reads a journal file. Returns (header, list of moves, end line or None if the game didn't finish). """
+        header, moves, end = None, [], None
+        with open(path) as journal_file:
+            for line in journal_file:
+                if not line.strip():
                     continue
+                record = json.loads(line)
+                if record["type"] == "header":
+                    header = record
+                elif record["type"] == "move":
+                    moves.append(record)
+                elif record["type"] == "end":
+                    end = record
+        if header is None:
+            raise ValueError(f"{path} has no journal header.")
+        return header, moves, end
+
+##################################################################
+
+###### LEADERBOARD ######
+
+class Leaderboard_Class:
+    """ The leaderboard keeps every win in a SQLite file, by difficulty and board size (width, height, mines), with an
+    index that ends in the time. So the best times of a board and a player's personal best are index lookups that stay
+    instant with hundreds of thousands of games in there.  \n
+    Wins are written by a background thread in batches (one transaction for however many are waiting), so a slow disk
+    never holds up the game. The queries never wait for the writer either. Wins it hasn't written yet are kept in
+    unwritten and added to the query results, so a win shows up straight away. """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY,
+            difficulty TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            mines INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            player TEXT NOT NULL,
+            seed INTEGER,
+            finished TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS scores_by_board ON scores (difficulty, width, height, mines, seconds);
+        CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, difficulty, width, height, mines, seconds);
+    """
+    INSERT = ("INSERT INTO scores (difficulty, width, height, mines, seconds, player, seed, finished)"
+              " VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+    BOARD = "difficulty = ? AND width = ? AND height = ? AND mines = ?"
 
-        def game_imput(self, active_grid, move_dict):
-            """ This is a function that takes the player's input for the game. """
+    def __init__(self, path=LEADERBOARD_FILE, player=None):
+        import queue                                    ## only the terminal game keeps a leaderboard, so these load here
+        import sqlite3
+        self.path = path or "file:leaderboard?mode=memory&cache=shared"   ## no file: a memory database both threads can see
+        self.player = player or self.default_player()
+        self.connection = sqlite3.connect(self.path, uri=not path, check_same_thread=False)   ## the reads, on the game's thread
+        if path:
+            self.connection.execute("PRAGMA journal_mode=WAL")              ## reads don't wait for the writer
+        self.connection.executescript(self.SCHEMA)
+        self.pending = queue.Queue()
+        self.unwritten = []                             ## wins queued but not committed yet, as rows
+        self.lock = threading.Lock()                    ## a query and a commit never overlap, so each win is counted once
+        self.writer = threading.Thread(target=self.write_loop, name="leaderboard-writer", daemon=True)
+        self.writer.start()
 
+    @staticmethod
+    def default_player():
+        for name in ("USER", "USERNAME", "LOGNAME"):
+            if os.environ.get(name):
+                return os.environ[name]
+        return "player"
+
+    ###### WRITES ######
+
+    def record(self, difficulty, width, height, mines, seconds, seed=None):
+        """ This queues up one win for the writer thread and returns straight away. """
+        row = (difficulty, width, height, mines, float(seconds), self.player, seed, time.strftime("%Y-%m-%dT%H:%M:%S"))
+        with self.lock:
+            self.unwritten.append(row)
+        self.pending.put(row)
+
+    def write_loop(self):
+        """ The writer thread. It waits for a win, takes everything else that's waiting too (up to LEADERBOARD_BATCH),
+        and writes them all in one transaction. The transaction and taking the rows off unwritten happen under the lock
+        (with WAL and synchronous=NORMAL a commit doesn't wait for the disk, so that's quick). None in the queue means stop. """
+        import queue
+        import sqlite3
+        connection = sqlite3.connect(self.path, uri=self.path.startswith("file:"))
+        connection.execute("PRAGMA synchronous=NORMAL")                     ## with WAL this is still safe, and much quicker
+        try:
             while True:
-                logging.debug(f"\033[33m Game input loop initiated. \033[0m")
-                user_input = input("Enter move or -f (move): ").upper()
-
-                ## FLAG MODE SECTION
-                if user_input.startswith("-F "):                         ## This first section is for flag mode
-                    logging.debug(f"\033[33m Flag mode initiated. \033[0m")
-                    flag_move = user_input[3:]
-                    if flag_move in move_dict:
-                        x, y = move_dict[flag_move]                      ## unpacks the tuple (x, y) from the dictionary at that key
-                        cell = active_grid.grid_matrix[y][x]             ## create link to that cell object in the grid
-                        logging.debug(f"\033[33m Flag move found    x: {x} | y: {y} \033[0m")
-                        logging.debug(f"\033[33m Cell is mine: {cell.is_mine} \033[0m")
-                        logging.debug(f"\033[33m Cell is revealed: {cell.is_revealed} \033[0m")
-                        logging.debug(f"\033[33m Cell is flagged: {cell.is_flagged} \033[0m")
-                        if cell.is_revealed:
-                            print("You can't flag a revealed cell.")
-                            logging.debug(f"\033[33m tried to flag a revealed cell... \033[0m")
+                batch = [self.pending.get()]
+                while len(batch) < LEADERBOARD_BATCH:
+                    try:
+                        batch.append(self.pending.get_nowait())
+                    except queue.Empty:
+                        break
+                rows = [row for row in batch if row is not None]
+                try:
+                    if rows:
+                        with self.lock:
+                            try:
+                                with connection:
+                                    connection.executemany(self.INSERT, rows)
+                            finally:
+                                for row in rows:
+                                    self.unwritten.remove(row)
+                except sqlite3.Error as error:
+                    logging.warning("Couldn't save %s scores: %s", len(rows), error)
+                finally:
+                    for _ in batch:
+                        self.pending.task_done()
+                if len(rows) < len(batch):
+                    return
+        finally:
+            connection.close()
+
+    def flush(self):
+        """ This waits until every queued win is written. The queries don't need it, only close does. """
+        self.pending.join()
+
+    def close(self):
+        """ This writes what's left, stops the writer thread and closes the database. """
+        self.pending.put(None)
+        self.writer.join()
+        self.connection.close()
+
+    ###### QUERIES ######
+
+    def unwritten_rows(self, difficulty, width, height, mines):
+        """ This gives the wins of a board that the writer hasn't committed yet. Call it with the lock held. """
+        board = (difficulty, width, height, mines)
+        return [row for row in self.unwritten if row[:4] == board]
+
+    def top(self, difficulty, width, height, mines, limit=LEADERBOARD_TOP):
+        """ This gives the best [(seconds, player, finished)] of a board, fastest first. """
+        with self.lock:
+            best = self.connection.execute(
+                f"SELECT seconds, player, finished FROM scores WHERE {self.BOARD} ORDER BY seconds LIMIT ?",
+                (difficulty, width, height, mines, limit)).fetchall()
+            best += [(row[4], row[5], row[7]) for row in self.unwritten_rows(difficulty, width, height, mines)]
+        return sorted(best, key=lambda score: score[0])[:limit]
+
+    def personal_best(self, difficulty, width, height, mines, player=None):
+        """ This gives the player's best time on a board, or None if they haven't won it yet. """
+        player = player or self.player
+        with self.lock:
+            best = self.connection.execute(
+                f"SELECT MIN(seconds) FROM scores WHERE player = ? AND {self.BOARD}",
+                (player, difficulty, width, height, mines)).fetchone()[0]
+            times = [row[4] for row in self.unwritten_rows(difficulty, width, height, mines) if row[5] == player]
+        if best is not None:
+            times.append(best)
+        return min(times, default=None)
+
+    def rank(self, difficulty, width, height, mines, seconds):
+        """ This gives where a time would place on a board, counting from 1. """
+        with self.lock:
+            faster = self.connection.execute(
+                f"SELECT COUNT(*) FROM scores WHERE {self.BOARD} AND seconds < ?",
+                (difficulty, width, height, mines, seconds)).fetchone()[0]
+            faster += sum(row[4] < seconds for row in self.unwritten_rows(difficulty, width, height, mines))
+        return faster + 1
+
+    def menu_lines(self, presets=DIFFICULTY_PRESETS):
+        """ This gives the best times and the player's personal best of every preset that has any, for the menu. """
+        lines = []
+        for width, height, mines, name in presets.values():
+            if not mines:
+                continue
+            best = self.top(name, width, height, mines)
+            if not best:
+                continue
+            times = ", ".join(f"{seconds:.2f}s ({player})" for seconds, player, _ in best)
+            personal = self.personal_best(name, width, height, mines)
+            mine = f"  |  your best: {personal:.2f}s" if personal is not None else ""
+            lines.append(f"{name}: {times}{mine}")
+        return lines
+
+##################################################################
+
+###### HEADLESS GAME ENGINE ######
+
+class Game_Clock_Class:
+    """ The game clock works out the elapsed time from time.monotonic() when it's asked, instead of counting seconds in a
+    thread. So it never drifts, has sub-second resolution, costs nothing while nobody looks at it, and can be paused.  \n
+    The time from before the last resume is kept in banked, and started is when the clock was last resumed (None while
+    it's paused). """
+
+    __slots__ = ("banked", "started")
+
+    def __init__(self):
+        self.banked = 0.0
+        self.started = None
+
+    def restart(self, elapsed=0.0):
+        """ This is a method that starts the clock again from elapsed seconds (e.g. the time in a save file). """
+        self.banked = float(elapsed)
+        self.started = time.monotonic()
+
+    def pause(self):
+        """ This is a method that stops the clock. Pausing a paused clock does nothing. """
+        if self.started is not None:
+            self.banked += time.monotonic() - self.started
+            self.started = None
+
+    def resume(self):
+        """ This is a method that starts a paused clock again. Resuming a running clock does nothing. """
+        if self.started is None:
+            self.started = time.monotonic()
+
+    @property
+    def running(self):
+        return self.started is not None
+
+    def elapsed(self):
+        """ This is a method that gives the elapsed seconds as a float. """
+        if self.started is None:
+            return self.banked
+        return self.banked + time.monotonic() - self.started
+
+class Phase_Timer_Class:
+    """ A phase timer is what Instrumentation_Class.phase gives back. It times the code inside the with block. """
+
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+class Instrumentation_Class:
+    """ The instrumentation keeps counters and timers for the phases of the game, so you can see where the time goes:  \n
+    generate (making the board), reveal (flood fills and chords), win_check, render (drawing the board) and input_wait
+    (waiting for the player to type).  \n
+    Time a phase with 'with instrumentation.phase("reveal"):'. Every move also gets its own record of the time spent in
+    each phase since the move before it, so one record is: drawing the board, waiting for the player, then the move itself.
+    If it's turned off, phase() hands back a do-nothing context and nothing gets counted. """
+
+    PHASES = ("generate", "reveal", "win_check", "render", "input_wait")
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.timers = {phase: [0, 0.0, 0.0] for phase in self.PHASES}     ## phase -> [calls, total seconds, longest call]
+        self.counters = {}                                  ## name -> count, like "moves" or "cells_changed"
+        self.moves = deque(maxlen=MAX_MOVE_RECORDS)         ## the per-move records, oldest get thrown away
+        self.current_move = {}                              ## phase -> seconds, for the move that hasn't finished yet
+        self.null_timer = nullcontext()
+        self.memory = None                                  ## the last memory report (Memory_Report_Class), saved by dump
+
+    def phase(self, name):
+        """ This is a method that gives back a context manager that times one phase. """
+        if not self.enabled:
+            return self.null_timer
+        return Phase_Timer_Class(self, name)
+
+    def add_time(self, name, seconds):
+        """ This is a method that adds the time of one call of a phase to the totals and to the current move. """
+        timer = self.timers.setdefault(name, [0, 0.0, 0.0])
+        timer[0] += 1
+        timer[1] += seconds
+        if seconds > timer[2]:
+            timer[2] = seconds
+        self.current_move[name] = self.current_move.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        """ This is a method that adds to a counter. """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def end_move(self, status, changed_count):
+        """ This is a method that closes the record of the current move. """
+        if not self.enabled:
+            return
+        self.count("moves")
+        self.count("cells_changed", changed_count)
+        record = {"move": self.counters["moves"], "status": status, "changed": changed_count}
+        record.update(self.current_move)
+        self.moves.append(record)
+        self.current_move = {}
+
+    def summary(self):
+        """ This is a method that gives back the counters and the per-phase totals as a dictionary. """
+        phases = {}
+        for name, (calls, total, longest) in self.timers.items():
+            phases[name] = {
+                "calls": calls,
+                "total_seconds": total,
+                "mean_seconds": total / calls if calls else 0.0,
+                "max_seconds": longest,
+            }
+        return {"counters": dict(self.counters), "phases": phases}
+
+    def report(self):
+        """ This is a method that gives back the summary as lines of text, for the stats command. """
+        counters = " | ".join(f"{name}: {value}" for name, value in self.counters.items()) or "nothing counted yet"
+        lines = [f" {counters}", f" {'phase':<12}{'calls':>8}{'total (s)':>12}{'mean (ms)':>12}{'max (ms)':>12}"]
+        for name, numbers in self.summary()["phases"].items():
+            lines.append(f" {name:<12}{numbers['calls']:>8}{numbers['total_seconds']:>12.3f}"
+                         f"{numbers['mean_seconds'] * 1000:>12.3f}{numbers['max_seconds'] * 1000:>12.3f}")
+        if self.moves:
+            last = self.moves[-1]
+            timings = ", ".join(f"{name} {seconds * 1000:.3f} ms" for name, seconds in last.items() if isinstance(seconds, float))
+            lines.append(f" Last move ({last['status']}, {last['changed']} cells changed): {timings or 'nothing timed'}")
+        return lines
+
+    def dump(self, path):
+        """ This is a method that saves the summary and the per-move records to a JSON file. """
+        data = self.summary()
+        if self.memory is not None:
+            data["memory"] = self.memory
+        data["moves"] = list(self.moves)
+        with open(path, "w") as stats_file:
+            json.dump(data, stats_file, indent=2)
+
+class Move_Result_Class:
+    """ This is what the game engine gives back after every move.  \n
+    status is "HIT" (stepped on a mine), "WIN", "NOHIT" (the move went through and the game goes on) or "INVALID"
+    (the move wasn't allowed, and message says why). changed is a list of the (x, y) cells that changed. If the whole
+    board got revealed at the end of the game, board_revealed is True instead of listing every cell. """
+
+    def __init__(self, status, changed, mines_remaining, message="", board_revealed=False):
+        self.status = status
+        self.changed = changed
+        self.mines_remaining = mines_remaining
+        self.message = message
+        self.board_revealed = board_revealed
+
+    def __repr__(self):
+        return (f"Move_Result_Class(status={self.status!r}, changed={len(self.changed)} cells, "
+                f"mines_remaining={self.mines_remaining}, message={self.message!r})")
+
+class Game_Engine_Class:
+    """ The game engine plays the game on top of a grid without any input() or print(), so the game can be driven by code
+    (bots, scripts, load tests) as well as by the terminal. The terminal game is just one user of it.  \n
+    Start a game with new_game, then call reveal, flag and chord with (x, y) coordinates. Every call returns a
+    Move_Result_Class. """
+
+    def __init__(self, instrumentation=None):
+        self.grid = None
+        self.mines_remaining = 0
+        self.game_over = False
+        self.numbered_cells = set()                     ## revealed cells with a number, kept up to date from the changed cells of each move
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation_Class()
+        self.journal = None                             ## a Move_Journal_Class to record the moves in, if there is one
+        self.pending_move = None                        ## (action, x, y) of the move in progress, for the journal
+        self.clock = Game_Clock_Class()                 ## starts with each game and stops when it's won or lost
+        self.first_click = FIRST_CLICK                  ## "CELL", "OPENING" or None, see make_first_click_safe
+        self.auto_chord = AUTO_CHORD                    ## if True, moves chord every number they leave with all its flags down
+
+    def new_game(self, width, height, mines, seed=None, difficulty="CUSTOM", grid_class=None):
+        """ This is a method that starts a new game and returns the grid. UNLIMITED games get a chunked grid.
+        Pass grid_class (e.g. Bitboard_Grid_Class) to choose the board backend yourself.  \n
+        If there's no seed, one gets picked here, so every game has a real seed that can make the same board again. """
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        with self.instrumentation.phase("generate"):
+            if grid_class is not None:
+                self.grid = grid_class(width, height, mines, difficulty, seed)
+            elif difficulty == "UNLIMITED":
+                self.grid = Chunked_Grid_Class(width, height, mines, difficulty, seed)
+            else:
+                self.grid = Grid_Class(width, height, mines, difficulty, seed)
+        self.instrumentation.count("games")
+        self.mines_remaining = self.grid.num_mines     ## a chunked grid can end up with a slightly different total
+        self.game_over = False
+        self.numbered_cells = set()
+        self.pending_move = None
+        if self.journal is not None:
+            self.journal.write_header(self.grid, mines, auto_chord=self.auto_chord, first_click=self.first_click)
+        self.clock.restart()
+        return self.grid
+
+    def save_game(self, path, elapsed=None, store_adjacent=False):
+        """ This is a method that saves the game to a file (see Save_File_Class). Returns the number of bytes written.
+        The elapsed time comes from the game clock unless you give one. """
+        if elapsed is None:
+            elapsed = self.clock.elapsed()
+        return Save_File_Class.save(path, self.grid, elapsed, store_adjacent)
+
+    def load_game(self, path):
+        """ This is a method that loads a saved game and carries on from there, clock included. Returns (grid, elapsed seconds). """
+        grid, elapsed = Save_File_Class.load(path)
+        self.grid = grid
+        self.mines_remaining = grid.num_mines - grid.count_flags()
+        self.game_over = False
+        self.numbered_cells = set(grid.numbered_indices())
+        self.pending_move = None
+        if self.journal is not None:
+            self.journal.write_header(grid, grid.num_mines, save_file=path, auto_chord=self.auto_chord,
+                                      first_click=self.first_click)
+        self.clock.restart(elapsed)
+        return grid, elapsed
+
+    def memory_report(self, extra=None):
+        """ This is a method that measures the grid plus what the engine keeps (the numbered cells and the per-move
+        records), and any extra name -> object components. See Memory_Report_Class. """
+        components = {"numbered_cells": self.numbered_cells, "move_records": self.instrumentation.moves}
+        if extra:
+            components.update(extra)
+        return self.grid.memory_report(components)
+
+    def close_journal(self):
+        """ This is a method that finishes the journal (if there is one) with the final state of the board. """
+        if self.journal is not None:
+            self.journal.close(self)
+            self.journal = None
+
+    def begin_move(self, action, x=None, y=None):
+        """ This is a method that remembers which move is being made, for the journal. A reveal on a revealed cell turns
+        into a chord, but it's still journaled as the reveal the player typed, so only the first call counts. """
+        if self.pending_move is None:
+            self.pending_move = (action, x, y)
+
+    def make_first_click_safe(self, x, y):
+        """ This is a method that moves the mines away from the first click: off the cell itself (first_click "CELL"), or
+        off the 3x3 around it too ("OPENING"), so the first click always opens an area. The moved cells are all hidden, so
+        they're left out of the move's changed cells. Listing them would give away where the mines went. """
+        grid = self.grid
+        mines_before = grid.num_mines
+        moved = grid.relocate_mines(x, y, self.first_click == "OPENING")
+        if moved:
+            grid.take_changed_cells()
+            self.mines_remaining += grid.num_mines - mines_before   ## chunked grids take the mines away instead of moving them
+            self.instrumentation.count("mines_relocated", moved)
+            logging.debug("\033[33m First click: moved %s mines away from (%s, %s) \033[0m", moved, x, y)
+
+    def make_result(self, status, message=""):
+        """ This is a method that packs up the cells changed by the last move into a Move_Result_Class. """
+        grid = self.grid
+        width = grid.width
+        changed_cells = grid.take_changed_cells()
+        changed = [(index % width, index // width) for index in changed_cells]
+        self.numbered_cells.update(grid.numbered_among(changed_cells))   ## numbers are what the hint engine and the solver work from
+        board_revealed = status in ("HIT", "WIN")      ## the end of the game reveals the whole board
+        if board_revealed:
+            self.game_over = True
+            self.clock.pause()
+        self.instrumentation.end_move(status, len(changed))
+        if self.pending_move is not None:
+            if self.journal is not None:
+                self.journal.record(*self.pending_move, status, len(changed))
+            self.pending_move = None
+        return Move_Result_Class(status, changed, self.mines_remaining, message, board_revealed)
+
+    def finish_move(self, seeds=None):
+        """ This is a method that checks the win after a move that didn't hit a mine. With auto_chord on it first runs
+        chord_cascade from the cells the move changed (or from seeds, flat indices, if they're given). """
+        if self.auto_chord:
+            grid = self.grid
+            with self.instrumentation.phase("reveal"):
+                hit = grid.chord_cascade(list(grid.changed_cells) if seeds is None else seeds)
+            if hit == "HIT":
+                grid.reveal_toggle_func("GAME")         ## a wrong flag let the cascade step on a mine
+                return self.make_result("HIT")
+        with self.instrumentation.phase("win_check"):
+            won = self.grid.check_win()
+        if won:
+            return self.make_result("WIN")
+        return self.make_result("NOHIT")
+
+    def reveal(self, x, y):
+        """ This is a method that checks the cell at (x, y), like typing a move in the game. If the cell is already revealed
+        it does a chord (special_reveal) instead, same as the terminal game. """
+        self.begin_move("reveal", x, y)
+        if self.game_over:
+            return self.make_result("INVALID", "The game is over. Start a new game.")
+        grid = self.grid
+        index = y * grid.width + x
+        if grid.flagged[index]:                         ## Can't check a cell that's flagged
+            return self.make_result("INVALID", "Cell is flagged. Remove the flag first.")
+        if self.first_click and not (grid.revealed_safe_count or grid.revealed_mine_count):   ## nothing revealed yet
+            self.make_first_click_safe(x, y)
+        if grid.mines[index]:
+            grid.reveal_toggle_func("GAME")             ## If you step on a mine it reveals the grid
+            return self.make_result("HIT")
+        if grid.revealed[index]:
+            return self.chord(x, y)
+        with self.instrumentation.phase("reveal"):
+            grid.cluster_reveal(x, y)
+        return self.finish_move()
+
+    def chord(self, x, y):
+        """ This is a method that reveals the 3x3 area around a revealed cell, skipping flags (special_reveal). """
+        self.begin_move("chord", x, y)
+        if self.game_over:
+            return self.make_result("INVALID", "The game is over. Start a new game.")
+        grid = self.grid
+        if not grid.revealed[y * grid.width + x]:
+            return self.make_result("INVALID", "You can only chord a revealed cell.")
+        with self.instrumentation.phase("reveal"):
+            hit = grid.special_reveal(x, y)
+        if hit == "HIT":
+            grid.reveal_toggle_func("GAME")             ## If you step on a mine it reveals the grid
+            return self.make_result("HIT")
+        return self.finish_move()
+
+    def flag(self, x, y):
+        """ This is a method that puts a flag on (x, y), or takes it off if there's one already. """
+        self.begin_move("flag", x, y)
+        if self.game_over:
+            return self.make_result("INVALID", "The game is over. Start a new game.")
+        grid = self.grid
+        index = y * grid.width + x
+        if grid.revealed[index]:
+            return self.make_result("INVALID", "You can't flag a revealed cell.")
+        if grid.flagged[index]:
+            grid.set_flagged(index, False)              ## remove the flag
+            self.mines_remaining += 1                   ## updates the number of mines remaining in the display
+        else:
+            grid.set_flagged(index, True)
+            self.mines_remaining -= 1
+            if self.auto_chord:                         ## the numbers around the new flag might have all their flags now
+                return self.finish_move(grid.neighbourhood(x, y))
+        return self.make_result("NOHIT")
+
+    def toggle_reveal(self):
+        """ This is a method that toggles REVEAL mode (for testing). """
+        self.begin_move("toggle_reveal")
+        self.grid.reveal_toggle_func("REVEAL")
+        return self.make_result("NOHIT")
+
+    def play_moves(self, moves):
+        """ This is a method that plays a list of ("reveal", "flag" or "chord", x, y) moves in a row, like the ones from
+        Coordinate_Codec_Class.parse_line, and stops early if the game ends. INVALID moves are skipped. Returns (status of
+        the last move that counted, how many moves were used, list of (move, message) for the INVALID ones). """
+        actions = {"reveal": self.reveal, "flag": self.flag, "chord": self.chord}
+        status, used, invalid = "NOHIT", 0, []
+        for move in moves:
+            if self.game_over:
+                break
+            action, x, y = move
+            result = actions[action](x, y)
+            used += 1
+            if result.status == "INVALID":
+                invalid.append((move, result.message))
+            else:
+                status = result.status
+        return status, used, invalid
+
+    def toggle_auto_chord(self):
+        """ This is a method that turns auto-chord on or off. It goes in the journal like a move, because it changes what
+        the moves after it do. """
+        self.begin_move("toggle_auto_chord")
+        self.auto_chord = not self.auto_chord
+        return self.make_result("NOHIT")
+
+##################################################################
+
+###### LIVE CLOCK INPUT ######
+
+class Live_Input_Class:
+    """ The live input reads the player's moves inside an asyncio event loop instead of a blocking input(), so the time on
+    the status line can keep ticking while the player types. The status line is rewritten in place (save the cursor, go
+    up to the status line, rewrite it, go back), so the board never gets drawn again just for the clock.  \n
+    While it's attached it stands in for sys.stdout, only to count the lines printed since the status line, which is how
+    it knows how far up the status line is. It needs a POSIX terminal, use available() to check first. """
+
+    def __init__(self):
+        self.stream = None                              ## the real sys.stdout while attached
+        self.lines_since_status = None                  ## lines printed since the status line (None before the first one)
+        self.pending = b""                              ## what was typed past the end of the last line read
+        self.end_of_input = False
+
+    @staticmethod
+    def available():
+        """ The live input uses loop.add_reader on stdin and cursor codes, so both ends have to be a POSIX terminal. """
+        return os.name == "posix" and sys.stdin.isatty() and sys.stdout.isatty()
+
+    def attach(self):
+        if self.stream is None:
+            self.stream = sys.stdout
+            sys.stdout = self
+
+    def detach(self):
+        if self.stream is not None:
+            sys.stdout = self.stream
+            self.stream = None
+
+    def write(self, text):
+        if self.lines_since_status is not None:
+            self.lines_since_status += text.count("\n")
+        return (self.stream or sys.__stdout__).write(text)
+
+    def flush(self):
+        (self.stream or sys.__stdout__).flush()
+
+    def __getattr__(self, name):                        ## everything else (encoding, isatty ...) comes from the real stdout
+        return getattr(self.stream or sys.__stdout__, name)
+
+    def status_printed(self):
+        """ This is a method to call right after printing the status line, so the line counting starts from there. """
+        self.lines_since_status = 0
+
+    def read_line(self, prompt, status, clock):
+        """ This is a method that works like input(prompt), but while it waits, status() gets written over the status
+        line every time the clock ticks over a whole second. Raises EOFError at the end of the input, like input(). """
+        self.write(prompt)
+        self.flush()
+        if b"\n" not in self.pending and not self.end_of_input:
+            import asyncio                              ## asyncio is slow to import, so only the live clock loads it
+            asyncio.run(self.wait_for_line(status, clock))
+        if b"\n" in self.pending:
+            line, _, self.pending = self.pending.partition(b"\n")
+        elif self.pending:                              ## the last line had no newline at the end
+            line, self.pending = self.pending, b""
+        else:
+            raise EOFError
+        if self.lines_since_status is not None:
+            self.lines_since_status += 1                ## the terminal echoed the Enter
+        return line.decode(errors="replace").rstrip("\r")
+
+    async def wait_for_line(self, status, clock):
+        """ This waits for a whole line on stdin. Nothing runs in between except one wake-up per second of game time. """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        line_ready = loop.create_future()
+        fd = sys.stdin.fileno()
+
+        def on_readable():
+            data = os.read(fd, 4096)
+            self.pending += data
+            if not data:
+                self.end_of_input = True
+            if (not data or b"\n" in data) and not line_ready.done():
+                line_ready.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            while not line_ready.done():
+                timeout = 1.0 - clock.elapsed() % 1.0 + 0.01 if clock.running else None   ## wake up just after the next second
+                await asyncio.wait((line_ready,), timeout=timeout)
+                if not line_ready.done():
+                    self.redraw_status(status())
+        finally:
+            loop.remove_reader(fd)
+
+    def redraw_status(self, text):
+        """ This is a method that rewrites the status line in place, if it's still on the screen. """
+        if self.lines_since_status is None or logging.root.isEnabledFor(logging.DEBUG):   ## debug lines aren't counted
+            return
+        lines_up = self.lines_since_status + 1         ## +1 for the line with the prompt on it
+        import shutil
+        if lines_up >= shutil.get_terminal_size().lines:
+            return                                      ## it has scrolled off the top
+        self.stream.write(f"\0337\033[{lines_up}A\r\033[K{text}\0338")
+        self.stream.flush()
+
+##################################################################
+
+###### TERMINAL GAME ######
+
+class Game_Manager_Class:
+    """ This is a class that manages the game. It takes care of the game input and some states. """
+
+    difficulty_dict = DIFFICULTY_PRESETS          ## The presets live at the top of the file so other scripts (like the solver) can use them
+
+    def __init__(self, leaderboard, instrumentation=None, live_input=None, board_pool=None, settings=None):
+        self.engine = Game_Engine_Class(instrumentation)   ## The engine runs the actual game, this class just talks to the player.
+        self.difficulty_setting = "NONE"          ## These get initialized at the start of the game.
+                                                  ## Except for the leaderboard which is passed in from the main loop.
+        self.width = 0                            ## These settings get set by the difficulty_input method.
+        self.height = 0                           ## Then they're accessed by the Main_Game_Class to create the grid object.
+        self.num_mines = 0
+        self.leaderboard = leaderboard            ## Leaderboard_Class with the best times, kept on disk
+        self.probability_engine = None            ## made the first time the player asks for a hint
+        self.live_input = live_input              ## a Live_Input_Class if the clock should tick while the player types
+        self.board_pool = board_pool              ## a Board_Pool_Class of no-guess boards (minesweeper_boards.py), if there is one
+        self.settings = settings                  ## (width, height, mines, difficulty, seed) from the command line, instead of the menu
+
+    def elapsed_seconds(self):
+        """ This is a method that gives the time elapsed in the current game, from the engine's clock. """
+        return self.engine.clock.elapsed()
+
+    def memory_report(self):
+        """ This is a method that measures the memory of the game, including the hint cache if there is one. """
+        extra = {"hint_cache": self.probability_engine.cache} if self.probability_engine is not None else None
+        return self.engine.memory_report(extra)
+
+    def status_text(self):
+        """ This is a method that makes the status line that goes above the board. """
+        return f" Mines remaining: {self.mines_remaining} | Time elapsed: {int(self.elapsed_seconds())} seconds"
+
+    def read_move(self, prompt):
+        """ This is a method that reads the player's next input. With the live input the time keeps ticking meanwhile. """
+        if self.live_input is not None:
+            return self.live_input.read_line(prompt, self.status_text, self.engine.clock)
+        return input(prompt)
+
+    @property
+    def mines_remaining(self):
+        """ The number of mines remaining comes from the engine, which updates it when flags go on or off. """
+        return self.engine.mines_remaining
+
+    def play_again(self):
+        """ This is only called in the external loop if main() is exited. It asks the player if they want to play again. """
+        while True:
+            logging.debug("\033[33m play_again called. \033[0m")
+            play_again = input("Would you like to play again? (Y/N): ")
+            play_again = play_again.upper()
+            if play_again == "Y":
+                logging.debug("\033[33m Game should be restarting... \033[0m")
+                return True
+            elif play_again == "N":
+                logging.debug("\033[33m Game Manager stopped. \033[0m")       
+                return False
+            else:
+                print("Invalid input. Please enter Y or N.")
+                continue
+
+    def minesweeper_help(self):
+        print("To check a square, enter a letter followed by a number. (e.g. a1, B2, c3, etc.)")
+        print("Boards wider than 26 columns keep going like spreadsheet columns: AA, AB ... AZ, BA and so on. (e.g. aa1, AB123)")
+        print("To flag, Type '-f' followed by the square you want to flag. (e.g. '-f a1', '-f B2', '-f c3', etc.)")
+        print("Flags can be removed by flagging the same square again.")
+        print("You can put lots of moves on one line and they all get played before the board is drawn again. (e.g. 'a1 b2 -f c3')")
+        print("You can also AUTO search a 3x3 area around a revealed cell, skipping the flagged squares. ")
+        print("That works exactly the same way as it would in normal minesweeper. Simply enter any revealed cell. ")
+        print("Type 'auto' to toggle auto-chord, which keeps chording every number that has all its flags down.")
+        print("Type 'reveal' to toggle REVEAL mode. This will reveal the mine locations (For testing purposes).")
+        print("Type 'view' to toggle the viewport, which only draws the part of the board that fits on screen (on by default in UNLIMITED).")
+        print("With the viewport on, type 'pan' followed by u, d, l or r (and an optional distance) to move it, e.g. 'pan r' or 'pan d 20'.")
+        print("Type 'goto' followed by a square to centre the viewport on it. (e.g. 'goto c12')")
+        print("Type 'hint' to see the chance of a mine on every hidden square (' ! ' is a sure mine) and the safest move.")
+        print("Type 'reset', 'restart', 'exit', or 'quit' at any point to to reset the game.")
+        print("Type 'debug' to toggle debug logging on or off.")
+        print("Type 'save' (and a file name if you like) to save the game. Type 'load' in the menu to carry on with it later.")
+        print("Type 'pause' to stop the clock until you come back.")
+        print("Type 'stats' to see how long each part of the game (generating, revealing, drawing, waiting for you) has taken.")
+        print("Type 'help' at any point to repeat this message.")
+
+    def difficulty_input(self):
+        """ This is a function that takes the player's input for the difficulty level.  \n
+        It will set the self.difficulty attribute and then unpack difficulty_dict values. Or take player's input for custom mode.
+        Then it sets self.width, self.height, and self.num_mines. """
+
+        logging.debug("\033[33m Difficulty input initiated. \033[0m")
+        best_times = self.leaderboard.menu_lines()                              ## a few index lookups, however many games there are
+        if best_times:
+            print("Best times: ")
+            for line in best_times:
+                print(line)
+            print()
+        print("Available difficulty presets (You can change these in the code really easily):")
+        for item in self.difficulty_dict:
+            logging.debug("\033[33m %s : %s \033[0m", item, self.difficulty_dict[item])
+                                
+        for option in self.difficulty_dict:                                     ## This section is here so that it will dynamically update
+            if option != "C" and option != "U":                                 ## the difficulty presets in the game menu if you change them.
+                print(f"{option}: {self.difficulty_dict[option][3]}: ", end="")                             ## index 3 is display name
+                print(f"{self.difficulty_dict[option][0]} by {self.difficulty_dict[option][1]} ", end="")   ## 0 is width, 1 is height
+                print(f"with {self.difficulty_dict[option][2]} mines.", end="")                             ## index 2 is number of mines
+                print(f"   |  {option}")
+            if option == "C":
+                print(f"C: CUSTOM:  Choose your own settings.  enter:  C")
+            if option == "U":
+                print(f"U: UNLIMITED:  For hardcore testing. Use at your own risk.")
+        print("Or type 'load' (and a file name) to carry on with a saved game.")
+
+        while True:
+            logging.debug("\033[33m Difficulty input loop initiated. \033[0m")
+            typed_input = input("Enter difficulty level: ")
+            user_input = typed_input.upper()
+
+            if user_input in self.difficulty_dict:                              ## If the user input is in the dictionary,
+                self.difficulty_setting = self.difficulty_dict[user_input][3]   ## set the difficulty setting to its name (index 3)
+                ## If its in the dictionary then proceed with setup:                                                         ## return "NOQUIT" to continue the game
+                if self.difficulty_setting == "CUSTOM":
+                    print("You have chosen CUSTOM")                             ## If the difficulty is custom,                
+                    ## CUSTOM DIFFICULTY                                     
+                    try:
+                        self.width = int(input("Enter width (NO LIMIT): "))     ## columns past Z go on like a spreadsheet (AA, AB ...), same as UNLIMITED
+                        if self.width < 3:                                      ## width cannot be less than 3
+                            print("Invalid input. Width cannot be less than 3.")
                             continue
-                        if cell.is_flagged:                              ## if the cell is already flagged:
-                            cell.is_flagged = False                      ## remove the flag
-                            self.mines_remaining += 1                    ## updates the number of mines remaining in the display
-                            logging.debug(f"\033[33m Flag removed. Mines remaining: {self.mines_remaining} \033[0m")
-                            return "NOHIT", "NOQUIT"
-                        if not cell.is_flagged:
-                            cell.is_flagged = True
-                            self.mines_remaining -= 1
-                            logging.debug(f"\033[33m Flag added. Mines remaining: {self.mines_remaining} \033[0m")
-                            return "NOHIT", "NOQUIT"
-                    else:
-                        logging.debug(f"\033[33m User attempted invalid move \033[0m")
-                        print("Invalid input. Please enter a valid move.")
+                        self.height = int(input("Enter height: (MAX 26): "))    ## Technically I'm less limited with the height but I like symmetry
+                        if self.height > 26 or self.height < 3:                 ## height cannot be less than 3 or greater than 26
+                            print("Invalid input. Height cannot be less than 3 or exceed 26.")
+                            continue
+                        self.num_mines = int(input("Enter number of mines: "))
+                        if self.num_mines > self.width * self.height or self.num_mines < 1:
+                            print("Invalid input. Number of mines cannot exceed the number of cells or be less than 1.")
+                            continue
+                        return "NOQUIT"                        
+                    except ValueError:
+                        logging.debug("\033[33m ValueError triggered \033[0m")
+                        print("Invalid input. Please enter a valid integer.")
                         continue
-
-                ## NORMAL MODE SECTION
-                elif user_input in move_dict:                                   ## If the user input is in the move dictionary,
-                    x, y = move_dict[user_input]                                ## unpacks the tuple (x, y) from the dictionary at that key
-                    cell = active_grid.grid_matrix[y][x]                        ## create link to the cell object in the grid
-                    logging.debug(f"\033[33m Move found    x: {x} | y: {y} \033[0m")
-                    logging.debug(f"\033[33m Cell is mine: {cell.is_mine} \033[0m")
-                    logging.debug(f"\033[33m Cell is revealed: {cell.is_revealed} \033[0m")
-                    logging.debug(f"\033[33m Cell is flagged: {cell.is_flagged} \033[0m")
-                    if cell.is_flagged:                                         ## Can't check a cell that's flagged
-                        logging.debug(f"\033[33m Tried to check flagged cell \033[0m")
-                        print("Cell is flagged. Remove the flag first.")
+                elif self.difficulty_setting == "UNLIMITED":
+                    ## I have tested this WORKING at 1000 x 1000 grid with 10 mines! Whether it will go beyond that, who knows.
+                    print("You have chosen the UNLIMITED difficulty. Note this is not intended for playing.")
+                    print("Columns past Z keep going like a spreadsheet: AA, AB ... AZ, BA and so on.")
+                    try:
+                        self.width = int(input("Enter width (NO LIMIT): "))       ## We are playing with fire
+                        if self.width < 1:                                        ## width cannot be less than 1
+                            print("Invalid input. Width cannot be less than 1")
+                            continue
+                        self.height = int(input("Enter height: (NO LIMIT): "))
+                        if self.height < 1:                         
+                            print("Invalid input. Height cannot be less than 1")
+                            continue
+                        self.num_mines = int(input("Enter number of mines: "))
+                        if self.num_mines > self.width * self.height or self.num_mines < 1:
+                            print("Invalid input. Number of mines cannot exceed the number of cells or be less than 1.")
+                            continue
+                        return "NOQUIT"                        
+                    except ValueError:
+                        logging.debug("\033[33m ValueError triggered \033[0m")
+                        print("Invalid input. Please enter a valid integer.")
                         continue
-                    else:
-                        if cell.is_mine:
-                            active_grid.reveal_toggle_func("GAME")              ## If you step on a mine this returns "HIT" and reveals the grid
-                            return "HIT", "NOQUIT"                              ## The second value is for the quit request
-                        elif cell.is_revealed:
-                            logging.debug(f"special reveal initiated")
-                            special_rev_result = active_grid.special_reveal(x, y)   ## If you click on a revealed cell, it activates special reveal
-                            if special_rev_result == "HIT":                         ## If you hit a mine, return "HIT" to end the game
-                                active_grid.reveal_toggle_func("GAME")              ## If you step on a mine this returns "HIT" and reveals the grid
-                                logging.debug(f"\033[33m Hit Mine: {special_rev_result} \033[0m")
-                                return "HIT", "NOQUIT"
-                            else:
-                                return "NOHIT", "NOQUIT"                            ## "NOHIT", "NOQUIT" = didn't step on a mine, didn't quit
-                        else:
-                            logging.debug(f"cluster reveal initiated")
-                            active_grid.cluster_reveal(x, y)                    ## Trigger the cluster reveal function
-                            return "NOHIT", "NOQUIT"                            ## "NOHIT", "NOQUIT" = didn't step on a mine, didn't quit
-
-                ## OTHER OPTIONS
-                elif user_input == "REVEAL":                                ## Toggles the reveal mode
-                    active_grid.reveal_toggle_func("REVEAL")
-                    return "NOHIT", "NOQUIT"                                
-                elif user_input == "RESET" or user_input == "RESTART" or user_input == "EXIT" or user_input == "QUIT":
-                    return "NOHIT", "QUIT"                                  ## second value "QUIT" is for the quit request
-                elif user_input == "HELP":
-                    self.minesweeper_help()
+                else:                                         ## If its in the dictionary but not custom or unlimited, then its one of the presets.
+                    self.width = self.difficulty_dict[user_input][0]            ## index 0 is width
+                    self.height = self.difficulty_dict[user_input][1]           ## index 1 is height
+                    self.num_mines = self.difficulty_dict[user_input][2]        ## index 2 is number of mines
+                    return "NOQUIT"                  
+
+            ## If the user input is not in the difficulty dictionary, then its one of the following:
+            elif user_input == "HELP":
+                self.minesweeper_help()
+                continue
+            elif user_input == "LOAD" or user_input.startswith("LOAD "):   ## Loads a saved game, e.g. 'load' or 'load big_game.msw'
+                path = typed_input.strip()[4:].strip() or DEFAULT_SAVE_FILE
+                try:
+                    grid, elapsed = self.engine.load_game(path)
+                except (OSError, ValueError, struct.error) as error:
+                    print(f"Couldn't load {path}: {error}")
                     continue
-                elif user_input == "DEBUG":
-                    if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
-                        logging.getLogger().setLevel(logging.INFO)
-                        print("DEBUG logging turned off.")
-                    else:
-                        logging.getLogger().setLevel(logging.DEBUG)
-                        print("DEBUG should be turned on.")
-                        logging.debug(f"\033[33m DEBUG logging turned on. \033[0m")
+                self.width, self.height, self.num_mines = grid.width, grid.height, grid.num_mines
+                self.difficulty_setting = grid.difficulty
+                print(f"Loaded {path}: {grid.difficulty}, {grid.width} by {grid.height} with {grid.num_mines} mines.")
+                return "LOAD"
+            elif user_input == "EXIT" or user_input == "QUIT":
+                logging.debug("\033[33m User has requested to quit the game. \033[0m")
+                return "QUIT"
+            elif user_input == "RESET" or user_input == "RESTART":
+                print("The game hasn't started, there's nothing to reset. You can quit or exit though.")
+            elif user_input == "REVEAL":
+                print("You can't reveal the grid before the game starts. Use it during the game.")
+                continue
+            elif user_input == "DEBUG":
+                if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
+                    logging.getLogger().setLevel(logging.INFO)
+                    print("DEBUG logging turned off.")
+                else:
+                    logging.getLogger().setLevel(logging.DEBUG)
+                    print("DEBUG should be turned on.")
+                    logging.debug("\033[33m DEBUG logging turned on. \033[0m")
+            else:
+                print("Invalid input. Please enter a valid difficulty level.")
+                continue
+
+    def game_imput(self, active_grid):
+        """ This is a function that takes the player's input for the game. Moves are read by the grid's coordinate codec
+        and then handed to the game engine, which does the actual game logic. """
+
+        while True:
+            logging.debug("\033[33m Game input loop initiated. \033[0m")
+            with self.engine.instrumentation.phase("input_wait"):
+                typed_input = self.read_move("Enter move or -f (move): ")
+            user_input = typed_input.upper()                          ## typed_input keeps the case, for file names
+            move = active_grid.parse_move(user_input)                ## (x, y) if the input is a move, otherwise None
+            moves, bad_moves = Coordinate_Codec_Class.parse_line(user_input, active_grid.width, active_grid.height)
+
+            ## MANY MOVES SECTION
+            if len(moves) > 1 and not bad_moves:                     ## e.g. "a1 b2 -f c3", played with no drawing in between
+                status, played, invalid = self.engine.play_moves(moves)
+                logging.debug("\033[33m Played %s of %s moves: %s \033[0m", played, len(moves), status)
+                for (_, x, y), message in invalid:                   ## e.g. a flagged cell, the other moves still count
+                    print(f"{Coordinate_Codec_Class.format(x, y)}: {message}")
+                if active_grid.viewport:
+                    active_grid.center_view(*moves[played - 1][1:])  ## the last move that was played
+                return status, "NOQUIT"
+
+            ## FLAG MODE SECTION
+            if user_input.startswith("-F "):                         ## This first section is for flag mode
+                logging.debug("\033[33m Flag mode initiated. \033[0m")
+                flag_move = active_grid.parse_move(user_input[3:])
+                if flag_move is not None:
+                    x, y = flag_move                                 ## unpacks the tuple (x, y) from the codec
+                    logging.debug("\033[33m Flag move found    x: %s | y: %s \033[0m", x, y)
+                    if active_grid.viewport:
+                        active_grid.center_view(x, y)                ## keep the last move in the middle of the screen
+                    result = self.engine.flag(x, y)                  ## the engine does the actual flagging
+                    logging.debug("\033[33m %s \033[0m", result)
+                    if result.status == "INVALID":
+                        print(result.message)
+                        continue
+                    return result.status, "NOQUIT"
                 else:
-                    logging.debug(f"\033[33m User attempted invalid move \033[0m")
+                    logging.debug("\033[33m User attempted invalid move \033[0m")
                     print("Invalid input. Please enter a valid move.")
                     continue
-    ##################################################################    
-    ###### MAIN GAME ######
 
-    class Main_Game_Class:
+            ## NORMAL MODE SECTION
+            elif move is not None:                                          ## If the user input is a move on the board,
+                x, y = move                                                 ## unpacks the tuple (x, y) from the codec
+                logging.debug("\033[33m Move found    x: %s | y: %s \033[0m", x, y)
+                if active_grid.viewport:
+                    active_grid.center_view(x, y)                           ## keep the last move in the middle of the screen
+                result = self.engine.reveal(x, y)                           ## cluster reveal, or special reveal if the cell is already revealed
+                logging.debug("\033[33m %s \033[0m", result)
+                if result.status == "INVALID":                              ## e.g. the cell is flagged
+                    print(result.message)
+                    continue
+                return result.status, "NOQUIT"                              ## "HIT", "WIN" or "NOHIT". The second value is for the quit request
 
-        def __init__(self, game_manager):
-            self.game_manager = game_manager
-            self.active_grid = None
-            self.timer = 0
-            
-        def internal_timer(self):
+            ## OTHER OPTIONS
+            elif user_input == "REVEAL":                                ## Toggles the reveal mode
+                self.engine.toggle_reveal()
+                return "NOHIT", "NOQUIT"                                
+            elif user_input == "RESET" or user_input == "RESTART" or user_input == "EXIT" or user_input == "QUIT":
+                return "NOHIT", "QUIT"                                  ## second value "QUIT" is for the quit request
+            elif user_input == "AUTO":                                  ## Toggles auto-chord
+                self.engine.toggle_auto_chord()
+                print(f"Auto-chord turned {'on' if self.engine.auto_chord else 'off'}.")
+                continue
+            elif user_input == "VIEW":                                  ## Toggles the viewport
+                active_grid.viewport = not active_grid.viewport
+                print(f"Viewport turned {'on' if active_grid.viewport else 'off'}.")
+                return "NOHIT", "NOQUIT"
+            elif user_input == "PAN" or user_input.startswith("PAN "):  ## Moves the viewport, e.g. 'pan r' or 'pan d 20'
+                if not active_grid.viewport:
+                    print("The viewport is off. Type 'view' to turn it on.")
+                    continue
+                pan_args = user_input.split()
+                if len(pan_args) not in (2, 3) or pan_args[1] not in PAN_DIRECTIONS:
+                    print("Invalid input. Use 'pan' followed by u, d, l or r and an optional number. (e.g. 'pan r', 'pan d 20')")
+                    continue
+                dx, dy = PAN_DIRECTIONS[pan_args[1]]
+                if len(pan_args) == 3:
+                    if not pan_args[2].isdigit():
+                        print("Invalid input. The pan distance has to be a number.")
+                        continue
+                    distance = int(pan_args[2])
+                else:                                                   ## By default pan half a screen
+                    view_width, view_height = active_grid.viewport_size()
+                    distance = max(1, (view_width if dx else view_height) // 2)
+                active_grid.pan_view(dx * distance, dy * distance)
+                return "NOHIT", "NOQUIT"
+            elif user_input.startswith("GOTO "):                        ## Centres the viewport on a cell, e.g. 'goto c12'
+                goto_move = active_grid.parse_move(user_input[5:])
+                if not active_grid.viewport:
+                    print("The viewport is off. Type 'view' to turn it on.")
+                    continue
+                if goto_move is None:
+                    print("Invalid input. Please enter a valid move after 'goto'.")
+                    continue
+                active_grid.center_view(*goto_move)
+                return "NOHIT", "NOQUIT"
+            elif user_input == "HINT":                                  ## Shows the chance of a mine on every hidden cell
+                if self.engine.game_over or active_grid.reveal_toggle:
+                    print("Hints aren't available while the board is revealed.")
+                    continue
+                if self.probability_engine is None:
+                    from minesweeper_solver import Probability_Engine_Class  ## only loaded if the player actually asks for a hint
+                    self.probability_engine = Probability_Engine_Class()
+                hint = self.probability_engine.hint(self.engine)
+                logging.debug("\033[33m Hint: %s frontier cells | Components counted: %s | Cached: %s \033[0m",
+                              len(hint.probabilities), self.probability_engine.counted, len(self.probability_engine.cache))
+                if not hint.consistent:
+                    print("The numbers don't add up with the flags that are down. At least one flag must be wrong.")
+                    continue
+                overlay, other_text = self.probability_engine.overlay(hint)
+                active_grid.display_overlay(overlay, other_text)
+                x0, y0, x1, y1, _ = active_grid.view_window()
+                safest = self.probability_engine.safest_move(active_grid, hint, (x0, y0, x1, y1))
+                if safest is not None:
+                    print(f"Safest move: {self.probability_engine.describe(*safest)}")
+                if hint.estimated:
+                    print("Some of these chances are estimates, the board was too big to count exactly.")
+                continue
+            elif user_input == "SAVE" or user_input.startswith("SAVE "):  ## Saves the game to a file, e.g. 'save' or 'save big_game.msw'
+                path = typed_input.strip()[4:].strip() or DEFAULT_SAVE_FILE
+                try:
+                    size = self.engine.save_game(path)          ## the elapsed time comes from the engine's clock
+                except OSError as error:
+                    print(f"Couldn't save the game: {error}")
+                    continue
+                print(f"Game saved to {path} ({size} bytes). Type 'load {path}' in the menu to carry on later.")
+                continue
+            elif user_input == "PAUSE":                                 ## Stops the clock until the player comes back
+                self.engine.clock.pause()
+                self.read_move("Paused. Press enter to carry on: ")
+                self.engine.clock.resume()
+                continue
+            elif user_input == "STATS":                                 ## Shows the instrumentation counters and timers
+                print("\n".join(self.engine.instrumentation.report()))
+                if self.board_pool is not None:
+                    print("\n".join(self.board_pool.report()))
+                print("\n".join(Memory_Report_Class.lines(self.memory_report())))
+                continue
+            elif user_input == "HELP":
+                self.minesweeper_help()
+                continue
+            elif user_input == "DEBUG":
+                if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
+                    logging.getLogger().setLevel(logging.INFO)
+                    print("DEBUG logging turned off.")
+                else:
+                    logging.getLogger().setLevel(logging.DEBUG)
+                    print("DEBUG should be turned on.")
+                    logging.debug("\033[33m DEBUG logging turned on. \033[0m")
+            else:
+                logging.debug("\033[33m User attempted invalid move \033[0m")
+                print("Invalid input. Please enter a valid move.")
+                continue
 
-            while True:
-                self.timer += 1
-                time.sleep(1)
+##################################################################
 
-        def setup_game(self):
+###### MAIN GAME ######
 
-            quit_request = self.game_manager.difficulty_input()                       ## Initializes the difficulty settings
-            if quit_request == "QUIT":                                                ## If the player quits during the difficulty input,
-                return "QUIT"                                                         ## exit the game loop
-            width = self.game_manager.width                                           ## Unpacks the width, height, and number of mines
-            height = self.game_manager.height
-            num_mines = self.game_manager.num_mines
-            difficulty = self.game_manager.difficulty_setting
+class Main_Game_Class:
 
-            logging.debug(f"\033[33m Width: {width} | Height: {height} | Num Mines: {num_mines} | Difficulty: {difficulty} \033[0m")
-        
-            self.active_grid = Grid_Class(width, height, num_mines, difficulty)    ## Creates the grid object with the difficulty settings
+    def __init__(self, game_manager):
+        self.game_manager = game_manager
+        self.active_grid = None
 
-            logging.debug(f"\033[33m Grid created. Active grid object: \033[0m")
-            logging.debug(self.active_grid)
-            logging.debug(f"{self.active_grid.width} {self.active_grid.height} {self.active_grid.num_mines} {self.active_grid.difficulty}")
-            logging.debug(f"\033[33m Mines remaining: {self.game_manager.mines_remaining} \033[0m")
+    def setup_game(self):
 
+        if JOURNAL_DIR:                                                           ## every game gets its own move journal
+            try:
+                self.game_manager.engine.journal = Move_Journal_Class.in_directory(JOURNAL_DIR)
+            except OSError as error:
+                print(f"Couldn't start the move journal: {error}")
+        seed = None
+        if self.game_manager.settings is not None:                                ## the board came from the command line, so no menu
+            (self.game_manager.width, self.game_manager.height, self.game_manager.num_mines,
+             self.game_manager.difficulty_setting, seed) = self.game_manager.settings
+        else:
+            quit_request = self.game_manager.difficulty_input()                   ## Initializes the difficulty settings
+            if quit_request == "QUIT":                                            ## If the player quits during the difficulty input,
+                return "QUIT"                                                     ## exit the game loop
+            if quit_request == "LOAD":                                            ## A saved game was loaded, so there's no grid to make
+                self.active_grid = self.game_manager.engine.grid                  ## the engine's clock carries on from the saved time
+                return "NOQUIT"
+        width = self.game_manager.width                                           ## Unpacks the width, height, and number of mines
+        height = self.game_manager.height
+        num_mines = self.game_manager.num_mines
+        difficulty = self.game_manager.difficulty_setting
 
-        def run_counter_thread(self):
-            count_thread = threading.Thread(target=self.internal_timer)    ## Creates the internal_timer thread
-            count_thread.daemon = True    # daemon is a boolean value. If it is True, the thread will be terminated when the main program ends.
-            count_thread.start()
+        logging.debug("\033[33m Width: %s | Height: %s | Num Mines: %s | Difficulty: %s \033[0m", width, height, num_mines, difficulty)
+    
+        engine = self.game_manager.engine
+        board = None
+        if seed is None and self.game_manager.board_pool is not None and difficulty not in ("CUSTOM", "UNLIMITED"):
+            board = self.game_manager.board_pool.take(width, height, num_mines)   ## (seed, x, y) of a no-guess board, if one is ready
+        if board is not None:
+            seed, start_x, start_y = board
+            self.active_grid = engine.new_game(width, height, num_mines, seed=seed, difficulty=difficulty)
+            engine.reveal(start_x, start_y)                                       ## the board is only no-guess from this square
+            print(f"No-guess board: it starts opened at {Coordinate_Codec_Class.format(start_x, start_y)}"
+                  " and can be solved without guessing.")
+        else:
+            self.active_grid = engine.new_game(width, height, num_mines, seed=seed, difficulty=difficulty)   ## Creates the grid object
 
-            logging.debug(f"\033[33m timer thread = {count_thread} \033[0m")
-            logging.debug(f"\033[33m count_thread.is_alive() = {count_thread.is_alive()} \033[0m")
+        logging.debug("\033[33m Grid created. Active grid object: \033[0m")
+        logging.debug(self.active_grid)
+        logging.debug("%s %s %s %s", self.active_grid.width, self.active_grid.height, self.active_grid.num_mines, self.active_grid.difficulty)
+        logging.debug("\033[33m Mines remaining: %s \033[0m", self.game_manager.mines_remaining)
 
-        def display_game_screen(self):
 
-            print(f"\n Mines remaining: {self.game_manager.mines_remaining} | Time elapsed: {self.timer} seconds")
-            logging.debug(f"Mines remaining: {self.game_manager.mines_remaining} | Time elapsed: {self.timer} seconds")
-            self.active_grid.display(self.game_manager.mines_remaining)               ## Display the grid
-                
-        ## THIS IS THE GAME LOOP ##
-        def game_loop(self):
-                        
-            while True:
-                self.display_game_screen()                                            ## Display the game screen
-                try:
-                    logging.debug(f"Active grid size in bytes: {self.active_grid.size_bytes}")
-                    hit_mine, quit_request = self.game_manager.game_imput(self.active_grid, self.active_grid.move_dict)
-                    logging.debug(f"\033[33m Hit Mine: {hit_mine} | Quit Request: {quit_request} \033[0m")
-                    if quit_request == "QUIT":                                        ## if there is a quit request,
-                        return None, None                                             ## exit the game loop
-                    if hit_mine == "HIT":                                             ## if the player hits a mine,
-                        self.active_grid.display(self.game_manager.mines_remaining)   ## If you lose then display the revealed grid
-                        print("\033[1;31m You hit a mine! Game over. \033[0m")        ## ANSI ON BOLD RED1
-                        return None, None
-                    elif self.active_grid.check_win():                                ## Check the win condition every loop
-                        self.active_grid.display(self.game_manager.mines_remaining)   ## If you win then display the revealed grid
-                        print("\033[1;32m You win! Congratulations! \033[0m")         ## ANSI ON BOLD GREEN
-                        print(f"Time elapsed: {self.timer} seconds")
-                        return self.timer, self.game_manager.difficulty_setting
-                except:
-                    print("Error, game loop interrupted. Exiting...")
-                    return
+    def display_game_screen(self):
+
+        status = self.game_manager.status_text()
+        print(f"\n{status}")
+        if self.game_manager.live_input is not None:
+            self.game_manager.live_input.status_printed()                         ## the live clock rewrites this line later
+        logging.debug("%s", status)
+        self.display_grid()
+
+    def display_grid(self):
+        """ This is a method that draws the grid, timed as the render phase. """
+        with self.game_manager.engine.instrumentation.phase("render"):
+            self.active_grid.display(self.game_manager.mines_remaining)           ## Display the grid
+            
+    ## THIS IS THE GAME LOOP ##
+    def game_loop(self):
+                    
+        while True:
+            self.display_game_screen()                                            ## Display the game screen
+            try:
+                hit_mine, quit_request = self.game_manager.game_imput(self.active_grid)
+                logging.debug("\033[33m Hit Mine: %s | Quit Request: %s \033[0m", hit_mine, quit_request)
+                if quit_request == "QUIT":                                        ## if there is a quit request,
+                    return None, None                                             ## exit the game loop
+                if hit_mine == "HIT":                                             ## if the player hits a mine,
+                    self.display_grid()                                           ## If you lose then display the revealed grid
+                    print("\033[1;31m You hit a mine! Game over. \033[0m")        ## ANSI ON BOLD RED1
+                    return None, None
+                elif hit_mine == "WIN":                                           ## The engine checks the win condition after every move
+                    self.display_grid()                                           ## If you win then display the revealed grid
+                    print("\033[1;32m You win! Congratulations! \033[0m")         ## ANSI ON BOLD GREEN
+                    elapsed = round(self.game_manager.elapsed_seconds(), 2)      ## the engine stopped the clock on the win
+                    print(f"Time elapsed: {elapsed} seconds")
+                    return elapsed, self.game_manager.difficulty_setting
+            except:
+                print("Error, game loop interrupted. Exiting...")
+                return None, None
 
-    ## EXTERNAL GAME LOOP FUCNTION ##
+## EXTERNAL GAME LOOP FUCNTION ##
 
-    def external_loop(logger_level_string):
-        """ This is the external game loop function. It creates the game manager and handles starting and restarting the game.  \n
-        In the future this can be modified to remember the player's name, score and other things across rounds. """
+def external_loop(logger_level_string, settings=None, quiet=False, no_guess=NO_GUESS_BOARDS):
+    """ This is the external game loop function. It creates the game manager and handles starting and restarting the game.  \n
+    settings (width, height, mines, difficulty, seed) skips the difficulty menu, and quiet leaves out the welcome and
+    goodbye messages. no_guess turns on the no-guess board pool (never with quiet). In the future this can be modified
+    to remember the player's name, score and other things across rounds. """
 
+    if not quiet:
         print("\033[33m", end="")    ## ANSI ON YELLOW
         logging.debug("DEBUG logging is ON.")
         logging.debug("Type anything to continue in DEBUG, or type 'off' to turn off DEBUG logging")
         logging.debug("You can also type 'debug' or 'DEBUG' at any point to toggle DEBUG logging on or off.")
-        if logger_level_string == log_level_dictionary["DEBUG"]:
+        if logger_level_string == logging.DEBUG and sys.stdin.isatty():     ## a script piping moves in can't answer this
             debug_input = input("Enter 'off' to turn off, anything else continues: ").upper()
             if debug_input == "OFF" or debug_input == "DEBUG":
                 logging.getLogger().setLevel(logging.INFO)
@@ -601,25 +2932,156 @@ def minesweeper():
         print("\n Minesweeper initiated. \n Type 'help' at any point for instructions.", end="")
         print("\033[0m")               ## RESET ANSI
 
-        previous_times = []    ## This is a list that will store the times of each game played         
-        while True:                                                         ## This is the external loop that restarts the game
-            
-            game_manager = Game_Manager_Class(previous_times)               ## pass the previous times into the game manager to display them                              
-            main_game = Main_Game_Class(game_manager)                       ## pass game manager into the main game class
-            quit_request = main_game.setup_game()                           ## Runs the game setup
-            if quit_request == "QUIT":                                      ## checks for quit request in the menu
-                break         
-            main_game.run_counter_thread()                                  ## starts the timer thread
-            time, difficulty = main_game.game_loop()                        ## Runs the main game loop
-            if time is not None and difficulty is not None:                 ## If the game is won, add the time and difficulty to the list
-                previous_times.append((time, difficulty)) 
-            if game_manager.play_again():                                   ## Runs the play again function
-                continue                                   
-            else:
-                break
+    leaderboard = Leaderboard_Class(LEADERBOARD_FILE)                   ## every win, kept on disk between sessions
+    instrumentation = Instrumentation_Class()                           ## one set of counters and timers for the whole session
+    live_input = Live_Input_Class() if LIVE_CLOCK and Live_Input_Class.available() else None
+    if live_input is not None:
+        live_input.attach()                                             ## counts the lines printed, so it can find the status line
+    board_pool = None
+    if no_guess and not quiet:
+        from minesweeper_boards import Board_Pool_Class                 ## only loaded if no-guess boards are on
+        board_pool = Board_Pool_Class(workers=NO_GUESS_WORKERS)         ## the workers only start once a preset is picked
+    try:
+        session_loop(leaderboard, instrumentation, live_input, board_pool, settings)
+    finally:
+        leaderboard.close()                                             ## writes any wins that are still queued
+        if live_input is not None:
+            live_input.detach()
+        if board_pool is not None:
+            board_pool.close()                                          ## what's left in the pool is saved for next time
+    if STATS_FILE:
+        instrumentation.dump(STATS_FILE)                                ## save the counters and timers for later
+        if not quiet:
+            print(f"Stats saved to {STATS_FILE}")
+    if not quiet:
         print("Goodbye!")
 
-    external_loop(logger_level_string)                                      ## Last line at the bottom runs the external loop function
+def session_loop(leaderboard, instrumentation, live_input, board_pool, settings=None):
+    """ This is the loop that plays games until the player stops. There's no timer thread, the engine's clock works the
+    time out when it's asked, so nothing is left running between games.  \n
+    With settings from the command line every game uses that board, but only the first one uses the seed. """
+    while True:                                                         ## This is the external loop that restarts the game
+        
+        game_manager = Game_Manager_Class(leaderboard, instrumentation, live_input, board_pool, settings)   ## pass the leaderboard into the game manager to display it
+        main_game = Main_Game_Class(game_manager)                       ## pass game manager into the main game class
+        quit_request = main_game.setup_game()                           ## Runs the game setup
+        if quit_request == "QUIT":                                      ## checks for quit request in the menu
+            break         
+        time, difficulty = main_game.game_loop()                        ## Runs the main game loop
+        game_manager.engine.close_journal()                             ## the last journal line has the final state of the board
+        instrumentation.memory = game_manager.memory_report()           ## the stats file gets the memory of the last game
+        if time is not None and difficulty is not None:                 ## If the game is won, add the time to the leaderboard
+            grid = game_manager.engine.grid
+            board = (difficulty, grid.width, grid.height, grid.num_mines)
+            rank = leaderboard.rank(*board, time)                       ## worked out before it's queued, nothing waits on the writer
+            leaderboard.record(*board, time, grid.seed)                 ## the writer thread saves it in the background
+            print(f"That's #{rank} on the {difficulty} leaderboard.")
+        if settings is not None:
+            settings = settings[:4] + (None,)                           ## the next game gets a new board
+        if game_manager.play_again():                                   ## Runs the play again function
+            continue                                   
+        else:
+            break
+
+##################################################################
+
+###### COMMAND LINE ######
+
+def board_settings(parser, args):
+    """ This works out (width, height, mines, difficulty, seed) from the command line, or None if no board was asked for
+    (then the game shows the difficulty menu like always). --batch has no menu, so it plays EASY if no board was asked for.
+    A preset gives the size and the mines, and --size or --mines change them, which makes the board CUSTOM. UNLIMITED (U)
+    and CUSTOM (C) need both. Bad values end it with parser.error. """
+    if args.difficulty is None and args.size is None and args.mines is None:
+        if args.batch:
+            args.difficulty = "E"                                   ## applied before the checks below, so --seed works on its own
+        elif args.seed is not None:
+            parser.error("--seed needs a board. Give --difficulty, or --size and --mines.")
+        else:
+            return None
+    key = "C"
+    if args.difficulty is not None:
+        names = {preset[3]: option for option, preset in DIFFICULTY_PRESETS.items()}
+        key = args.difficulty.upper()
+        key = names.get(key, key)                                   ## the name ("HARD") works as well as the letter ("H")
+        if key not in DIFFICULTY_PRESETS:
+            parser.error(f"--difficulty has to be one of {', '.join(DIFFICULTY_PRESETS)}.")
+    width, height, num_mines, difficulty = DIFFICULTY_PRESETS[key]
+    if args.size is not None:
+        try:
+            width, height = (int(part) for part in args.size.upper().split("X"))
+        except ValueError:
+            parser.error("--size has to be <width>x<height>, e.g. 30x16.")
+    if args.mines is not None:
+        num_mines = args.mines
+    if difficulty != "UNLIMITED" and (width, height, num_mines) != tuple(DIFFICULTY_PRESETS[key][:3]):
+        difficulty = "CUSTOM"
+    if not num_mines:
+        parser.error(f"{difficulty} needs --size and --mines.")
+    if difficulty == "CUSTOM" and not (3 <= width and 3 <= height <= 26):
+        parser.error("CUSTOM boards are at least 3 wide and 3 to 26 high. Use --difficulty U for taller ones.")
+    if width < 1 or height < 1:
+        parser.error("Width and height cannot be less than 1.")
+    if not 1 <= num_mines < width * height:
+        parser.error("There has to be at least one mine and at least one safe square.")
+    return width, height, num_mines, difficulty, args.seed
+
+def batch_game(settings, lines, quiet=False):
+    """ This is the batch mode. It plays every move in lines (sys.stdin, or any list of strings) on one board, as many
+    moves to a line as you like ("a1 b2 -f c3"), until the moves run out or the game ends. Nothing is drawn until the
+    end, and then the board is drawn once. There's no journal, leaderboard or stats file either, so a script of thousands
+    of moves only costs the moves themselves. Returns the final status ("NOHIT", "HIT" or "WIN"). """
+    width, height, num_mines, difficulty, seed = settings
+    engine = Game_Engine_Class(Instrumentation_Class(enabled=False))
+    grid = engine.new_game(width, height, num_mines, seed=seed, difficulty=difficulty)
+    status, played, skipped = "NOHIT", 0, 0
+    start = time.perf_counter()
+    for line in lines:
+        if engine.game_over:
+            break
+        moves, bad_words = Coordinate_Codec_Class.parse_line(line.upper(), width, height)
+        for word in bad_words:
+            logging.warning("Skipped %r, it isn't a move on this board.", word)
+        if moves:
+            status, used, invalid = engine.play_moves(moves)
+            played += used - len(invalid)
+            for (_, x, y), message in invalid:
+                logging.warning("Skipped %s: %s", Coordinate_Codec_Class.format(x, y), message)
+            skipped += len(invalid)
+        skipped += len(bad_words)
+    seconds = time.perf_counter() - start
+    grid.display(engine.mines_remaining)                            ## the one and only render
+    if not quiet:
+        print(f"{status}: {played} moves played ({skipped} skipped) in {seconds * 1000:.1f} ms on a {width} by {height} "
+              f"board with {grid.num_mines} mines (seed {grid.seed}). Mines remaining: {engine.mines_remaining}")
+    return status
+
+def minesweeper(argv=None):
+    """ This is the entry point. With no arguments it's the normal game with the difficulty menu. Pick a board with
+    --difficulty, --size, --mines and --seed to skip the menu, and add --batch to play moves from stdin without the
+    game screen in between. Returns the exit code. """
+    import argparse                                                 ## only needed here, so importing the module doesn't load it
+    parser = argparse.ArgumentParser(description="Minesweeper for the terminal.")
+    parser.add_argument("--difficulty", "-d", metavar="PRESET",
+                        help="preset letter or name (E, M, H, W, or C and U with --size and --mines), skips the menu")
+    parser.add_argument("--size", metavar="WxH", help="board size, e.g. 30x16 (makes the board CUSTOM unless it's U)")
+    parser.add_argument("--mines", type=int, help="number of mines")
+    parser.add_argument("--seed", type=int, help="board seed, the same seed always gives the same board")
+    parser.add_argument("--quiet", "-q", action="store_true", help="only log warnings, and leave out the welcome and summary messages")
+    parser.add_argument("--no-guess", action="store_true",
+                        help="preset games come from a pool of no-guess boards made by background worker processes")
+    parser.add_argument("--batch", action="store_true",
+                        help="read moves from stdin (any number to a line), play them all and draw the board once at the end")
+    args = parser.parse_args(argv)
+    settings = board_settings(parser, args)
+
+    logger_level = logging.WARNING if args.quiet else LOG_LEVELS[LOG_LEVEL]
+    logging.basicConfig(level=logger_level, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.batch:
+        batch_game(settings, sys.stdin, args.quiet)
+        return 0
+    external_loop(logger_level, settings, args.quiet, args.no_guess or NO_GUESS_BOARDS)
+    return 0
 
 if __name__ == "__main__":
-    minesweeper()
+    sys.exit(minesweeper())
@@ -0,0 +1,496 @@
+""" Benchmark suite for the minesweeper board code.
+
+It times the main parts of Grid_Class on a ladder of board sizes, from the EASY preset up to 4000 by 4000, always with
+the same seeds so runs can be compared. Each benchmark is timed on its own (best of --repeat runs), then run once more
+with tracemalloc on to get the peak memory, because tracemalloc slows everything down and would spoil the timings.
+
+Examples:
+    python minesweeper_benchmark.py                              ## run everything and print the JSON results
+    python minesweeper_benchmark.py --sizes EASY HARD 1000x1000  ## only some of the sizes
+    python minesweeper_benchmark.py --save baseline.json         ## save the results to compare against later
+    python minesweeper_benchmark.py --compare baseline.json      ## flag anything that got slower than the baseline
+    python minesweeper_benchmark.py --verify                     ## check the adjacency counts and the bitboard backend first
+    python minesweeper_benchmark.py --memory --benchmarks construct   ## add a deep memory report of each board size
+"""
+
+import argparse
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from minesweeper2_new import (CHUNK_SIZE, DIFFICULTY_PRESETS, Bitboard_Grid_Class, Chunked_Grid_Class,
+                              Coordinate_Codec_Class, Game_Engine_Class, Grid_Class, Instrumentation_Class)
+
+BENCHMARK_SEED = 12345
+
+SIZE_LADDER = {                             ## name: (width, height, number of mines), starting with the game menu presets
+    name: (width, height, num_mines)
+    for width, height, num_mines, name in DIFFICULTY_PRESETS.values() if num_mines
+}
+SIZE_LADDER.update({
+    "100x100": (100, 100, 1500),            ## The big ones use the same mine density as HARD (about 15%).
+    "1000x1000": (1000, 1000, 150000),
+    "4000x4000": (4000, 4000, 2400000),
+})
+
+SPECIAL_REVEAL_CALLS = 1000                 ## how many chords to time on each board
+CHECK_WIN_CALLS = 10000                     ## how many win checks to time on each board
+PARSE_MOVE_CALLS = 10000                    ## how many moves to parse on each board
+REVEAL_SAFE_TABLE = bytes([1, 0]) + bytes(254)  ## bytes.translate table: no mine -> revealed, mine -> not revealed
+VERIFY_BOARDS = 300                         ## how many random boards --verify plays on both backends
+VERIFY_MINE_MOVES = 20                      ## how many add_mine / remove_mine calls --verify checks on each board
+VERIFY_GAMES = 60                           ## how many seeded games --verify plays on each backend with debug_checks on
+VERIFY_GAME_MOVES = 60                      ## most moves in each of those games
+VERIFY_CHUNKED_BOARDS = 60                  ## how many random boards --verify opens on the chunked backend (bigger than a chunk)
+VERIFY_SOLVER_GAMES = 20                    ## how many games --verify has the solver play on the chunked backend
+
+
+def make_grid(width, height, num_mines):
+    """ Makes a seeded grid. The difficulty name isn't UNLIMITED, so the display draws the whole board. """
+    return Grid_Class(width, height, num_mines, "BENCHMARK", seed=BENCHMARK_SEED)
+
+
+def setup_construct(width, height, num_mines):
+    return lambda: make_grid(width, height, num_mines)
+
+
+def setup_place_mines(width, height, num_mines):
+    grid = make_grid(width, height, num_mines)
+
+    def run():
+        grid.mines[:] = bytes(width * height)       ## empty the board again so every run places the same mines
+        grid.place_mines()
+    return run
+
+
+def setup_surrounding_counter(width, height, num_mines):
+    grid = make_grid(width, height, num_mines)
+    return grid.surrounding_counter
+
+
+def setup_parse_move(width, height, num_mines):
+    moves = [Coordinate_Codec_Class.format(i % width, (i * 7) % height) for i in range(PARSE_MOVE_CALLS)]
+    return lambda: [Coordinate_Codec_Class.parse(move, width, height) for move in moves]
+
+
+def setup_cluster_reveal(width, height, num_mines, grid_class=Grid_Class):
+    """ The worst case for the flood fill is a board with no mines at all, where one click opens every cell. """
+    def run():
+        grid = grid_class(width, height, 0, "BENCHMARK", seed=BENCHMARK_SEED)
+        grid.cluster_reveal(0, 0)
+    return run
+
+
+def setup_cluster_reveal_bitboard(width, height, num_mines):
+    """ The same empty board, opened by the bitboard backend's shift-and-mask flood fill. """
+    return setup_cluster_reveal(width, height, num_mines, Bitboard_Grid_Class)
+
+
+def setup_special_reveal(width, height, num_mines):
+    """ Every mine is flagged and every safe cell is revealed, then numbered cells get chorded. """
+    grid = make_grid(width, height, num_mines)
+    grid.flagged[:] = grid.mines
+    grid.count_adjacent_flags()
+    grid.revealed[:] = grid.mines.translate(REVEAL_SAFE_TABLE)
+    grid.revealed_safe_count = width * height - grid.num_mines
+    numbered = []
+    for index in range(width * height):
+        if grid.adjacent[index] and not grid.mines[index]:
+            numbered.append((index % width, index // width))
+            if len(numbered) == SPECIAL_REVEAL_CALLS:
+                break
+
+    def run():
+        for x, y in numbered:
+            grid.special_reveal(x, y)
+    return run
+
+
+def setup_check_win(width, height, num_mines):
+    grid = make_grid(width, height, num_mines)
+
+    def run():
+        for _ in range(CHECK_WIN_CALLS):
+            grid.check_win()
+    return run
+
+
+def setup_display_full(width, height, num_mines):
+    """ Draws the whole board with nothing cached, into a throwaway buffer. """
+    grid = make_grid(width, height, num_mines)
+    grid.cluster_reveal(0, 0)
+
+    def run():
+        grid.row_cache.clear()
+        with redirect_stdout(io.StringIO()):
+            grid.display(num_mines)
+    return run
+
+
+def setup_display_one_change(width, height, num_mines):
+    """ Draws the board again after a single flag, which is the common case during a game. """
+    grid = make_grid(width, height, num_mines)
+    with redirect_stdout(io.StringIO()):
+        grid.display(num_mines)
+
+    def run():
+        grid.set_flagged(0, not grid.flagged[0])
+        with redirect_stdout(io.StringIO()):
+            grid.display(num_mines)
+    return run
+
+
+BENCHMARKS = {                              ## benchmark name: setup function that returns the thing to time
+    "construct": setup_construct,
+    "place_mines": setup_place_mines,
+    "surrounding_counter": setup_surrounding_counter,
+    "parse_move": setup_parse_move,         ## the coordinate codec that replaced create_move_dict
+    "cluster_reveal_empty": setup_cluster_reveal,
+    "cluster_reveal_empty_bitboard": setup_cluster_reveal_bitboard,
+    "special_reveal": setup_special_reveal,
+    "check_win": setup_check_win,
+    "display_full": setup_display_full,
+    "display_one_change": setup_display_one_change,
+}
+
+
+def measure(setup, size, repeat):
+    """ Times one benchmark on one board size. Returns the best time in seconds and the peak memory in bytes. """
+    width, height, num_mines = size
+    best = None
+    for _ in range(repeat):
+        run = setup(width, height, num_mines)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    run = setup(width, height, num_mines)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def verify_backends(boards=VERIFY_BOARDS):
+    """ Differential check of Bitboard_Grid_Class against Grid_Class. Both backends get the same random boards, flags,
+    mine moves and clicks, and after every click the revealed cells, the changed cells and the counters have to match.
+    Returns a list of the seeds that didn't match. """
+    mismatches = []
+    for seed in range(boards):
+        rng = random.Random(seed)
+        width, height = rng.randint(1, 40), rng.randint(1, 40)
+        num_mines = rng.randint(0, width * height // 5)
+        grid = Grid_Class(width, height, num_mines, "BENCHMARK", seed=seed)
+        bitboard = Bitboard_Grid_Class(width, height, num_mines, "BENCHMARK", seed=seed)
+        same = bytes(grid.mines) == bytes(bitboard.mines[:]) and grid.adjacent == bitboard.adjacent
+        for _ in range(rng.randint(1, 8)):
+            if not same:
+                break
+            if rng.random() < 0.3:                  ## the flood fill reveals flagged cells too, so flags have to be in the mix
+                index = rng.randrange(width * height)
+                grid.set_flagged(index, True)
+                bitboard.set_flagged(index, True)
+            x, y = rng.randrange(width), rng.randrange(height)
+            if rng.random() < 0.2:
+                grid.add_mine(x, y)
+                bitboard.add_mine(x, y)
+            elif rng.random() < 0.2:
+                grid.remove_mine(x, y)
+                bitboard.remove_mine(x, y)
+            if not grid.mines[y * width + x]:
+                grid.cluster_reveal(x, y)
+                bitboard.cluster_reveal(x, y)
+            same = (bytes(grid.revealed) == bytes(bitboard.revealed[:])
+                    and grid.take_changed_cells() == bitboard.take_changed_cells()
+                    and (grid.revealed_safe_count, grid.revealed_mine_count)
+                    == (bitboard.revealed_safe_count, bitboard.revealed_mine_count))
+        if not same:
+            mismatches.append(seed)
+    return mismatches
+
+
+def brute_force_counts(layer, width, height):
+    """ The plain 3x3 count of every cell (the cell itself included), worked out neighbour by neighbour. It's what
+    adjacency_counts gives with include_centre, the count the flags use. """
+    counts = bytearray(width * height)
+    for y in range(height):
+        for x in range(width):
+            for dy in range(-1, 2):
+                for dx in range(-1, 2):
+                    new_x, new_y = x + dx, y + dy
+                    if 0 <= new_x < width and 0 <= new_y < height:
+                        counts[y * width + x] += layer[new_y * width + new_x]
+    return counts
+
+
+def verify_adjacency(boards=VERIFY_BOARDS):
+    """ Differential check of the adjacency counts. Grid_Class.verify_adjacent checks the shifted-integer count against the
+    old per-cell loop, and again after every mine that add_mine or remove_mine adds or takes away, and the include_centre
+    count is checked against brute_force_counts. The seeded boards include single rows, single columns, empty boards and
+    fully mined boards, on both backends. Returns a list of the seeds that didn't match. """
+    mismatches = []
+    for seed in range(boards):
+        rng = random.Random(seed)
+        shape = seed % 4
+        if shape == 0:                                  ## one row
+            width, height = rng.randint(1, 60), 1
+        elif shape == 1:                                ## one column
+            width, height = 1, rng.randint(1, 60)
+        else:
+            width, height = rng.randint(1, 30), rng.randint(1, 30)
+        cells = width * height
+        num_mines = rng.choice([0, cells, rng.randint(0, cells)])      ## empty, fully mined, or anything in between
+        try:
+            for grid_class in (Grid_Class, Bitboard_Grid_Class):
+                grid = grid_class(width, height, num_mines, "BENCHMARK", seed=seed)
+                grid.verify_adjacent()
+                mines = bytes(grid.mines[:])
+                assert grid.adjacency_counts(mines, width, height, include_centre=True) == brute_force_counts(mines, width, height)
+                for _ in range(VERIFY_MINE_MOVES):
+                    x, y = rng.randrange(width), rng.randrange(height)
+                    if rng.random() < 0.5:
+                        grid.add_mine(x, y)
+                    else:
+                        grid.remove_mine(x, y)
+                    grid.verify_adjacent()
+        except AssertionError:
+            mismatches.append(seed)
+    return mismatches
+
+
+def verify_counter_games(games=VERIFY_GAMES):
+    """ Plays seeded games through Game_Engine_Class on every backend with Grid_Class.debug_checks on, so every win check
+    compares the live revealed counters with a full recount, and checks them once more after every move (flags and hits
+    don't do a win check). The games mix reveals, chords, right and wrong flags, every first_click mode (so the mine
+    relocation runs) and auto-chord. Returns a list of (backend name, seed, error) for the games that didn't hold up. """
+    failures = []
+    Grid_Class.debug_checks = True
+    try:
+        for grid_class in (Grid_Class, Bitboard_Grid_Class, Chunked_Grid_Class):
+            for seed in range(games):
+                rng = random.Random(seed)
+                width, height = rng.randint(1, 30), rng.randint(1, 30)
+                num_mines = rng.randint(0, width * height - 1)
+                engine = Game_Engine_Class(Instrumentation_Class(enabled=False))
+                engine.first_click = rng.choice(["CELL", "OPENING", None])
+                engine.auto_chord = rng.random() < 0.3
+                grid = engine.new_game(width, height, num_mines, seed=seed, grid_class=grid_class)
+                try:
+                    for _ in range(VERIFY_GAME_MOVES):
+                        if engine.game_over:
+                            break
+                        x, y = rng.randrange(width), rng.randrange(height)
+                        index = y * width + x
+                        roll = rng.random()
+                        if roll < 0.2 or (grid.mines[index] and roll < 0.9):   ## mostly flag the mines, sometimes a safe cell
+                            engine.flag(x, y)
+                        elif roll < 0.35 and engine.numbered_cells:
+                            number = rng.choice(sorted(engine.numbered_cells))
+                            engine.chord(number % width, number // width)
+                        else:
+                            engine.reveal(x, y)
+                        grid.verify_counters()
+                except AssertionError as error:
+                    failures.append((grid_class.__name__, seed, str(error)))
+    finally:
+        Grid_Class.debug_checks = False
+    return failures
+
+
+def flat_copy(chunked):
+    """ Makes a Grid_Class with the same mines as a chunked grid, since the chunked grid places its mines chunk by chunk. """
+    width, height = chunked.width, chunked.height
+    grid = Grid_Class(width, height, 0, "BENCHMARK")
+    for y in range(height):
+        grid.mines[y * width:(y + 1) * width] = chunked.mines[y * width:(y + 1) * width]
+    grid.num_mines = chunked.num_mines
+    grid.surrounding_counter()
+    return grid
+
+
+def verify_chunked(boards=VERIFY_CHUNKED_BOARDS, solver_games=VERIFY_SOLVER_GAMES):
+    """ Differential check of Chunked_Grid_Class against Grid_Class on the same mines. First random flags and clicks on
+    boards a few chunks across, where the revealed cells, the changed cells and the counters have to match after every
+    flood fill. Then the solver plays whole games on both (first-click safety off, since the chunked grid takes mines
+    away instead of moving them), and the result, the moves and the guesses have to match.
+    Returns a list of ("fill" or "solver", seed) for the boards that didn't match. """
+    from minesweeper_solver import Solver_Class
+    mismatches = []
+    for seed in range(boards):
+        rng = random.Random(seed)
+        width, height = rng.randint(1, 200), rng.randint(1, 200)
+        num_mines = rng.randint(0, width * height // rng.choice([3, 8, 30, 1000]))
+        chunked = Chunked_Grid_Class(width, height, num_mines, "UNLIMITED", seed=seed)
+        grid = flat_copy(chunked)
+        same = grid.adjacent == bytes(chunked.adjacent)
+        for _ in range(rng.randint(1, 6)):
+            if not same:
+                break
+            if rng.random() < 0.3:
+                index = rng.randrange(width * height)
+                grid.set_flagged(index, True)
+                chunked.set_flagged(index, True)
+            x, y = rng.randrange(width), rng.randrange(height)
+            if not grid.mines[y * width + x]:
+                grid.cluster_reveal(x, y)
+                chunked.cluster_reveal(x, y)
+            same = (bytes(grid.revealed) == bytes(chunked.revealed)
+                    and grid.take_changed_cells() == chunked.take_changed_cells()
+                    and (grid.revealed_safe_count, grid.revealed_mine_count)
+                    == (chunked.revealed_safe_count, chunked.revealed_mine_count))
+        same = same and sum(chunked.flagged) == chunked.count_flags()     ## iterating a layer has to stop at the end of the board
+        if not same:
+            mismatches.append(("fill", seed))
+    for seed in range(solver_games):
+        rng = random.Random(seed)
+        width, height = rng.randint(CHUNK_SIZE // 2, CHUNK_SIZE + 16), rng.randint(CHUNK_SIZE // 2, CHUNK_SIZE + 16)
+        num_mines = width * height // rng.randint(6, 12)
+        results = []
+        for flat in (False, True):
+            engine = Game_Engine_Class(Instrumentation_Class(enabled=False))
+            engine.first_click = None
+            engine.new_game(width, height, num_mines, seed=seed, difficulty="UNLIMITED")
+            if flat:                                ## the same board as the chunked game, on the normal grid
+                engine.grid = flat_copy(engine.grid)
+            solver = Solver_Class(engine)
+            won = solver.play(start=(height // 2) * width + width // 2)
+            results.append((won, solver.moves, solver.guesses, engine.grid.revealed_safe_count))
+        if results[0] != results[1]:
+            mismatches.append(("solver", seed))
+    return mismatches
+
+
+def memory_reports(size_names):
+    """ Makes each board size once with the setup peaks traced, and gives back its deep memory report (Memory_Report_Class)
+    for both backends, after opening the board with one flood fill and drawing it so the caches are in there too. """
+    reports = {}
+    Grid_Class.trace_setup_memory = True
+    try:
+        for size_name in size_names:
+            width, height, num_mines = SIZE_LADDER[size_name]
+            reports[size_name] = {}
+            for grid_class in (Grid_Class, Bitboard_Grid_Class):
+                grid = grid_class(width, height, num_mines, "BENCHMARK", seed=BENCHMARK_SEED)
+                grid.cluster_reveal(0, 0)
+                with redirect_stdout(io.StringIO()):
+                    grid.display(num_mines)
+                reports[size_name][grid_class.__name__] = grid.memory_report()
+    finally:
+        Grid_Class.trace_setup_memory = False
+    return reports
+
+
+def run_benchmarks(size_names, benchmark_names, repeat):
+    results = {}
+    for size_name in size_names:
+        size = SIZE_LADDER[size_name]
+        results[size_name] = {}
+        for benchmark_name in benchmark_names:
+            seconds, peak_bytes = measure(BENCHMARKS[benchmark_name], size, repeat)
+            results[size_name][benchmark_name] = {"seconds": seconds, "peak_bytes": peak_bytes}
+            print(f"{size_name:>10} {benchmark_name:<30} {seconds:12.6f} s {peak_bytes / 1024:14.1f} KB", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": BENCHMARK_SEED,
+            "repeat": repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "sizes": {name: list(SIZE_LADDER[name]) for name in size_names},
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """ Returns a list of regressions: anything that is more than threshold (e.g. 0.2 = 20%) slower or bigger than the baseline. """
+    regressions = []
+    for size_name, benchmarks in report["results"].items():
+        for benchmark_name, current in benchmarks.items():
+            old = baseline.get("results", {}).get(size_name, {}).get(benchmark_name)
+            if old is None:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                if old[metric] > 0 and current[metric] > old[metric] * (1 + threshold):
+                    regressions.append({
+                        "size": size_name,
+                        "benchmark": benchmark_name,
+                        "metric": metric,
+                        "baseline": old[metric],
+                        "current": current[metric],
+                        "ratio": current[metric] / old[metric],
+                    })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the minesweeper board code.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZE_LADDER), default=list(SIZE_LADDER),
+                        help="board sizes to run (default: all of them)")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help="benchmarks to run (default: all of them)")
+    parser.add_argument("--repeat", type=int, default=3, help="time each benchmark this many times and keep the best (default: 3)")
+    parser.add_argument("--save", metavar="PATH", help="also write the JSON results to this file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline and flag regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="how much slower or bigger counts as a regression, 0.2 means 20%% (default: 0.2)")
+    parser.add_argument("--memory", action="store_true",
+                        help="also report the deep memory of each board size, per part, with the setup peaks")
+    parser.add_argument("--verify", action="store_true",
+                        help="check the adjacency counts and the bitboard backend against the normal grid before timing anything")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        mismatches = verify_adjacency()
+        if mismatches:
+            print(f"VERIFY FAILED: the adjacency counts don't match the brute force count on seeds {mismatches}", file=sys.stderr)
+            return 1
+        print(f"Verified the adjacency counts on {VERIFY_BOARDS} boards.", file=sys.stderr)
+        mismatches = verify_backends()
+        if mismatches:
+            print(f"VERIFY FAILED: the bitboard backend doesn't match on seeds {mismatches}", file=sys.stderr)
+            return 1
+        print(f"Verified the bitboard backend on {VERIFY_BOARDS} boards.", file=sys.stderr)
+        mismatches = verify_chunked()
+        if mismatches:
+            print(f"VERIFY FAILED: the chunked backend doesn't match on {mismatches}", file=sys.stderr)
+            return 1
+        print(f"Verified the chunked backend on {VERIFY_CHUNKED_BOARDS} boards and {VERIFY_SOLVER_GAMES} solver games.", file=sys.stderr)
+        failures = verify_counter_games()
+        if failures:
+            print(f"VERIFY FAILED: the revealed counters went out of sync in {failures}", file=sys.stderr)
+            return 1
+        print(f"Verified the revealed counters in {VERIFY_GAMES} games on each backend.", file=sys.stderr)
+
+    report = run_benchmarks(args.sizes, args.benchmarks, args.repeat)
+    if args.memory:
+        report["memory"] = memory_reports(args.sizes)
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(report, baseline, args.threshold)
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION: {regression['size']} {regression['benchmark']} {regression['metric']} "
+                  f"{regression['baseline']:.6g} -> {regression['current']:.6g} ({regression['ratio']:.2f}x)", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.save:
+        with open(args.save, "w") as save_file:
+            save_file.write(output + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
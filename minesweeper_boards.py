@@ -0,0 +1,248 @@
+""" A pool of no-guess boards, made ahead of time by worker processes.
+
+A no-guess board is a seed plus a starting square. Open the starting square and the rest of the board can be worked out
+with the solver's rules (see Solver_Class in minesweeper_solver.py) without ever having to guess. Checking that means
+playing the whole board with the solver, and most random boards fail, so making one takes a while. That's too slow to
+do while the player waits in the difficulty menu, so Board_Pool_Class keeps a few of each size ready:
+
+    - take() hands out a board straight away if there's one in the pool (a hit), or None if there isn't (a miss,
+      and the game just makes a normal random board).
+    - Whenever a size drops below the pool size, batches of candidate seeds go to a ProcessPoolExecutor, and the boards
+      that pass get added to the pool as the batches finish, in the background. The workers are spawned, not forked,
+      because forking a process that already has threads running isn't safe.
+    - The pool is saved to POOL_FILE (JSON) when it's closed and read again next time, so the first game of the next
+      session is a hit too. It never holds more than pool_size boards of a size, in memory or on disk.
+
+Examples:
+    python minesweeper_boards.py --preset all --boards 50       ## fill the pool file and print the generation throughput
+    python minesweeper_boards.py --preset H --boards 200 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper2_new import DIFFICULTY_PRESETS, Game_Engine_Class
+from minesweeper_solver import Solver_Class
+
+POOL_FILE = "minesweeper_board_pool.json"   ## where the pool is kept between sessions
+POOL_SIZE = 20                              ## most boards kept for each size
+BATCH_CANDIDATES = 25                       ## candidate seeds each worker job tries
+
+
+def no_guess_start(width, height, num_mines, seed):
+    """ Checks one seeded board. Returns the (x, y) of a starting square it can be solved from without guessing, or None.
+    The start is an empty square (so it opens an area), picked by the seed so the same seed always gives the same start. """
+    engine = Game_Engine_Class()
+    grid = engine.new_game(width, height, num_mines, seed=seed)
+    mines, adjacent = grid.mines, grid.adjacent
+    empty = [index for index in range(width * height) if not mines[index] and not adjacent[index]]
+    if not empty:
+        return None
+    start = random.Random(seed).choice(empty)
+    if not Solver_Class(engine).play(start, guessing=False):
+        return None
+    return start % width, start // width
+
+
+def generate_batch(width, height, num_mines, first_seed, candidates=BATCH_CANDIDATES):
+    """ Tries the seeds first_seed, first_seed + 1, ... This is the job each worker process runs.
+    Returns (list of [seed, x, y] boards that passed, candidates tried, seconds it took). """
+    start = time.perf_counter()
+    boards = []
+    for seed in range(first_seed, first_seed + candidates):
+        found = no_guess_start(width, height, num_mines, seed)
+        if found is not None:
+            boards.append([seed, *found])
+    return boards, candidates, time.perf_counter() - start
+
+
+def size_key(width, height, num_mines):
+    return f"{width}x{height}x{num_mines}"
+
+
+class Board_Pool_Class:
+    """ The board pool keeps up to pool_size no-guess boards for each size it's been asked about, and refills itself in
+    the background. The worker results come back on the executor's thread, so everything shared is behind a lock. """
+
+    def __init__(self, sizes=(), pool_size=POOL_SIZE, path=POOL_FILE, workers=None):
+        self.pool_size = pool_size
+        self.path = path
+        self.workers = workers or max(1, (os.cpu_count() or 1) - 1)    ## leave a core for the game itself
+        self.lock = threading.Lock()
+        self.boards = {}                            ## (width, height, mines) -> deque of [seed, x, y]
+        self.in_flight = {}                         ## (width, height, mines) -> candidate batches still being worked on
+        self.executor = None                        ## made the first time a refill is needed
+        self.closed = False
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0                          ## boards that passed
+        self.candidates = 0                         ## seeds tried
+        self.worker_seconds = 0.0                   ## time the workers spent, added up over all of them
+        self.started = time.perf_counter()
+        self.load()
+        for size in sizes:
+            self.boards.setdefault(tuple(size), deque(maxlen=pool_size))
+
+    ###### DISK ######
+
+    def load(self):
+        """ This reads the pool file, if there is one. A broken file just means starting with an empty pool. """
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as pool_file:
+                saved = json.load(pool_file)
+            for key, boards in saved.items():
+                size = tuple(int(part) for part in key.split("x"))
+                self.boards[size] = deque((list(board) for board in boards), maxlen=self.pool_size)
+        except (OSError, ValueError, TypeError):
+            self.boards = {}
+
+    def save(self):
+        """ This writes the pool to the pool file. It writes a new file and swaps it in, so a crash can't leave half a file. """
+        if not self.path:
+            return
+        with self.lock:
+            data = {size_key(*size): list(boards) for size, boards in self.boards.items() if boards}
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as pool_file:
+            json.dump(data, pool_file)
+        os.replace(temporary, self.path)
+
+    ###### BOARDS ######
+
+    def take(self, width, height, num_mines):
+        """ This hands out a no-guess board as (seed, x, y), or None if there isn't one ready. Either way it starts a
+        refill of that size, so the next one should be ready. """
+        size = (width, height, num_mines)
+        with self.lock:
+            boards = self.boards.setdefault(size, deque(maxlen=self.pool_size))
+            board = boards.popleft() if boards else None
+            if board is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self.refill([size])
+        return tuple(board) if board is not None else None
+
+    def refill(self, sizes=None):
+        """ This sends batches of candidates to the workers for every size that's short (or only the ones in sizes),
+        counting the batches already out. """
+        if self.closed:
+            return
+        with self.lock:
+            short = []
+            for size, boards in self.boards.items():
+                if sizes is not None and size not in sizes:
+                    continue
+                missing = self.pool_size - len(boards)
+                if missing > 0 and not self.in_flight.get(size):
+                    short.append(size)
+                    self.in_flight[size] = self.workers         ## one batch per worker for each size at a time
+        if not short:
+            return
+        if self.executor is None:               ## spawn, not fork: the game already has threads running (the leaderboard writer and so on)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        executor = self.executor
+        for size in short:
+            for _ in range(self.workers):
+                try:
+                    future = executor.submit(generate_batch, *size, random.randrange(2 ** 63))
+                except RuntimeError:                ## the pool is closing
+                    return
+                future.add_done_callback(lambda future, size=size: self.batch_done(size, future))
+
+    def batch_done(self, size, future):
+        """ This runs when a batch comes back from a worker. """
+        with self.lock:
+            self.in_flight[size] -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            boards, candidates, seconds = future.result()
+            self.boards[size].extend(boards)
+            self.generated += len(boards)
+            self.candidates += candidates
+            self.worker_seconds += seconds
+            refill = not self.in_flight[size]
+        if refill:
+            self.refill([size])                     ## keep going until the size is full
+
+    def wait_until_full(self, timeout=None):
+        """ This blocks until every size has pool_size boards (or timeout seconds go by). Returns True if they're all full. """
+        end = None if timeout is None else time.monotonic() + timeout
+        self.refill()
+        while True:
+            with self.lock:
+                full = all(len(boards) >= self.pool_size for boards in self.boards.values())
+            if full or (end is not None and time.monotonic() > end):
+                return full
+            time.sleep(0.05)
+
+    def close(self):
+        """ This stops the workers (throwing away batches that haven't started) and saves the pool. """
+        self.closed = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.save()
+
+    ###### STATS ######
+
+    def summary(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "generated": self.generated,
+                "candidates": self.candidates,
+                "pass_rate": self.generated / self.candidates if self.candidates else 0.0,
+                "boards_per_worker_sec": self.generated / self.worker_seconds if self.worker_seconds else 0.0,
+                "boards_per_sec": self.generated / (time.perf_counter() - self.started),
+                "workers": self.workers,
+                "pool": {size_key(*size): len(boards) for size, boards in self.boards.items()},
+            }
+
+    def report(self):
+        """ This gives the summary as lines of text, for the stats command. """
+        numbers = self.summary()
+        pool = ", ".join(f"{key}: {count}" for key, count in numbers["pool"].items()) or "empty"
+        return [
+            f" No-guess boards: {numbers['hits']} hits, {numbers['misses']} misses ({numbers['hit_rate'] * 100:.0f}% hit rate) | ready: {pool}",
+            f" Generated {numbers['generated']} of {numbers['candidates']} candidates ({numbers['pass_rate'] * 100:.0f}% passed), "
+            f"{numbers['boards_per_worker_sec']:.1f} boards per worker second on {numbers['workers']} workers",
+        ]
+
+
+def main(argv=None):
+    presets = [key for key, (width, height, num_mines, name) in DIFFICULTY_PRESETS.items() if num_mines]
+    parser = argparse.ArgumentParser(description="Make no-guess boards ahead of time and report how fast it goes.")
+    parser.add_argument("--preset", default="all", choices=presets + ["all"], help="difficulty preset letter, or all (default)")
+    parser.add_argument("--boards", type=int, default=POOL_SIZE, help=f"boards to keep for each preset (default: {POOL_SIZE})")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one less than the cores)")
+    parser.add_argument("--file", default=POOL_FILE, help=f"the pool file (default: {POOL_FILE})")
+    args = parser.parse_args(argv)
+
+    sizes = [tuple(DIFFICULTY_PRESETS[key][:3]) for key in (presets if args.preset == "all" else [args.preset])]
+    pool = Board_Pool_Class(sizes, args.boards, args.file, args.workers)
+    start = time.perf_counter()
+    pool.wait_until_full()
+    elapsed = time.perf_counter() - start
+    pool.close()
+    report = pool.summary()
+    report["seconds"] = elapsed
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+""" Load generator for minesweeper_server.py.
+
+It opens --clients connections at once, and each one plays games as fast as the server answers: it checks a random
+square it hasn't seen yet, and starts a new game with RESET after every win or loss. Every move is timed from sending the
+line to getting the answer back. At the end it prints JSON with the sustained moves per second and the latency
+percentiles (p50, p99, max).
+
+Examples:
+    python minesweeper_load.py --spawn --clients 1000 --seconds 20     ## start a server for the run, then stop it
+    python minesweeper_load.py --port 7777 --clients 200 --size 30x16x99
+    python minesweeper_load.py --unix /tmp/minesweeper.sock
+
+Lots of clients need lots of file descriptors (one per connection on each side), so raise 'ulimit -n' for big runs.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from minesweeper2_new import Coordinate_Codec_Class
+from minesweeper_server import DEFAULT_PORT
+
+LABEL_CACHE = {}                            ## (width, height) -> {"B3": index}, shared by all the clients on that board size
+
+
+def cell_labels(width, height):
+    labels = LABEL_CACHE.get((width, height))
+    if labels is None:
+        labels = [Coordinate_Codec_Class.format(index % width, index // width) for index in range(width * height)]
+        LABEL_CACHE[(width, height)] = labels
+    return labels
+
+
+def label_indices(width, height):
+    key = ("index", width, height)
+    indices = LABEL_CACHE.get(key)
+    if indices is None:
+        indices = {label: index for index, label in enumerate(cell_labels(width, height))}
+        LABEL_CACHE[key] = indices
+    return indices
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Load_Client_Class:
+    """ One simulated player. It only remembers which squares it has seen revealed, and picks the next move at random
+    from the rest (so it loses a lot, which is fine: RESET and NEW are part of the load too). """
+
+    def __init__(self, client_number, stats):
+        self.rng = random.Random(client_number)
+        self.stats = stats
+        self.unseen = []                            ## squares not known to be revealed, in a random order
+        self.seen = bytearray()
+        self.labels = []
+        self.indices = {}
+
+    def start_board(self, answer):
+        """ An "OK <session> <width> <height> <mines> <seed>" answer means a fresh board. """
+        _, _, width, height, _, _ = answer.split()
+        width, height = int(width), int(height)
+        self.labels = cell_labels(width, height)
+        self.indices = label_indices(width, height)
+        self.seen = bytearray(width * height)
+        self.unseen = list(range(width * height))
+        self.rng.shuffle(self.unseen)
+
+    def next_move(self):
+        while self.unseen:
+            index = self.unseen.pop()
+            if not self.seen[index]:
+                return self.labels[index]
+        return None
+
+    def read_answer(self, answer):
+        """ Marks the squares the answer says got revealed. Returns the status. """
+        words = answer.split()
+        for cell in words[3:]:
+            label, _, code = cell.partition("=")
+            if code != "." and code != "F" and label in self.indices:
+                self.seen[self.indices[label]] = 1
+        return words[0]
+
+    async def run(self, open_connection, size, deadline):
+        stats = self.stats
+        try:
+            reader, writer = await open_connection()
+        except OSError:
+            stats["connect_errors"] += 1
+            return
+        latencies = stats["latencies"]
+        try:
+            writer.write(f"NEW {size}\n".encode())
+            answer = (await reader.readline()).decode()
+            if not answer.startswith("OK"):
+                stats["errors"] += 1
+                return
+            self.start_board(answer)
+            stats["games"] += 1
+            while time.perf_counter() < deadline:
+                move = self.next_move()
+                if move is None:                    ## nothing left to try, so start again
+                    command = "RESET"
+                else:
+                    command = move
+                start = time.perf_counter()
+                writer.write(command.encode() + b"\n")
+                answer = (await reader.readline()).decode()
+                if not answer:
+                    stats["errors"] += 1
+                    return
+                if command == "RESET":
+                    self.start_board(answer)
+                    stats["games"] += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                status = self.read_answer(answer)
+                if status == "ERR":
+                    stats["errors"] += 1
+                elif status == "HIT" or status == "WIN":
+                    if status == "WIN":
+                        stats["wins"] += 1
+                    writer.write(b"RESET\n")
+                    self.start_board((await reader.readline()).decode())
+                    stats["games"] += 1
+        except (OSError, ValueError):
+            stats["errors"] += 1
+        finally:
+            writer.close()
+
+
+async def run_load(open_connection, clients, seconds, size):
+    stats = {"latencies": [], "games": 0, "wins": 0, "errors": 0, "connect_errors": 0}
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(Load_Client_Class(number, stats).run(open_connection, size, deadline) for number in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(stats.pop("latencies"))
+    return {
+        "clients": clients,
+        "size": size,
+        "seconds": elapsed,
+        "moves": len(latencies),
+        "moves_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        },
+        **stats,
+    }
+
+
+def wait_for_server(host, port, unix_path, timeout=10.0):
+    """ Waits until the spawned server takes connections. """
+    async def try_connect():
+        end = time.monotonic() + timeout
+        while True:
+            try:
+                if unix_path:
+                    _, writer = await asyncio.open_unix_connection(unix_path)
+                else:
+                    _, writer = await asyncio.open_connection(host, port)
+                writer.close()
+                return
+            except OSError:
+                if time.monotonic() > end:
+                    raise
+                await asyncio.sleep(0.05)
+    asyncio.run(try_connect())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Put load on minesweeper_server.py and report moves/sec and latency.")
+    parser.add_argument("--host", default="127.0.0.1", help="server address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"server TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket instead of TCP")
+    parser.add_argument("--clients", type=int, default=100, help="connections playing at once (default: 100)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to run (default: 10)")
+    parser.add_argument("--size", default="E", help="board for NEW: a preset letter or <width>x<height>x<mines> (default: E)")
+    parser.add_argument("--spawn", action="store_true", help="start a server in another process for the run")
+    args = parser.parse_args(argv)
+
+    server_process = None
+    if args.spawn:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "minesweeper_server.py"),
+                   "--host", args.host, "--port", str(args.port)]
+        if args.unix:
+            command += ["--unix", args.unix]
+        server_process = subprocess.Popen(command)
+        wait_for_server(args.host, args.port, args.unix)
+
+    if args.unix:
+        open_connection = lambda: asyncio.open_unix_connection(args.unix)
+    else:
+        open_connection = lambda: asyncio.open_connection(args.host, args.port)
+    try:
+        report = asyncio.run(run_load(open_connection, args.clients, args.seconds, args.size))
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.wait()
+    print(json.dumps(report, indent=2))
+    return 1 if report["errors"] or report["connect_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
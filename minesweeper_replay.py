@@ -0,0 +1,152 @@
+""" Replays a move journal (see Move_Journal_Class) without the terminal, as fast as the engine can go.
+
+It makes the exact same board again from the seed in the journal header, plays every move through Game_Engine_Class and
+checks that each move gets the same status and changes the same number of cells as it did in the game. If the journal
+has its final line, the counters and the board digest at the end have to match too.
+
+To get to the middle of a long game quickly, save checkpoints during a full replay with --checkpoint-every. A checkpoint
+is a normal save file (Save_File_Class) of the board after that move. After that, --seek N loads the closest checkpoint
+at or before move N and only replays the moves after it.
+
+Examples:
+    python minesweeper_replay.py minesweeper_journals/game-20250101-120000-000000.jsonl
+    python minesweeper_replay.py game.jsonl --checkpoint-every 500     ## replay everything, saving a checkpoint every 500 moves
+    python minesweeper_replay.py game.jsonl --seek 12000 --show        ## jump to move 12000 and draw the board
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from minesweeper2_new import (Bitboard_Grid_Class, Chunked_Grid_Class, Game_Engine_Class, Grid_Class,
+                              Move_Journal_Class)
+
+GRID_CLASSES = {cls.__name__: cls for cls in (Grid_Class, Bitboard_Grid_Class, Chunked_Grid_Class)}
+
+
+def checkpoint_directory(journal_path):
+    return journal_path + ".checkpoints"
+
+
+def checkpoint_path(journal_path, move_number):
+    return os.path.join(checkpoint_directory(journal_path), f"move-{move_number:09d}.msw")
+
+
+def latest_checkpoint(journal_path, move_number):
+    """ Finds the last checkpoint at or before move_number. Returns (move number, path), or (0, None) if there isn't one. """
+    directory = checkpoint_directory(journal_path)
+    best = (0, None)
+    if not os.path.isdir(directory):
+        return best
+    for name in os.listdir(directory):
+        if name.startswith("move-") and name.endswith(".msw"):
+            number = int(name[5:-4])
+            if best[0] < number <= move_number:
+                best = (number, os.path.join(directory, name))
+    return best
+
+
+def start_engine(header, journal_dir):
+    """ Makes the board from the journal header: from the seed, or from the save file the game was loaded from. """
+    engine = Game_Engine_Class()
+    engine.auto_chord = header.get("auto_chord", False)
+    engine.first_click = header.get("first_click", "CELL")     ## older journals didn't say, so it's the default mode
+    if header.get("save_file"):
+        save_file = header["save_file"]
+        if not os.path.isabs(save_file):                    ## saves are named relative to where the game was run
+            save_file = save_file if os.path.exists(save_file) else os.path.join(journal_dir, save_file)
+        engine.load_game(save_file)
+    else:
+        engine.new_game(header["width"], header["height"], header["mines"], seed=header["seed"],
+                        difficulty=header["difficulty"], grid_class=GRID_CLASSES[header["grid"]])
+    return engine
+
+
+def play(engine, move):
+    """ Plays one journaled move on the engine and returns the result. """
+    if move["action"] in ("toggle_reveal", "toggle_auto_chord"):
+        return getattr(engine, move["action"])()
+    return getattr(engine, move["action"])(move["x"], move["y"])
+
+
+def replay(journal_path, seek=None, checkpoint_every=0):
+    """ Replays a journal. Returns a report dictionary, with the engine under "engine" (left out of the JSON output). """
+    header, moves, end = Move_Journal_Class.read(journal_path)
+    stop = len(moves) if seek is None else max(0, min(seek, len(moves)))
+
+    start = time.perf_counter()
+    first_move, checkpoint = latest_checkpoint(journal_path, stop) if seek is not None else (0, None)
+    if checkpoint is not None:
+        engine = Game_Engine_Class()
+        toggles = sum(move["action"] == "toggle_auto_chord" for move in moves[:first_move])
+        engine.auto_chord = header.get("auto_chord", False) != (toggles % 2 == 1)   ## a checkpoint doesn't keep the setting
+        engine.first_click = header.get("first_click", "CELL")   ## or this one, and the first click might come after it
+        engine.load_game(checkpoint)
+    else:
+        first_move = 0
+        engine = start_engine(header, os.path.dirname(os.path.abspath(journal_path)))
+    setup_seconds = time.perf_counter() - start
+
+    mismatches = []
+    start = time.perf_counter()
+    for move in moves[first_move:stop]:
+        result = play(engine, move)
+        if result.status != move["status"] or len(result.changed) != move["changed"]:
+            mismatches.append({"move": move["n"], "expected": [move["status"], move["changed"]],
+                               "got": [result.status, len(result.changed)]})
+        if checkpoint_every and move["n"] % checkpoint_every == 0 and not engine.game_over:
+            os.makedirs(checkpoint_directory(journal_path), exist_ok=True)
+            engine.save_game(checkpoint_path(journal_path, move["n"]))
+    replay_seconds = time.perf_counter() - start
+
+    final_checked = end is not None and stop == len(moves)
+    if final_checked and header.get("version", 1) < 2 and end.get("game_over"):
+        final_checked = False                               ## older games revealed every cell when they ended, so the digest can't match
+    final_matches = None
+    if final_checked:
+        grid = engine.grid
+        final_matches = (engine.mines_remaining == end["mines_remaining"]
+                         and grid.revealed_safe_count == end["revealed_safe"]
+                         and grid.revealed_mine_count == end["revealed_mines"]
+                         and grid.state_digest() == end["digest"])
+    replayed = stop - first_move
+    return {
+        "journal": journal_path,
+        "moves_in_journal": len(moves),
+        "stopped_at": stop,
+        "started_from_checkpoint": first_move,
+        "replayed_moves": replayed,
+        "setup_seconds": setup_seconds,
+        "replay_seconds": replay_seconds,
+        "moves_per_sec": replayed / replay_seconds if replay_seconds else 0.0,
+        "mismatches": mismatches,
+        "final_state_checked": final_checked,
+        "final_state_matches": final_matches,
+        "verified": not mismatches and final_matches is not False,
+        "engine": engine,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a minesweeper move journal and check it.")
+    parser.add_argument("journal", help="the .jsonl journal file")
+    parser.add_argument("--seek", type=int, metavar="N", help="stop after move N (uses the closest checkpoint if there is one)")
+    parser.add_argument("--checkpoint-every", type=int, default=0, metavar="K",
+                        help="save a checkpoint every K moves while replaying (default: no checkpoints)")
+    parser.add_argument("--show", action="store_true", help="draw the board where the replay stopped")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = replay(args.journal, args.seek, args.checkpoint_every)
+    engine = report.pop("engine")
+    if args.show:
+        engine.grid.display(engine.mines_remaining)
+    print(json.dumps(report, indent=2))
+    return 0 if report["verified"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+""" A game server that hosts lots of independent minesweeper games in one process, for players and bots.
+
+It's an asyncio server on a TCP port or a Unix socket. Every game is a session with its own Game_Engine_Class, and
+sessions are kept by session id, so a client can drop the connection and ATTACH to its game again later. Sessions that
+nobody has touched for --idle-timeout seconds get thrown away.
+
+The protocol is one line per command and one line per answer, and the commands are the same as in the terminal game:
+    NEW [E|M|H|W|<width>x<height>x<mines>] [seed]   starts a game     -> OK <session> <width> <height> <mines> <seed>
+    ATTACH <session>                                 carries on with a game started on another connection -> OK <session> ...
+    B3                                               checks a square (or chords it if it's already revealed)
+    -F B3                                            flags a square, or takes the flag off again
+    REVEAL                                           toggles REVEAL mode (for testing)
+    RESET                                            starts the game again with the same settings and seed (the same board)
+    BOARD                                            the whole board, one row per cell code, rows split with "/"
+    STATS                                            the server's counters as JSON
+    QUIT                                             closes the connection (the game stays until it's evicted)
+Moves answer with "<status> <mines remaining> <cells changed> B3=1 C3=F ...", where status is NOHIT, HIT, WIN or
+INVALID and each changed cell has its new code: 0 to 8 for a revealed number, * for a revealed mine, F for a flag and
+. for a hidden square. When the game ends (HIT or WIN) or REVEAL is toggled, every hidden square changes how it's shown,
+so those answers list all of them too, and a client that applies the changes sees the whole board. If there are more
+than MAX_OVERLAY_CELLS hidden squares the answer only lists the cells the move changed and ends with the word OVERLAY,
+and the client asks for BOARD if it wants to see the rest.
+Anything that goes wrong answers "ERR <message>".
+
+Examples:
+    python minesweeper_server.py --port 7777
+    python minesweeper_server.py --unix /tmp/minesweeper.sock --idle-timeout 60
+    python minesweeper_load.py --port 7777 --clients 500 --seconds 20     ## the load generator to go with it
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import secrets
+import sys
+import time
+
+from minesweeper2_new import (DIFFICULTY_PRESETS, Coordinate_Codec_Class, Game_Engine_Class, Grid_Class,
+                              Instrumentation_Class)
+
+DEFAULT_PORT = 7777
+IDLE_TIMEOUT = 300.0                        ## seconds a session can sit untouched before it's evicted
+SWEEP_INTERVAL = 10.0                       ## how often to look for idle sessions
+MAX_SESSIONS = 100000                       ## NEW answers ERR once there are this many games
+MAX_CELLS = 1000000                         ## the biggest board a session can ask for
+MAX_LINE = 1024                             ## longest command line the server reads
+MAX_OVERLAY_CELLS = 4096                    ## most hidden squares a HIT, WIN or REVEAL answer lists, above this it says OVERLAY
+
+
+def cell_code(grid, index):
+    """ What a player can see in one cell: a number, * for a revealed mine, F for a flag, or . for hidden.
+    Once the game is over (or REVEAL is on) every cell is shown, the same as the terminal game draws it. """
+    if grid.revealed[index] or grid.show_all:
+        return "*" if grid.mines[index] else str(grid.adjacent[index])
+    if grid.flagged[index]:
+        return "F"
+    return "."
+
+
+class Session_Class:
+    """ A session is one game on the server: its engine, the settings and seed it was started with (for RESET) and when it was last used. """
+
+    __slots__ = ("session_id", "engine", "settings", "last_used")
+
+    def __init__(self, session_id, engine, settings):
+        self.session_id = session_id
+        self.engine = engine
+        self.settings = settings                    ## (width, height, mines, difficulty, seed), the seed the game really got
+        self.last_used = time.monotonic()
+
+
+class Game_Server_Class:
+    """ The game server keeps the sessions and answers the commands. Everything runs on the event loop thread, and a
+    move never waits on anything in the middle, so no locks are needed. All the engines share one Instrumentation_Class,
+    which makes the STATS command the totals for the whole server. """
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, max_sessions=MAX_SESSIONS):
+        self.sessions = {}                          ## session id -> Session_Class
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.instrumentation = Instrumentation_Class()
+        self.connections = 0
+        self.evicted = 0
+
+    ###### SESSIONS ######
+
+    @staticmethod
+    def parse_settings(words):
+        """ NEW's arguments to (width, height, mines, difficulty, seed). Raises ValueError if they don't make sense. """
+        size = words[0].upper() if words else "E"
+        seed = int(words[1]) if len(words) > 1 else None
+        if size in DIFFICULTY_PRESETS and DIFFICULTY_PRESETS[size][2]:
+            width, height, mines, difficulty = DIFFICULTY_PRESETS[size]
+        else:
+            parts = size.split("X")
+            if len(parts) != 3:
+                raise ValueError("Size has to be a preset letter or <width>x<height>x<mines>.")
+            width, height, mines = (int(part) for part in parts)
+            difficulty = "CUSTOM"
+        if width < 1 or height < 1 or width * height > MAX_CELLS:
+            raise ValueError(f"The board has to have between 1 and {MAX_CELLS} cells.")
+        if not 1 <= mines < width * height:
+            raise ValueError("There has to be at least one mine and at least one safe square.")
+        return width, height, mines, difficulty, seed
+
+    def new_session(self, width, height, mines, difficulty, seed=None):
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError("The server is full.")
+        session_id = secrets.token_hex(8)
+        engine = Game_Engine_Class(self.instrumentation)
+        engine.new_game(width, height, mines, seed=seed, difficulty=difficulty, grid_class=Grid_Class)
+        session = Session_Class(session_id, engine, (width, height, mines, difficulty, engine.grid.seed))
+        self.sessions[session_id] = session
+        return session
+
+    def evict_idle(self, now=None):
+        """ This throws away the sessions nobody has touched for idle_timeout seconds. Returns how many went. """
+        now = time.monotonic() if now is None else now
+        idle = [session_id for session_id, session in self.sessions.items()
+                if now - session.last_used > self.idle_timeout]
+        for session_id in idle:
+            del self.sessions[session_id]
+        self.evicted += len(idle)
+        if idle:
+            logging.debug("\033[33m Evicted %s idle sessions, %s left \033[0m", len(idle), len(self.sessions))
+        return len(idle)
+
+    async def sweep_forever(self):
+        while True:
+            await asyncio.sleep(min(SWEEP_INTERVAL, self.idle_timeout))
+            self.evict_idle()
+
+    ###### COMMANDS ######
+
+    @staticmethod
+    def describe(session):
+        grid = session.engine.grid
+        return f"OK {session.session_id} {grid.width} {grid.height} {grid.num_mines} {grid.seed}"
+
+    @staticmethod
+    def move_answer(engine, result, overlay=False):
+        """ A move result as one line: status, mines remaining, number of changed cells and their new codes.
+        The end of the game and REVEAL (overlay) only change how the board is drawn, not the cells themselves, so the
+        engine doesn't list anything for them. Every hidden cell gets added here instead, up to MAX_OVERLAY_CELLS of
+        them. Past that the line would be megabytes (and the event loop would stall building it), so the answer ends with
+        OVERLAY and the client can ask for BOARD. """
+        grid = engine.grid
+        width = grid.width
+        if result.status == "INVALID":
+            return f"INVALID {result.mines_remaining} 0 {result.message}"
+        changed = result.changed
+        marker = ""
+        if overlay or result.board_revealed:
+            hidden_count = width * grid.height - grid.revealed_safe_count - grid.revealed_mine_count
+            if hidden_count > MAX_OVERLAY_CELLS:
+                marker = " OVERLAY"                         ## too many to list, BOARD has them
+            else:
+                indices = {y * width + x for x, y in changed}
+                revealed = bytes(grid.revealed)
+                index = revealed.find(0)
+                while index != -1:                          ## every hidden cell
+                    indices.add(index)
+                    index = revealed.find(0, index + 1)
+                changed = [(index % width, index // width) for index in sorted(indices)]
+        cells = " ".join(f"{Coordinate_Codec_Class.format(x, y)}={cell_code(grid, y * width + x)}" for x, y in changed)
+        return f"{result.status} {result.mines_remaining} {len(changed)} {cells}".rstrip() + marker
+
+    @staticmethod
+    def board_answer(grid):
+        width = grid.width
+        rows = ("".join(cell_code(grid, y * width + x) for x in range(width)) for y in range(grid.height))
+        return "BOARD " + "/".join(rows)
+
+    def handle_command(self, line, session):
+        """ This answers one command line. Returns (answer, session), since NEW, ATTACH and RESET change the session the
+        connection is playing. The answer is None for QUIT. """
+        words = line.split()
+        if not words:
+            return "ERR Empty command.", session
+        command = words[0].upper()
+        try:
+            if command == "NEW":
+                session = self.new_session(*self.parse_settings(words[1:]))
+                return self.describe(session), session
+            if command == "ATTACH":
+                attached = self.sessions.get(words[1]) if len(words) > 1 else None
+                if attached is None:
+                    return "ERR No such session (it may have been evicted).", session
+                attached.last_used = time.monotonic()
+                return self.describe(attached), attached
+            if command == "STATS":
+                stats = self.instrumentation.summary()
+                stats.update(sessions=len(self.sessions), connections=self.connections, evicted=self.evicted)
+                return "STATS " + json.dumps(stats, separators=(",", ":")), session
+            if command == "QUIT":
+                return None, session
+            if session is None or self.sessions.get(session.session_id) is not session:
+                return "ERR No game. Start one with NEW (or ATTACH to one).", None
+            session.last_used = time.monotonic()
+            engine = session.engine
+            grid = engine.grid
+            if command == "RESET" or command == "RESTART":
+                width, height, mines, difficulty, seed = session.settings
+                engine.new_game(width, height, mines, seed=seed, difficulty=difficulty, grid_class=Grid_Class)
+                return self.describe(session), session
+            if command == "REVEAL":
+                return self.move_answer(engine, engine.toggle_reveal(), overlay=True), session
+            if command == "BOARD":
+                return self.board_answer(grid), session
+            if command == "-F":
+                move = Coordinate_Codec_Class.parse(words[1].upper(), grid.width, grid.height) if len(words) > 1 else None
+                if move is None:
+                    return "ERR Invalid input. Please enter a valid move.", session
+                return self.move_answer(engine, engine.flag(*move)), session
+            move = Coordinate_Codec_Class.parse(command, grid.width, grid.height)
+            if move is None:
+                return "ERR Invalid input. Please enter a valid move.", session
+            return self.move_answer(engine, engine.reveal(*move)), session
+        except ValueError as error:
+            return f"ERR {error}", session
+
+    async def handle_connection(self, reader, writer):
+        """ One client connection. It can play one session at a time, and can switch with NEW or ATTACH. """
+        self.connections += 1
+        session = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):      ## ValueError: a line longer than the limit
+                    break
+                if not line:
+                    break
+                answer, session = self.handle_command(line.decode(errors="replace"), session)
+                if answer is None:
+                    break
+                writer.write(answer.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None, ready=None):
+        """ This runs the server until it's cancelled. ready (an asyncio.Event) gets set once it's listening. """
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, unix_path, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+        sweeper = asyncio.ensure_future(self.sweep_forever())
+        logging.info("Minesweeper server listening on %s", unix_path or f"{host}:{port}")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host lots of minesweeper games over a local socket.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help=f"evict games nobody has touched for this many seconds (default: {IDLE_TIMEOUT:g})")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS, help=f"most games at once (default: {MAX_SESSIONS})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = Game_Server_Class(args.idle_timeout, args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
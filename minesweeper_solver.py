@@ -0,0 +1,721 @@
+""" Automatic solver for the minesweeper game, plus a batch simulator that measures how solvable each preset is.
+
+The solver only looks at what a player could see: which cells are revealed, the numbers on them (adjacent_mines) and
+its own flags. It plays through Game_Engine_Class like any other player. Every turn it tries, in order:
+
+    1. Single cell rules. If a number already has all its mines flagged, chord it (like special_reveal).
+       If a number has exactly as many hidden neighbours as mines left, flag them all.
+    2. Subset rules. If the hidden neighbours of one number are all hidden neighbours of another number too,
+       the difference between the two numbers tells you about the cells only the second one touches.
+    3. Guess, only if nothing above worked. It picks the cell that looks least likely to be a mine,
+       and the lowest cell index if there's a tie, so the same board is always played the same way.
+
+The simulator plays N seeded games across a process pool and reports the win rate, guesses per game and games per second.
+
+Probability_Engine_Class works out the chance that each hidden cell is a mine. The game's 'hint' command uses it.
+
+Examples:
+    python minesweeper_solver.py --preset E --games 10000            ## EASY, using every core
+    python minesweeper_solver.py --preset all --games 2000 --workers 4
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from minesweeper2_new import DIFFICULTY_PRESETS, Coordinate_Codec_Class, Game_Engine_Class
+
+EXACT_STATE_BUDGET = 20000      ## most counting states one step of an exact count can have before the component gets sampled instead
+MONTE_CARLO_SAMPLES = 2000      ## how many samples a component gets when it's too big to count exactly
+COMBINE_BUDGET = 4000000        ## most steps the exact combination of all the components can take before it's estimated instead
+
+
+class Solver_Class:
+    """ The solver plays one game on an engine that already has a game started (engine.new_game). """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.grid = engine.grid
+        self.width = self.grid.width
+        self.height = self.grid.height
+        self.frontier = set()           ## revealed numbered cells that still have hidden, unflagged neighbours
+        self.guesses = 0
+        self.moves = 0
+        self.last_status = None         ## status of the last move, "WIN" at the end of a won game
+
+    def neighbours(self, index):
+        """ This is a method that gives the flat indices of the (up to 8) cells around a cell. """
+        y, x = divmod(index, self.width)
+        result = []
+        for new_y in range(max(0, y - 1), min(self.height, y + 2)):
+            for new_x in range(max(0, x - 1), min(self.width, x + 2)):
+                if new_x != x or new_y != y:
+                    result.append(new_y * self.width + new_x)
+        return result
+
+    def hidden_neighbours(self, index):
+        """ This is a method that splits the neighbours of a cell into hidden unflagged cells and a count of flags. """
+        revealed, flagged = self.grid.revealed, self.grid.flagged
+        hidden = []
+        flags = 0
+        for neighbour in self.neighbours(index):
+            if flagged[neighbour]:
+                flags += 1
+            elif not revealed[neighbour]:
+                hidden.append(neighbour)
+        return hidden, flags
+
+    def play_move(self, move, index):
+        """ This is a method that sends one move ("reveal", "chord" or "flag") to the engine and learns from the result. """
+        x, y = index % self.width, index // self.width
+        result = getattr(self.engine, move)(x, y)
+        self.moves += 1
+        self.last_status = result.status
+        grid = self.grid
+        for changed_x, changed_y in result.changed:             ## newly revealed numbers join the frontier
+            changed = changed_y * self.width + changed_x
+            if grid.revealed[changed] and grid.adjacent[changed]:
+                self.frontier.add(changed)
+        return result
+
+    def single_cell_pass(self):
+        """ This is a method that applies the single cell rules to the whole frontier. Returns True if it did anything. """
+        progress = False
+        adjacent = self.grid.adjacent
+        for index in sorted(self.frontier):                     ## sorted so the same board always plays the same way
+            if self.engine.game_over:
+                break
+            if index not in self.frontier:
+                continue
+            hidden, flags = self.hidden_neighbours(index)
+            if not hidden:
+                self.frontier.discard(index)                    ## nothing left to learn from this number
+                continue
+            mines_left = adjacent[index] - flags
+            if mines_left == 0:                                 ## every mine is flagged, so the rest is safe
+                self.play_move("chord", index)
+                progress = True
+            elif mines_left == len(hidden):                     ## every hidden neighbour has to be a mine
+                for neighbour in hidden:
+                    self.play_move("flag", neighbour)
+                progress = True
+        return progress
+
+    def constraints(self):
+        """ This is a method that turns the frontier into constraints: (set of hidden cells, number of mines among them). """
+        adjacent = self.grid.adjacent
+        result = []
+        for index in sorted(self.frontier):
+            hidden, flags = self.hidden_neighbours(index)
+            if hidden:
+                result.append((frozenset(hidden), adjacent[index] - flags))
+        return result
+
+    def subset_pass(self):
+        """ This is a method that applies the subset rule to every pair of overlapping constraints. If A's cells are all in B,
+        then B's other cells hold exactly (B's mines - A's mines) mines. If that's 0 they're safe, and if it's the number of
+        cells they're all mines. Returns True if it did anything. """
+        constraints = self.constraints()
+        by_cell = {}                                            ## cell -> the constraints that include it
+        for constraint in constraints:
+            for cell in constraint[0]:
+                by_cell.setdefault(cell, []).append(constraint)
+        safe, mines = set(), set()
+        for small_cells, small_mines in constraints:
+            checked = set()
+            for cell in small_cells:
+                for big_cells, big_mines in by_cell[cell]:
+                    if big_cells is small_cells or big_cells in checked:
+                        continue
+                    checked.add(big_cells)
+                    if not small_cells < big_cells:
+                        continue
+                    extra_cells = big_cells - small_cells
+                    extra_mines = big_mines - small_mines
+                    if extra_mines == 0:
+                        safe |= extra_cells
+                    elif extra_mines == len(extra_cells):
+                        mines |= extra_cells
+        for index in sorted(mines):
+            self.play_move("flag", index)
+        for index in sorted(safe):
+            if self.engine.game_over:
+                break
+            if not self.grid.revealed[index]:                  ## an earlier reveal might have opened it already
+                self.play_move("reveal", index)
+        return bool(safe or mines)
+
+    def guess(self):
+        """ This is a method that reveals the cell that looks least likely to be a mine. Cells next to numbers get the
+        highest mines-left / hidden-cells ratio of their numbers, every other hidden cell gets the overall density. """
+        grid = self.grid
+        revealed, flagged = grid.revealed, grid.flagged
+        risk = {}
+        for cells, mines in self.constraints():
+            ratio = mines / len(cells)
+            for cell in cells:
+                if ratio > risk.get(cell, -1.0):
+                    risk[cell] = ratio
+        flag_count = grid.count_flags()
+        hidden_count = grid.width * grid.height - grid.revealed_safe_count - grid.revealed_mine_count - flag_count
+        unflagged_mines = grid.num_mines - flag_count
+        density = unflagged_mines / hidden_count if hidden_count else 1.0
+        best_index, best_risk = None, 2.0
+        for index in range(grid.width * grid.height):
+            if revealed[index] or flagged[index]:
+                continue
+            cell_risk = risk.get(index, density)
+            if cell_risk < best_risk:
+                best_index, best_risk = index, cell_risk
+        self.guesses += 1
+        self.play_move("reveal", best_index)
+
+    def play(self, start=0, guessing=True):
+        """ This is a method that plays the game until it's won or lost. Returns True for a win.  \n
+        start is the cell to click first (the corner by default). With guessing off it gives up (returns False) the first
+        time the rules run out instead of guessing, which is how the board pool checks a board can be solved without guessing.
+        The opening click only counts as a guess if the engine's first_click is None, since otherwise it can't hit a mine. """
+        grid = self.grid
+        if self.engine.first_click is None or grid.revealed_safe_count or grid.revealed_mine_count:
+            self.guesses += 1                                   ## the engine only makes the very first click safe, and only if first_click is on
+        self.play_move("reveal", start)
+        while not self.engine.game_over:
+            if self.single_cell_pass():
+                continue
+            if self.subset_pass():
+                continue
+            if not guessing:
+                return False
+            self.guess()
+        return self.last_status == "WIN"
+
+
+class Component_Class:
+    """ A component is a group of constraints that share hidden cells, counted on its own.  \n
+    totals[k] is the number of ways the component's cells can hold exactly k mines, scaled so they add up to 1.
+    An exact component also has cell_totals[cell][k], the same count but only for the ways where that cell is a mine.
+    A sampled component has samples instead, a list of (weight, k, mine cells) from the Monte Carlo run. """
+
+    __slots__ = ("cells", "totals", "exact", "cell_totals", "samples")
+
+    def __init__(self, cells, totals, exact, cell_totals=None, samples=None):
+        self.cells = cells
+        self.totals = totals
+        self.exact = exact
+        self.cell_totals = cell_totals
+        self.samples = samples
+
+    def cell_probabilities(self, weights):
+        """ This is a method that gives the chance of a mine for each cell, given how much the rest of the board weighs
+        each mine count k of this component (weights[k]). Returns None if the weights rule out everything. """
+        total = sum(count * weight for count, weight in zip(self.totals, weights))
+        if total <= 0:
+            return None
+        if self.exact:
+            return {cell: sum(count * weight for count, weight in zip(counts, weights)) / total
+                    for cell, counts in self.cell_totals.items()}
+        mine_weights = dict.fromkeys(self.cells, 0.0)
+        sample_total = 0.0
+        for weight, mine_count, mine_cells in self.samples:
+            weight *= weights[mine_count]
+            sample_total += weight
+            for cell in mine_cells:
+                mine_weights[cell] += weight
+        return {cell: mine_weight / sample_total for cell, mine_weight in mine_weights.items()}
+
+
+class Hint_Class:
+    """ What Probability_Engine_Class.hint gives back.  \n
+    probabilities maps the flat index of every hidden cell next to a number to its chance of being a mine. Every other
+    hidden unflagged cell has other_probability (None if there aren't any). estimated is the set of cells whose chance
+    came from sampling or from the estimated combination instead of an exact count. consistent is False if the numbers
+    can't all be true with the flags that are down, which means a flag is wrong. """
+
+    def __init__(self, probabilities, other_probability, estimated, consistent=True):
+        self.probabilities = probabilities
+        self.other_probability = other_probability
+        self.estimated = estimated
+        self.consistent = consistent
+
+
+class Probability_Engine_Class:
+    """ Works out the chance that each hidden cell is a mine, using only what a player can see. Flags count as mines.  \n
+    The numbers next to hidden cells become constraints, and the constraints are split into components that don't share
+    any hidden cells. Each component is counted on its own, exactly if it fits in the state budget and by Monte Carlo
+    sampling if it doesn't. The components are then put together with the rest of the hidden cells, which share whatever
+    mines are left.  \n
+    Components are cached by their constraints. A reveal or flag only changes the constraints of the components next to
+    it, so the next hint only counts those again and everything else comes out of the cache. """
+
+    def __init__(self, state_budget=EXACT_STATE_BUDGET, samples=MONTE_CARLO_SAMPLES, combine_budget=COMBINE_BUDGET, seed=0):
+        self.state_budget = state_budget
+        self.samples = samples
+        self.combine_budget = combine_budget
+        self.seed = seed                    ## sampling is seeded so the same board always gets the same hint
+        self.cache = {}                     ## component signature -> Component_Class, only the components from the last hint
+        self.last_key = None
+        self.last_hint = None
+        self.counted = 0                    ## how many components the last hint had to count (the rest came from the cache)
+
+    def constraints(self, engine):
+        """ This is a method that turns the numbered cells into constraints: (frozenset of hidden unflagged cells, mines
+        among them). Numbers with no hidden cells left around them are dropped from engine.numbered_cells for good. """
+        grid = engine.grid
+        width, height = grid.width, grid.height
+        revealed, flagged, adjacent = grid.revealed, grid.flagged, grid.adjacent
+        result = []
+        finished = []
+        for index in engine.numbered_cells:
+            if not revealed[index]:
+                finished.append(index)
+                continue
+            y, x = divmod(index, width)
+            hidden = []
+            flags = 0
+            for new_y in range(max(0, y - 1), min(height, y + 2)):
+                for new_x in range(max(0, x - 1), min(width, x + 2)):
+                    neighbour = new_y * width + new_x
+                    if flagged[neighbour]:
+                        flags += 1
+                    elif not revealed[neighbour]:
+                        hidden.append(neighbour)
+            if hidden:
+                result.append((frozenset(hidden), adjacent[index] - flags))
+            else:
+                finished.append(index)
+        engine.numbered_cells.difference_update(finished)
+        return result
+
+    @staticmethod
+    def split_components(constraints):
+        """ This is a method that groups the constraints into components (union-find over the hidden cells). Returns a
+        list of frozensets of constraints, which are also the cache keys. """
+        parent = {}
+
+        def find(cell):
+            root = cell
+            while parent[root] != root:
+                root = parent[root]
+            while parent[cell] != root:             ## path compression
+                parent[cell], cell = root, parent[cell]
+            return root
+
+        for cells, _ in constraints:
+            first = None
+            for cell in cells:
+                parent.setdefault(cell, cell)
+                if first is None:
+                    first = find(cell)
+                else:
+                    root = find(cell)
+                    if root != first:
+                        parent[root] = first
+        groups = {}
+        for constraint in constraints:
+            groups.setdefault(find(next(iter(constraint[0]))), set()).add(constraint)
+        return [frozenset(group) for group in groups.values()]
+
+    @staticmethod
+    def cell_order(constraints):
+        """ This is a method that puts the cells of a component in breadth-first order through the constraints, so the
+        number of constraints that are part way through at any point (the counting state) stays small. """
+        by_cell = {}
+        for number, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                by_cell.setdefault(cell, []).append(number)
+        start = min(by_cell)
+        order = [start]
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            for number in by_cell[cell]:
+                for other in sorted(constraints[number][0] - seen):
+                    seen.add(other)
+                    order.append(other)
+                    queue.append(other)
+        return order
+
+    @staticmethod
+    def layout(constraints, cells):
+        """ This is a method that works out, for each position in the cell order, which constraints that cell is in and how
+        many of their cells come after it, and which constraints are open (started but not finished) before each position. """
+        position = {cell: number for number, cell in enumerate(cells)}
+        touching = [[] for _ in cells]
+        spans = []
+        for number, (constraint_cells, _) in enumerate(constraints):
+            positions = sorted(position[cell] for cell in constraint_cells)
+            for after, cell_position in enumerate(reversed(positions)):
+                touching[cell_position].append((number, after))
+            spans.append((positions[0], positions[-1]))
+        open_at = [tuple(number for number, (first, last) in enumerate(spans) if first < step <= last)
+                   for step in range(len(cells) + 1)]
+        starting = [[number for number, (first, _) in enumerate(spans) if first == step] for step in range(len(cells))]
+        return touching, open_at, starting
+
+    def count_exact(self, constraints):
+        """ This is a method that counts every way the mines can sit in a component, going through the cells in order and
+        memoizing on the open constraints' remaining mines (a transfer matrix). Returns None if it would go over the state budget. """
+        cells = self.cell_order(constraints)
+        touching, open_at, starting = self.layout(constraints, cells)
+        mine_counts = [mines for _, mines in constraints]
+
+        def step(position, state, bit):
+            needs = dict(zip(open_at[position], state))
+            for number in starting[position]:
+                needs[number] = mine_counts[number]
+            for number, after in touching[position]:
+                need = needs[number] - bit
+                if need < 0 or need > after:        ## too many mines, or not enough cells left for the rest
+                    return None
+                needs[number] = need
+            return tuple(needs[number] for number in open_at[position + 1])
+
+        layers = [{(): [1]}]                        ## layers[i]: state before cell i -> ways to get there, by mines so far
+        for position in range(len(cells)):
+            next_layer = {}
+            for state, ways in layers[-1].items():
+                for bit in (0, 1):
+                    next_state = step(position, state, bit)
+                    if next_state is None:
+                        continue
+                    next_ways = next_layer.setdefault(next_state, [0] * (position + 2))
+                    for mines, count in enumerate(ways):
+                        next_ways[mines + bit] += count
+            if len(next_layer) > self.state_budget:
+                return None
+            layers.append(next_layer)
+
+        suffix = {(): [1]}                          ## state after cell i -> ways to finish from there, by mines still to come
+        cell_totals = {}
+        for position in range(len(cells) - 1, -1, -1):
+            new_suffix = {}
+            mine_ways = [0] * (len(cells) + 1)
+            for state, ways in layers[position].items():
+                finish = [0] * (len(cells) - position + 1)
+                for bit in (0, 1):
+                    next_state = step(position, state, bit)
+                    rest = suffix.get(next_state) if next_state is not None else None
+                    if rest is None:
+                        continue
+                    for mines, count in enumerate(rest):
+                        finish[mines + bit] += count
+                    if bit:                         ## ways where this cell is a mine: before it, times after it
+                        for before_mines, before_count in enumerate(ways):
+                            if before_count:
+                                for after_mines, after_count in enumerate(rest):
+                                    mine_ways[before_mines + after_mines + 1] += before_count * after_count
+                if any(finish):
+                    new_suffix[state] = finish
+            suffix = new_suffix
+            cell_totals[cells[position]] = mine_ways
+        totals = suffix.get((), [0])
+        total = sum(totals)
+        if not total:
+            return Component_Class(cells, [0.0] * (len(cells) + 1), True, {cell: [0.0] * (len(cells) + 1) for cell in cells})
+        totals = [count / total for count in totals] + [0.0] * (len(cells) + 1 - len(totals))
+        cell_totals = {cell: [count / total for count in counts] for cell, counts in cell_totals.items()}
+        return Component_Class(cells, totals, True, cell_totals)
+
+    def count_sampled(self, constraints, signature):
+        """ This is a method that estimates the counts of a component that is too big to count exactly. Each sample goes
+        through the cells in order and picks mine or no mine at random out of the choices that still fit every constraint.
+        A sample is weighted by how many choices it had (2 to the power of the coin flips), which makes the estimate fair. """
+        cells = self.cell_order(constraints)
+        touching, _, _ = self.layout(constraints, cells)
+        rng = random.Random(f"{self.seed}:{min(cells)}:{len(signature)}")
+        raw_samples = []
+        for _ in range(self.samples):
+            needs = [mines for _, mines in constraints]
+            flips = 0
+            mine_cells = []
+            for position, cell in enumerate(cells):
+                choices = [bit for bit in (0, 1)
+                           if all(0 <= needs[number] - bit <= after for number, after in touching[position])]
+                if not choices:                     ## dead end, this sample counts for nothing
+                    break
+                if len(choices) == 2:
+                    flips += 1
+                bit = rng.choice(choices)
+                if bit:
+                    mine_cells.append(cell)
+                    for number, _ in touching[position]:
+                        needs[number] -= 1
+            else:
+                raw_samples.append((flips, tuple(mine_cells)))
+        totals = [0.0] * (len(cells) + 1)
+        samples = []
+        if raw_samples:
+            most_flips = max(flips for flips, _ in raw_samples)
+            for flips, mine_cells in raw_samples:
+                weight = 2.0 ** (flips - most_flips)
+                samples.append((weight, len(mine_cells), mine_cells))
+                totals[len(mine_cells)] += weight
+            total = sum(totals)
+            totals = [weight / total for weight in totals]
+            samples = [(weight / total, mine_count, mine_cells) for weight, mine_count, mine_cells in samples]
+        return Component_Class(cells, totals, False, samples=samples)
+
+    def component(self, signature):
+        """ This is a method that gets a component from the cache, or counts it if it isn't there. """
+        component = self.cache.get(signature)
+        if component is None:
+            constraints = sorted(signature, key=lambda constraint: (min(constraint[0]), constraint[1], len(constraint[0])))
+            component = self.count_exact(constraints)
+            if component is None:
+                component = self.count_sampled(constraints, signature)
+            self.counted += 1
+        return component
+
+    @staticmethod
+    def convolve(first, second):
+        result = [0.0] * (len(first) + len(second) - 1)
+        for first_index, first_value in enumerate(first):
+            if first_value:
+                for second_index, second_value in enumerate(second):
+                    result[first_index + second_index] += first_value * second_value
+        return result
+
+    def combine_exact(self, components, other_cells, mines_left):
+        """ This is a method that puts the components together exactly. The rest of the hidden cells can hold the leftover
+        mines in C(other_cells, mines_left - s) ways, where s is how many mines the components have between them.
+        Returns the weights for each component and the chance of a mine on one of the other cells. """
+        frontier_size = sum(len(component.cells) for component in components)
+
+        def log_ways(mines):
+            return (math.lgamma(other_cells + 1) - math.lgamma(mines + 1) - math.lgamma(other_cells - mines + 1)
+                    if 0 <= mines <= other_cells else None)
+
+        logs = [log_ways(mines_left - total) for total in range(frontier_size + 1)]
+        top = max((value for value in logs if value is not None), default=None)
+        if top is None:
+            return None, None
+        rest_weights = [math.exp(value - top) if value is not None else 0.0 for value in logs]
+
+        prefixes = [[1.0]]                          ## prefixes[j]: the first j components' totals convolved together
+        for component in components:
+            prefixes.append(self.convolve(prefixes[-1], component.totals))
+        everything = prefixes[-1]
+        norm = sum(count * weight for count, weight in zip(everything, rest_weights))
+        if norm <= 0:
+            return None, None
+
+        weights = [None] * len(components)
+        after = rest_weights                        ## after(s): weight of s mines in the components so far, summed over the ones after
+        for number in range(len(components) - 1, -1, -1):
+            totals = components[number].totals
+            before = prefixes[number]
+            weights[number] = [sum(count * after[mines + own] for mines, count in enumerate(before) if count)
+                               for own in range(len(totals))]
+            after = [sum(count * after[mines + own] for own, count in enumerate(totals) if count)
+                     for mines in range(len(before))]
+        other_probability = None
+        if other_cells:
+            other_probability = sum(count * weight * (mines_left - total)
+                                    for total, (count, weight) in enumerate(zip(everything, rest_weights))) / (norm * other_cells)
+        return weights, other_probability
+
+    def combine_estimated(self, components, other_cells, mines_left):
+        """ This is a method that puts the components together approximately, for boards where the exact way would take
+        too long. The other cells are treated as each holding a mine with the same chance q, which makes every component
+        independent. q is picked (by bisection) so the expected number of mines comes out right. """
+        def tilted(component, log_ratio):
+            logs = [mines * log_ratio if count > 0 else None for mines, count in enumerate(component.totals)]
+            top = max((value for value in logs if value is not None), default=0.0)
+            return [math.exp(value - top) if value is not None else 0.0 for value in logs]
+
+        def expected_mines(q):
+            log_ratio = math.log(q / (1 - q))
+            expected = q * other_cells
+            for component in components:
+                weights = tilted(component, log_ratio)
+                total = sum(count * weight for count, weight in zip(component.totals, weights))
+                if total > 0:
+                    expected += sum(mines * count * weight for mines, (count, weight)
+                                    in enumerate(zip(component.totals, weights))) / total
+            return expected
+
+        low, high = 1e-12, 1 - 1e-12
+        for _ in range(60):
+            middle = (low + high) / 2
+            if expected_mines(middle) < mines_left:
+                low = middle
+            else:
+                high = middle
+        q = (low + high) / 2
+        log_ratio = math.log(q / (1 - q))
+        return [tilted(component, log_ratio) for component in components], (q if other_cells else None)
+
+    def hint(self, engine):
+        """ This is a method that works out the chance of a mine for every hidden cell of the engine's game.
+        Returns a Hint_Class. """
+        grid = engine.grid
+        signatures = self.split_components(self.constraints(engine))
+        flags = grid.num_mines - engine.mines_remaining
+        mines_left = engine.mines_remaining
+        hidden_cells = grid.width * grid.height - grid.revealed_safe_count - grid.revealed_mine_count - flags
+        frontier_cells = sum(len({cell for cells, _ in signature for cell in cells}) for signature in signatures)
+        other_cells = hidden_cells - frontier_cells
+
+        key = (frozenset(signatures), other_cells, mines_left)
+        if key == self.last_key:                    ## nothing changed since the last hint
+            self.counted = 0
+            return self.last_hint
+
+        self.counted = 0
+        cache = {}
+        components = []
+        for signature in signatures:
+            component = self.component(signature)
+            cache[signature] = component
+            components.append(component)
+        self.cache = cache                          ## components that aren't on the board any more are dropped
+
+        if any(not any(component.totals) for component in components):
+            hint = Hint_Class({}, None, set(), consistent=False)
+        else:
+            components.sort(key=lambda component: min(component.cells))
+            cost = 0
+            size_so_far = 0
+            for component in components:
+                size_so_far += len(component.cells)
+                cost += size_so_far * len(component.cells)
+            combined_exactly = cost <= self.combine_budget or not other_cells
+            if combined_exactly:
+                weights, other_probability = self.combine_exact(components, other_cells, mines_left)
+            else:
+                weights, other_probability = self.combine_estimated(components, other_cells, mines_left)
+            if weights is None:
+                hint = Hint_Class({}, None, set(), consistent=False)
+            else:
+                probabilities = {}
+                estimated = set()
+                consistent = True
+                for component, component_weights in zip(components, weights):
+                    cell_probabilities = component.cell_probabilities(component_weights)
+                    if cell_probabilities is None:
+                        consistent = False
+                        continue
+                    probabilities.update(cell_probabilities)
+                    if not (component.exact and combined_exactly):
+                        estimated.update(component.cells)
+                hint = Hint_Class(probabilities, other_probability, estimated, consistent)
+        self.last_key, self.last_hint = key, hint
+        return hint
+
+    @staticmethod
+    def safest_move(grid, hint, window=None):
+        """ This is a method that picks the hidden cell least likely to be a mine. Cells next to numbers are checked first
+        (lowest index wins a tie). If the other cells are safer, it picks the first one inside window (x0, y0, x1, y1),
+        which is the whole board by default. Returns (x, y, probability), or None if there's nothing to pick. """
+        best_index, best_probability = None, 2.0
+        for index, probability in hint.probabilities.items():
+            if probability < best_probability or (probability == best_probability and index < best_index):
+                best_index, best_probability = index, probability
+        if hint.other_probability is not None and hint.other_probability < best_probability:
+            x0, y0, x1, y1 = window or (0, 0, grid.width, grid.height)
+            for y in range(y0, y1):
+                start = y * grid.width
+                revealed_row = grid.revealed[start + x0:start + x1]
+                flagged_row = grid.flagged[start + x0:start + x1]
+                for offset in range(x1 - x0):
+                    index = start + x0 + offset
+                    if not revealed_row[offset] and not flagged_row[offset] and index not in hint.probabilities:
+                        return index % grid.width, index // grid.width, hint.other_probability
+        if best_index is None:
+            return None
+        return best_index % grid.width, best_index // grid.width, best_probability
+
+    @staticmethod
+    def chance_text(probability, certain):
+        """ This is a method that turns a chance into the 3 characters drawn in the cell: ' ! ' for a sure mine,
+        otherwise a percentage from 0% to 99%. Only a chance of exactly 0 shows as 0%. """
+        if certain and probability >= 1.0:
+            return " ! "
+        percent = round(probability * 100)
+        if probability > 0 and percent == 0:
+            percent = 1
+        if percent == 100:
+            percent = 99                            ## ' ! ' is the only way a sure mine is shown
+        return f"{percent:2d}%"
+
+    def overlay(self, hint):
+        """ This is a method that turns a hint into a display overlay: (flat index -> cell text, text for the other cells). """
+        overlay = {index: self.chance_text(probability, index not in hint.estimated)
+                   for index, probability in hint.probabilities.items()}
+        other_text = self.chance_text(hint.other_probability, True) if hint.other_probability is not None else "▒▒▒"
+        return overlay, other_text
+
+    @staticmethod
+    def describe(x, y, probability):
+        """ This is a method that gives the move and its chance as text, e.g. 'C4 (12% chance of a mine)'. """
+        return f"{Coordinate_Codec_Class.format(x, y)} ({probability * 100:.0f}% chance of a mine)"
+
+
+def play_seed(width, height, num_mines, seed):
+    """ Plays one seeded game with the solver. Returns (won, guesses, moves). This is the job each worker process runs. """
+    engine = Game_Engine_Class()
+    engine.new_game(width, height, num_mines, seed=seed)
+    solver = Solver_Class(engine)
+    won = solver.play()
+    return won, solver.guesses, solver.moves
+
+
+def simulate(width, height, num_mines, games, workers=None, first_seed=0):
+    """ Plays games seeded first_seed, first_seed + 1, ... across a process pool and returns the totals.
+    Games are handed out in batches so the processes spend their time playing, not passing messages. """
+    workers = workers or os.cpu_count() or 1
+    seeds = range(first_seed, first_seed + games)
+    job = partial(play_seed, width, height, num_mines)
+    start = time.perf_counter()
+    if workers == 1:
+        results = list(map(job, seeds))                        ## no pool at all, handy for profiling
+    else:
+        batch_size = max(1, games // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(job, seeds, chunksize=batch_size))
+    elapsed = time.perf_counter() - start
+    wins = sum(1 for won, _, _ in results if won)
+    guesses = sum(guess_count for _, guess_count, _ in results)
+    moves = sum(move_count for _, _, move_count in results)
+    return {
+        "width": width,
+        "height": height,
+        "mines": num_mines,
+        "games": games,
+        "workers": workers,
+        "wins": wins,
+        "win_rate": wins / games if games else 0.0,
+        "guesses_per_game": guesses / games if games else 0.0,
+        "moves_per_game": moves / games if games else 0.0,
+        "seconds": elapsed,
+        "games_per_sec": games / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    presets = [key for key, (width, height, num_mines, name) in DIFFICULTY_PRESETS.items() if num_mines]
+    parser = argparse.ArgumentParser(description="Measure how solvable the minesweeper presets are.")
+    parser.add_argument("--preset", default="all", choices=presets + ["all"], help="difficulty preset letter, or all (default)")
+    parser.add_argument("--games", type=int, default=1000, help="games to play per preset (default: 1000)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the rest count up from it (default: 0)")
+    args = parser.parse_args(argv)
+
+    for key in presets if args.preset == "all" else [args.preset]:
+        width, height, num_mines, name = DIFFICULTY_PRESETS[key]
+        report = simulate(width, height, num_mines, args.games, args.workers, args.seed)
+        report["preset"] = name
+        print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())